@@ -6,19 +6,16 @@ Interactive ML model demonstration and evaluation platform
 import streamlit as st
 import pandas as pd
 import numpy as np
-import joblib
 import json
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.metrics import (
-    accuracy_score,
-    roc_auc_score,
-    precision_score,
-    recall_score,
-    f1_score,
-    matthews_corrcoef,
-    confusion_matrix,
-    classification_report
+import os
+import tempfile
+from model import artifacts, charts, dataset, data_profile, explain, prediction_cache, tracing, validation
+from model.registry import ModelRegistry
+from model.scoring import (
+    TARGET_COLUMN,
+    score_csv,
+    score_all,
+    report_from_confusion
 )
 import warnings
 warnings.filterwarnings('ignore')
@@ -78,32 +75,239 @@ with st.sidebar:
     **Deadline**: 15-Feb-2026
     """)
 
+# Token that changes when a results file is rewritten (retraining), used as a cache key
+def file_version(path):
+    try:
+        stat = os.stat(path)
+        return (stat.st_size, stat.st_mtime_ns)
+    except OSError:
+        return None
+
 # Load model results
 @st.cache_data
-def load_results():
+def load_results(results_version):
     try:
-        with open('model/results.json', 'r') as f:
+        with open(artifacts.RESULTS_PATH, 'r') as f:
             return json.load(f)
     except:
         st.error("Model results not found. Please train models first.")
         return None
 
-# Load models
+# Load timing and size measurements recorded at training time (optional)
+@st.cache_data
+def load_performance(performance_version):
+    try:
+        with open(artifacts.PERFORMANCE_PATH, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+# Operating thresholds, test-split threshold sweeps and calibration bins (optional)
+@st.cache_data
+def load_threshold_report(thresholds_version):
+    try:
+        with open(artifacts.THRESHOLDS_PATH, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+# Grade model (multi-class/ordinal) test metrics from train_models.py (optional)
+@st.cache_data
+def load_grade_results(grade_results_version):
+    try:
+        with open(artifacts.GRADE_RESULTS_PATH, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+# Training feature distribution: reference for the input validation and drift checks
+@st.cache_data
+def load_validation_reference(profile_version):
+    return validation.load_reference()
+
+def make_validator():
+    reference = load_validation_reference(file_version(artifacts.TRAINING_PROFILE_PATH))
+    return validation.InputValidator(reference) if reference is not None else None
+
+# Rendered charts as PNG bytes: one entry per distinct input (metric choice, results,
+# prediction summary), shared by all sessions and bounded in size
+FIGURE_CACHE_ENTRIES = 64
+
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def render_chart(kind, *args):
+    # Only runs on a cache miss, so its span is the matplotlib cost
+    with tracing.span('render (matplotlib)', kind=kind):
+        return getattr(charts, kind)(*args)
+
+def show_chart(kind, *args):
+    with tracing.span('chart', kind=kind):
+        st.image(render_chart(kind, *args), use_container_width=True)
+
+def show_timing(trace):
+    """Where a prediction request spent its time: one row per span, plus the trace as a download."""
+    with st.expander(f"⏱️ Timing breakdown ({trace.wall_seconds() * 1000:,.0f} ms traced)"):
+        summary = trace.summary()
+        st.dataframe(summary.style.format({'Share': '{:.1%}', 'Total (ms)': '{:,.2f}', 'Mean (ms)': '{:,.2f}',
+                                           'Peak Memory (MB)': '{:,.2f}'}),
+                     hide_index=True, use_container_width=True)
+        st.caption("Spans marked └ run inside the one above; 'Share' is of the traced wall time. "
+                   "Parsing, scaling and prediction are timed per chunk; charts only render on a cache miss.")
+        st.download_button(
+            label="⬇️ Download Trace (open in ui.perfetto.dev)",
+            data=json.dumps(trace.chrome_trace()),
+            file_name="prediction_trace.json",
+            mime="application/json"
+        )
+
+DRIFT_COLORS = {'moderate': 'background-color: #fff3cd', 'significant': 'background-color: #f8d7da'}
+
+def show_validation(checks):
+    """Schema notes, filled-in values and per-feature drift from the validation stage run while scoring."""
+    if checks is None:
+        return
+    st.subheader("🩺 Input Validation & Drift")
+    for issue in checks.issues:
+        st.info(issue)
+    if checks.imputed_rows:
+        st.warning(f"{checks.imputed_rows:,} row(s) had missing, non-numeric or unknown values; "
+                   "they were filled with training means before scoring")
+
+    report = checks.report()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Rows validated", f"{checks.n_rows:,}")
+    with col2:
+        st.metric("Values outside training range", f"{int(report['Below Range'].sum() + report['Above Range'].sum()):,}")
+    with col3:
+        st.metric(f"Drifted features (PSI ≥ {validation.PSI_MODERATE})", len(checks.drifted()))
+    st.dataframe(
+        report.style.format({'PSI': '{:.4f}', 'KS': '{:.4f}', 'KS p-value': '{:.3g}'})
+        .map(lambda status: DRIFT_COLORS.get(status, ''), subset=['Drift']),
+        hide_index=True, use_container_width=True
+    )
+    st.caption(f"PSI compares the upload with the training data over ten equal-mass bins: below "
+               f"{validation.PSI_MODERATE} stable, up to {validation.PSI_SIGNIFICANT} a moderate shift, "
+               f"above it a significant one. Drift is not assessed on fewer than "
+               f"{validation.MIN_DRIFT_ROWS} rows.")
+
+# Inference-time parameters that change a model's predictions without changing its artifact
+MODEL_SETTINGS = ('mode', 'method')
+
+def model_settings(model):
+    """The kNN search mode, Ensemble combination etc. a model predicts with, for prediction cache keys."""
+    params = model.get_params()
+    return [f"{key}={params[key]}" for key in MODEL_SETTINGS if key in params]
+
+def show_comparison(uploaded_file, model_names, thresholds, track_memory=False):
+    """Score the upload with every model in one pass and show predictions and agreement side by side."""
+    if not st.button("🚀 Predict with All Models", type="primary"):
+        return
+
+    with st.spinner(f"Scoring with {len(model_names)} models..."), \
+            tracing.trace(memory=track_memory, label='app') as trace:
+        registry = load_registry()
+        models = {name: registry.get(name) for name in model_names}
+        needs_scaler = not all(artifacts.is_fused(m) for m in models.values())
+        cache = load_prediction_cache()
+        with tracing.span('prediction cache lookup'):
+            key = prediction_cache.cache_key(
+                uploaded_file.getvalue(),
+                'all models',
+                *(f"{name}={registry.checksum(name)}@{thresholds.get(name)}" for name in model_names),
+                *(f"{name}:{setting}" for name in model_names for setting in model_settings(models[name])),
+                registry.scaler_checksum() if needs_scaler else None
+            )
+            cached = cache.get(key)
+
+        if cached is not None:
+            summary, output_path = cached
+            with open(output_path, 'rb') as f:
+                output = f.read()
+        else:
+            scaler = registry.scaler() if needs_scaler else None
+            output = tempfile.TemporaryFile(mode='w+', newline='')
+            summary = score_all(uploaded_file, models, scaler, output, thresholds=thresholds,
+                                validator=make_validator())
+            with tracing.span('prediction cache store'):
+                cache.put(key, summary, output)
+            output.seek(0)
+
+    st.subheader("📋 Prediction Results (All Models)")
+    st.caption(f"Scored {summary.n_rows:,} rows with {len(model_names)} models"
+               + (f" (showing first {len(summary.preview):,})" if summary.n_rows > len(summary.preview) else "")
+               + (" · ♻️ from the prediction cache" if cached is not None else ""))
+    st.dataframe(summary.preview)
+
+    st.download_button(
+        label="⬇️ Download Predictions",
+        data=output,
+        file_name="wine_quality_predictions_all_models.csv",
+        mime="text/csv"
+    )
+
+    show_validation(summary.validation)
+
+    st.subheader("🤝 Model Agreement")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Rows where all models agree", f"{summary.unanimous / max(summary.n_rows, 1):.1%}")
+    with col2:
+        st.metric("Models", len(model_names))
+
+    df_models = summary.model_table()
+    st.dataframe(df_models.style.format('{:.4f}').highlight_max(axis=0, color='lightgreen'),
+                 use_container_width=True)
+    with tracing.trace(trace):
+        show_chart('agreement_heatmap', summary.agreement_matrix())
+    show_timing(trace)
+
+def pareto_front(cost, score):
+    """Models not beaten by another that is both cheaper and at least as good."""
+    front = []
+    for name in cost.index:
+        dominated = ((cost <= cost[name]) & (score >= score[name])
+                     & ((cost < cost[name]) | (score > score[name]))).any()
+        if not dominated:
+            front.append(name)
+    return sorted(front, key=lambda n: cost[n])
+
+# Model registry: artifacts are loaded lazily and evicted LRU under a memory budget
+@st.cache_resource
+def load_registry():
+    return ModelRegistry()
+
+# Scored uploads on disk, keyed by file content and model/scaler checksums
+@st.cache_resource
+def load_prediction_cache():
+    return prediction_cache.PredictionCache()
+
+# Explainers over the plain artifacts (building the decision tree's TreeSHAP tables takes a
+# moment); keyed on the artifact checksums so a retrained model gets a new one
 @st.cache_resource
+def load_explainer(model_name, model_checksum, scaler_checksum):
+    registry = load_registry()
+    return explain.make_explainer(registry.get(model_name, variant='model'), registry.scaler())
+
 def load_model(model_name):
     try:
-        model_filename = f"model/{model_name.lower().replace(' ', '_')}.pkl"
-        return joblib.load(model_filename)
-    except:
-        st.error(f"Model {model_name} not found.")
+        return load_registry().get(model_name)
+    except Exception as e:
+        st.error(f"Model {model_name} could not be loaded: {e}")
         return None
 
-@st.cache_resource
+# Precomputed dataset statistics; computed from the data only if the stored profile is missing or stale
+@st.cache_data
+def load_profile(data_version):
+    profile = data_profile.load_profile()
+    if profile is None:
+        profile = data_profile.build_profile(dataset.load_prepared(refresh=False))
+    return profile
+
 def load_scaler():
     try:
-        return joblib.load('model/scaler.pkl')
-    except:
-        st.error("Scaler not found.")
+        return load_registry().scaler()
+    except Exception as e:
+        st.error(f"Scaler could not be loaded: {e}")
         return None
 
 # HOME PAGE
@@ -133,6 +337,8 @@ if page == "🏠 Home":
         5. **Random Forest** - Ensemble of decision trees
         6. **XGBoost** - Gradient boosting ensemble
 
+        Plus an **Ensemble** of all six: a stacking meta-learner (or soft voting) over their probabilities
+
         ### 📊 Dataset Information
 
         - **Source**: UCI Machine Learning Repository
@@ -149,20 +355,41 @@ if page == "🏠 Home":
 elif page == "📊 Model Comparison":
     st.header("📊 Model Performance Comparison")
 
-    results = load_results()
+    results = load_results(file_version(artifacts.RESULTS_PATH))
 
     if results:
         # Convert to DataFrame
         df_results = pd.DataFrame(results).T
         df_results = df_results.round(4)
 
-        # Display comparison table
+        performance = load_performance(file_version(artifacts.PERFORMANCE_PATH))
+        df_performance = pd.DataFrame(performance).T.reindex(df_results.index) if performance else None
+
+        # Display comparison table (quality metrics, plus serving cost when measured)
         st.subheader("Performance Metrics Table")
-        st.dataframe(
-            df_results.style.highlight_max(axis=0, color='lightgreen')
-                           .highlight_min(axis=0, color='lightcoral'),
-            use_container_width=True
-        )
+        if df_performance is not None:
+            quality = list(df_results.columns)
+            df_table = df_results.join(df_performance[['Throughput (rows/s)', 'Latency (ms/row)', 'Artifact (MB)']])
+            higher_better = quality + ['Throughput (rows/s)']
+            lower_better = ['Latency (ms/row)', 'Artifact (MB)']
+            st.dataframe(
+                df_table.style.highlight_max(axis=0, color='lightgreen', subset=higher_better)
+                              .highlight_min(axis=0, color='lightcoral', subset=higher_better)
+                              .highlight_min(axis=0, color='lightgreen', subset=lower_better)
+                              .highlight_max(axis=0, color='lightcoral', subset=lower_better)
+                              .format('{:,.0f}', subset=['Throughput (rows/s)'])
+                              .format('{:.3f}', subset=lower_better)
+                              .format('{:.4f}', subset=quality),
+                use_container_width=True
+            )
+            st.caption("Latency: one row through the fused artifact; throughput: 10,000-row batches "
+                       "(measured by model/train_models.py on the training machine)")
+        else:
+            st.dataframe(
+                df_results.style.highlight_max(axis=0, color='lightgreen')
+                               .highlight_min(axis=0, color='lightcoral'),
+                use_container_width=True
+            )
 
         # Best models summary
         st.subheader("🏆 Best Performing Models by Metric")
@@ -188,7 +415,8 @@ elif page == "📊 Model Comparison":
         # Visualization
         st.subheader("📈 Visual Comparison")
 
-        tab1, tab2 = st.tabs(["Bar Chart", "Heatmap"])
+        tab1, tab2, tab3, tab4, tab5 = st.tabs(["Bar Chart", "Heatmap", "Speed vs Accuracy",
+                                                "Thresholds & Calibration", "Quality Grades"])
 
         with tab1:
             # Select metric to visualize
@@ -197,35 +425,96 @@ elif page == "📊 Model Comparison":
                 metrics
             )
 
-            fig, ax = plt.subplots(figsize=(10, 6))
-            df_results[metric_to_plot].sort_values(ascending=True).plot(
-                kind='barh',
-                ax=ax,
-                color='#8B0000'
-            )
-            ax.set_xlabel(metric_to_plot, fontsize=12)
-            ax.set_ylabel('Model', fontsize=12)
-            ax.set_title(f'{metric_to_plot} Comparison Across Models', fontsize=14, fontweight='bold')
-            ax.grid(axis='x', alpha=0.3)
-
-            for i, v in enumerate(df_results[metric_to_plot].sort_values()):
-                ax.text(v + 0.01, i, f'{v:.4f}', va='center')
-
-            st.pyplot(fig)
+            show_chart('metric_bars', df_results[metric_to_plot], metric_to_plot)
 
         with tab2:
-            fig, ax = plt.subplots(figsize=(10, 6))
-            sns.heatmap(
-                df_results.T,
-                annot=True,
-                fmt='.4f',
-                cmap='RdYlGn',
-                center=0.7,
-                ax=ax,
-                cbar_kws={'label': 'Score'}
-            )
-            ax.set_title('All Metrics Heatmap', fontsize=14, fontweight='bold')
-            st.pyplot(fig)
+            show_chart('metrics_heatmap', df_results)
+
+        with tab3:
+            if df_performance is None:
+                st.info("No timing measurements found. Retrain with model/train_models.py "
+                        "to record latency and throughput.")
+            else:
+                col1, col2 = st.columns(2)
+                with col1:
+                    pareto_metric = st.selectbox("Quality metric", metrics, index=metrics.index('F1'))
+                with col2:
+                    cost_column = st.selectbox("Cost", ['Latency (ms/row)', 'Artifact (MB)', 'Fit (s)'])
+
+                cost = df_performance[cost_column].astype(float)
+                score = df_results[pareto_metric].astype(float)
+                front = pareto_front(cost, score)
+
+                show_chart('pareto_scatter', cost, score, front, cost_column, pareto_metric)
+
+                # Cheapest model that clears the bar
+                threshold = st.slider(
+                    f"Minimum acceptable {pareto_metric}",
+                    float(score.min()), float(score.max()), float(score.median()), step=0.005
+                )
+                eligible = score[score >= threshold].index
+                cheapest = cost[eligible].idxmin()
+                st.success(f"Cheapest model with {pareto_metric} ≥ {threshold:.3f}: **{cheapest}** "
+                           f"({pareto_metric} {score[cheapest]:.4f}, {cost_column} {cost[cheapest]:,.3f})")
+
+        with tab4:
+            report = load_threshold_report(file_version(artifacts.THRESHOLDS_PATH))
+            if report is None:
+                st.info("No threshold analysis found. Retrain with model/train_models.py "
+                        "to choose operating thresholds.")
+            else:
+                chosen_by = report['metric']
+                st.markdown(f"Each model's operating threshold maximises **{chosen_by}** on out-of-fold "
+                            f"predictions over the training split; the curves and metrics below are "
+                            f"on the test split. Predictions use these thresholds instead of 0.5.")
+                entries = report['models']
+                df_thresholds = pd.DataFrame({
+                    name: {
+                        'Threshold': entry['threshold'],
+                        f'{chosen_by} @ 0.5': df_results.loc[name, chosen_by] if name in df_results.index else None,
+                        f'{chosen_by} @ threshold': entry['test'][chosen_by],
+                        'Precision @ threshold': entry['test']['Precision'],
+                        'Recall @ threshold': entry['test']['Recall'],
+                        'Calibration error': entry['calibration_error']
+                    }
+                    for name, entry in entries.items()
+                }).T
+                st.dataframe(df_thresholds.style.format('{:.4f}'), use_container_width=True)
+
+                threshold_model = st.selectbox("Model", list(entries), key='threshold_model')
+                entry = entries[threshold_model]
+                col1, col2 = st.columns(2)
+                with col1:
+                    show_chart('threshold_curves', pd.DataFrame(entry['sweep']), entry['threshold'], threshold_model)
+                with col2:
+                    show_chart('calibration_curve', pd.DataFrame(entry['calibration']), threshold_model)
+                st.caption(f"Calibration error: {entry['calibration_error']:.4f} (count-weighted mean gap "
+                           f"between predicted probability and observed rate; bin sizes annotated)")
+
+        with tab5:
+            grade_report = load_grade_results(file_version(artifacts.GRADE_RESULTS_PATH))
+            if grade_report is None:
+                st.info("No grade models found. Retrain with model/train_models.py "
+                        "to train the multi-class grade models.")
+            else:
+                st.markdown(f"Grade models ({grade_report['method']}) are trained on the same scaled features "
+                            f"to predict the original 3-9 quality grade. Their Good/Not Good answer is "
+                            f"P(grade ≥ 7) summed from the grade probabilities, so one evaluation gives both.")
+                grade_rows = {}
+                for name in df_results.index:
+                    entry = grade_report['models'].get(artifacts.grade_model_name(name))
+                    if entry is not None:
+                        grade_rows[artifacts.grade_model_name(name)] = {
+                            **{f'Grade {metric}': value for metric, value in entry['grades'].items()},
+                            'Derived AUC': entry['binary']['AUC'],
+                            'Derived F1': entry['binary']['F1'],
+                            'Binary Model AUC': df_results.loc[name, 'AUC']
+                        }
+                df_grades = pd.DataFrame(grade_rows).T
+                st.dataframe(df_grades.style.format('{:.4f}'), use_container_width=True)
+                st.caption("Within One: share of samples predicted within one grade of the truth; "
+                           "QWK: quadratic weighted kappa (near misses cost less than distant ones). "
+                           "Derived metrics are on the test split at P(Good) ≥ 0.5.")
 
 # PREDICTIONS PAGE
 elif page == "🔮 Make Predictions":
@@ -234,23 +523,96 @@ elif page == "🔮 Make Predictions":
     st.markdown("""
     Upload a CSV file with wine features to predict quality using trained models.
 
-    **Note**: Due to Streamlit Cloud free tier limitations, please upload only **test data** (smaller files).
+    Files are scored in fixed-size chunks, so large exports can be uploaded; the table
+    below previews the first rows and the download contains every scored row.
     """)
 
-    # Model selection
-    model_options = [
-        'Logistic Regression',
-        'Decision Tree',
-        'kNN',
-        'Naive Bayes',
-        'Random Forest',
-        'XGBoost'
-    ]
+    # Model selection (only models whose artifacts are present)
+    registry = load_registry()
+    problems = registry.validate()
+    if problems:
+        with st.expander(f"⚠️ {len(problems)} model artifact problem(s)"):
+            for problem in problems:
+                st.write(f"- {problem}")
+    model_options = registry.available()
+
+    compare_all = st.toggle(
+        "🧮 Score with all models",
+        help="Parse and scale the upload once, score it with every available model "
+             "in parallel and compare their predictions side by side"
+    )
 
     selected_model = st.selectbox(
         "🤖 Select Model for Prediction",
         model_options,
-        index=4  # Default to Random Forest (best performer)
+        # Default to Random Forest (best performer) when it is available
+        index=model_options.index('Random Forest') if 'Random Forest' in model_options else 0,
+        disabled=compare_all
+    )
+
+    # Grade variant of the selected model: the 3-9 grade and Good/Not Good from one evaluation
+    predict_grades = False
+    grade_model = artifacts.grade_model_name(selected_model)
+    if not compare_all and grade_model in registry.available(artifacts.GRADE_MODEL_NAMES):
+        predict_grades = st.toggle(
+            "🍇 Also predict the quality grade (3-9)",
+            help="Scores with the model's grade variant, trained on the same features: the most likely "
+                 "and expected grade of each row, with Good/Not Good derived from the grade "
+                 "probabilities (P(grade ≥ 7)) in the same model evaluation"
+        )
+    model_name = grade_model if predict_grades else selected_model
+
+    # Why each row got its label: per-feature contributions from the plain artifact (model/explain.py)
+    explain_predictions = False
+    if not compare_all and not predict_grades and selected_model in explain.EXPLAINABLE:
+        explain_predictions = st.toggle(
+            "🔍 Explain each prediction (feature contributions)",
+            help="Adds every feature's contribution to the model's score and the top reason for the "
+                 "predicted label to each row: TreeSHAP for Decision Tree, exact linear terms for "
+                 "Logistic Regression and per-feature likelihood ratios for Naive Bayes. "
+                 "Slower than plain scoring; results are cached per model version"
+        )
+
+    knn_mode = 'exact'
+    if selected_model == 'kNN' and not compare_all and not predict_grades:
+        knn_mode = st.radio(
+            "🔎 Neighbour search",
+            ['exact', 'approx'],
+            horizontal=True,
+            help="Approximate search prunes the KD-tree more aggressively: faster, "
+                 "with a small loss of neighbour recall (see model/knn_report.json)"
+        )
+
+    ensemble_method = 'stacking'
+    if selected_model == 'Ensemble' and not compare_all:
+        ensemble_method = st.radio(
+            "🗳️ Combine members by",
+            ['stacking', 'soft'],
+            format_func={'stacking': 'Stacking meta-learner', 'soft': 'Soft voting'}.get,
+            horizontal=True,
+            help="Confident rows are answered by the cheap members alone; "
+                 "the others are scored by all six models in parallel"
+        )
+
+    # Decision threshold on P(Good): the model's operating threshold unless changed here
+    report = load_threshold_report(file_version(artifacts.THRESHOLDS_PATH))
+    thresholds = {name: entry['threshold'] for name, entry in report['models'].items()} if report else {}
+    decision_threshold = None
+    if not compare_all:
+        decision_threshold = st.slider(
+            "🎚️ Decision threshold on P(Good)",
+            0.01, 0.99, float(thresholds.get(model_name, 0.5)), step=0.005, format="%.3f",
+            help="Rows are predicted Good once the model's probability reaches this value. "
+                 "The default is the model's operating threshold chosen at training time "
+                 "(see Model Comparison → Thresholds & Calibration)"
+        )
+    else:
+        st.caption("🎚️ Each model predicts at its own operating threshold")
+
+    track_memory = st.toggle(
+        "⏱️ Track peak memory in the timing breakdown",
+        help="Records the peak Python/NumPy memory of each step (parse, scale, predict, charts) "
+             "with tracemalloc; the prediction runs noticeably slower while it is on"
     )
 
     # File uploader
@@ -262,129 +624,168 @@ elif page == "🔮 Make Predictions":
 
     if uploaded_file is not None:
         try:
-            # Load data
-            df_test = pd.read_csv(uploaded_file)
+            # Peek at the header and first rows only; the full file is streamed later
+            df_head = pd.read_csv(uploaded_file, nrows=10)
+            uploaded_file.seek(0)
 
-            st.success(f"✅ File uploaded successfully! Shape: {df_test.shape}")
+            st.success(f"✅ File uploaded successfully! Columns: {df_head.shape[1]}")
 
             # Show first few rows
             with st.expander("👀 Preview uploaded data"):
-                st.dataframe(df_test.head(10))
+                st.dataframe(df_head)
 
             # Check if target column exists
-            has_target = 'quality' in df_test.columns
+            has_target = TARGET_COLUMN in df_head.columns
 
             if has_target:
-                X_test = df_test.drop('quality', axis=1)
-                y_true = df_test['quality']
                 st.info("Target column 'quality' detected. Will evaluate model performance.")
             else:
-                X_test = df_test
-                y_true = None
                 st.warning("No target column detected. Will only show predictions.")
 
-            # Load model and scaler
-            model = load_model(selected_model)
-            scaler = load_scaler()
-
-            if model is not None and scaler is not None:
-                # Make predictions
-                if st.button("🚀 Predict Quality", type="primary"):
-                    with st.spinner("Making predictions..."):
-                        # Scale features
-                        X_test_scaled = scaler.transform(X_test)
-
-                        # Predict
-                        y_pred = model.predict(X_test_scaled)
-                        y_pred_proba = model.predict_proba(X_test_scaled)[:, 1] if hasattr(model, 'predict_proba') else y_pred
-
-                        # Add predictions to dataframe
-                        df_results = df_test.copy()
-                        df_results['Predicted_Quality'] = ['Good' if p == 1 else 'Not Good' for p in y_pred]
-                        df_results['Confidence'] = [max(p, 1-p) for p in y_pred_proba]
-
-                        st.subheader("📋 Prediction Results")
-                        st.dataframe(df_results)
-
-                        # Download results
-                        csv = df_results.to_csv(index=False)
-                        st.download_button(
-                            label="⬇️ Download Predictions",
-                            data=csv,
-                            file_name="wine_quality_predictions.csv",
-                            mime="text/csv"
-                        )
-
-                        # If ground truth available, show metrics
-                        if has_target:
-                            st.subheader("📊 Model Evaluation Metrics")
-
-                            # Calculate metrics
-                            accuracy = accuracy_score(y_true, y_pred)
-                            precision = precision_score(y_true, y_pred, zero_division=0)
-                            recall = recall_score(y_true, y_pred, zero_division=0)
-                            f1 = f1_score(y_true, y_pred, zero_division=0)
-
-                            col1, col2, col3, col4 = st.columns(4)
-
-                            with col1:
-                                st.metric("Accuracy", f"{accuracy:.4f}")
-                            with col2:
-                                st.metric("Precision", f"{precision:.4f}")
-                            with col3:
-                                st.metric("Recall", f"{recall:.4f}")
-                            with col4:
-                                st.metric("F1 Score", f"{f1:.4f}")
-
-                            # Confusion Matrix
-                            st.subheader("🎯 Confusion Matrix")
-
-                            cm = confusion_matrix(y_true, y_pred)
-
-                            fig, ax = plt.subplots(figsize=(8, 6))
-                            sns.heatmap(
-                                cm,
-                                annot=True,
-                                fmt='d',
-                                cmap='Blues',
-                                xticklabels=['Not Good', 'Good'],
-                                yticklabels=['Not Good', 'Good'],
-                                ax=ax
-                            )
-                            ax.set_ylabel('True Label')
-                            ax.set_xlabel('Predicted Label')
-                            ax.set_title(f'Confusion Matrix - {selected_model}')
-                            st.pyplot(fig)
-
-                            # Classification Report
-                            st.subheader("📄 Classification Report")
-
-                            report = classification_report(
-                                y_true,
-                                y_pred,
-                                target_names=['Not Good', 'Good'],
-                                output_dict=True
+            if compare_all:
+                show_comparison(uploaded_file, model_options, thresholds, track_memory)
+            else:
+                # Load model and scaler (fused models have the scaling folded in)
+                model = load_model(model_name)
+                fused = artifacts.is_fused(model)
+                scaler = None if fused else load_scaler()
+
+                if model is not None and (fused or scaler is not None):
+                    # Session settings go on a copy: the loaded model is shared by every session
+                    if selected_model == 'kNN' and 'mode' in model.get_params():
+                        model = artifacts.with_params(model, mode=knn_mode)
+                    if selected_model == 'Ensemble' and 'method' in model.get_params():
+                        model = artifacts.with_params(model, method=ensemble_method)
+
+                    # Make predictions
+                    if st.button("🚀 Predict Quality", type="primary"):
+                        with st.spinner("Making predictions..."), \
+                                tracing.trace(memory=track_memory, label='app') as trace:
+                            # Same file, same model artifact and settings: reuse the stored result
+                            registry = load_registry()
+                            cache = load_prediction_cache()
+                            with tracing.span('prediction cache lookup'):
+                                key = prediction_cache.cache_key(
+                                    uploaded_file.getvalue(),
+                                    model_name,
+                                    registry.checksum(model_name),
+                                    None if fused else registry.scaler_checksum(),
+                                    *model_settings(model),
+                                    f"threshold={decision_threshold:.4f}",
+                                    f"explain={registry.checksum(model_name, variant='model')}"
+                                    f"@{registry.scaler_checksum()}" if explain_predictions else None
+                                )
+                                cached = cache.get(key)
+
+                            if cached is not None:
+                                summary, output_path = cached
+                                with open(output_path, 'rb') as f:
+                                    output = f.read()
+                            else:
+                                # Stream the upload through scaler and model chunk by chunk,
+                                # spooling the scored rows to a temporary file on disk
+                                output = tempfile.TemporaryFile(mode='w+', newline='')
+                                explainer = None
+                                if explain_predictions:
+                                    explainer = load_explainer(model_name,
+                                                               registry.checksum(model_name, variant='model'),
+                                                               registry.scaler_checksum())
+                                summary = score_csv(uploaded_file, model, scaler, output,
+                                                    threshold=decision_threshold, validator=make_validator(),
+                                                    explainer=explainer)
+                                with tracing.span('prediction cache store'):
+                                    cache.put(key, summary, output)
+                                output.seek(0)
+
+                            st.subheader("📋 Prediction Results")
+                            st.caption(f"Scored {summary.n_rows:,} rows"
+                                       + (f" (showing first {len(summary.preview):,})"
+                                          if summary.n_rows > len(summary.preview) else "")
+                                       + (" · ♻️ from the prediction cache" if cached is not None else ""))
+                            st.dataframe(summary.preview)
+
+                            # Download results
+                            st.download_button(
+                                label="⬇️ Download Predictions",
+                                data=output,
+                                file_name="wine_quality_predictions.csv",
+                                mime="text/csv"
                             )
 
-                            df_report = pd.DataFrame(report).T
-                            st.dataframe(df_report.style.highlight_max(axis=0))
-
-                        # Prediction distribution
-                        st.subheader("📊 Prediction Distribution")
-
-                        pred_counts = pd.Series(y_pred).value_counts()
-
-                        fig, ax = plt.subplots(figsize=(8, 5))
-                        pred_counts.plot(kind='bar', color=['#CD5C5C', '#90EE90'], ax=ax)
-                        ax.set_xticklabels(['Not Good', 'Good'], rotation=0)
-                        ax.set_ylabel('Count')
-                        ax.set_title('Distribution of Predictions')
-                        ax.grid(axis='y', alpha=0.3)
-
-                        for i, v in enumerate(pred_counts):
-                            ax.text(i, v + 5, str(v), ha='center', fontweight='bold')
-
-                        st.pyplot(fig)
+                            show_validation(summary.validation)
+
+                            # If ground truth available, show metrics
+                            if summary.has_target:
+                                st.subheader("📊 Model Evaluation Metrics")
+
+                                # Metrics accumulated chunk by chunk while scoring
+                                cm = summary.confusion
+                                scores = summary.metrics()
+
+                                col1, col2, col3, col4, col5, col6 = st.columns(6)
+
+                                with col1:
+                                    st.metric("Accuracy", f"{scores['Accuracy']:.4f}")
+                                with col2:
+                                    st.metric("AUC", f"{scores['AUC']:.4f}")
+                                with col3:
+                                    st.metric("Precision", f"{scores['Precision']:.4f}")
+                                with col4:
+                                    st.metric("Recall", f"{scores['Recall']:.4f}")
+                                with col5:
+                                    st.metric("F1 Score", f"{scores['F1']:.4f}")
+                                with col6:
+                                    st.metric("MCC", f"{scores['MCC']:.4f}")
+
+                                # Confusion Matrix
+                                st.subheader("🎯 Confusion Matrix")
+
+                                show_chart('confusion_heatmap', cm, model_name)
+
+                                # Classification Report
+                                st.subheader("📄 Classification Report")
+
+                                df_report = report_from_confusion(cm, target_names=['Not Good', 'Good'])
+                                st.dataframe(df_report.style.highlight_max(axis=0))
+
+                            # Grade models, scored against true grades (grade column or raw quality scores)
+                            if summary.has_grade_target:
+                                st.subheader("🍇 Grade Evaluation Metrics")
+
+                                grade_scores = summary.grade_metrics()
+                                for col, (metric, value) in zip(st.columns(len(grade_scores)), grade_scores.items()):
+                                    with col:
+                                        st.metric(metric, f"{value:.4f}")
+
+                                grade_cm = summary.grade_confusion
+                                seen = np.flatnonzero(grade_cm.sum(axis=0) + grade_cm.sum(axis=1))
+                                show_chart('confusion_heatmap', grade_cm[np.ix_(seen, seen)], model_name,
+                                           tuple(str(g) for g in seen))
+
+                            # Prediction distribution
+                            st.subheader("📊 Prediction Distribution")
+
+                            show_chart('prediction_distribution', [int(c) for c in summary.pred_counts])
+                            if summary.grade_counts is not None:
+                                show_chart('grade_distribution', [int(c) for c in summary.grade_counts])
+
+                            # Feature contributions, totalled over the whole upload
+                            if summary.explanations is not None:
+                                st.subheader("🔍 Why These Predictions?")
+
+                                units = summary.explanations.units
+                                df_contributions = summary.explanations.table()
+                                show_chart('contribution_bars', df_contributions, units)
+                                st.dataframe(df_contributions.style.format(
+                                    '{:+.4f}', subset=['Mean (Not Good)', 'Mean (Good)']
+                                ).format('{:.4f}', subset=['Mean |Contribution|']),
+                                    hide_index=True, use_container_width=True)
+                                st.caption(f"Contributions are on the {units} scale: each row's Base_Score plus its "
+                                           f"contributions equals the model's score for that row. Top_Reason "
+                                           f"is the feature that pushed hardest towards the predicted label; "
+                                           f"the download has every row's contributions.")
+
+                        show_timing(trace)
 
         except Exception as e:
             st.error(f"❌ Error processing file: {str(e)}")
@@ -433,7 +834,7 @@ elif page == "📈 About Dataset":
 
     1. **Combination**: Red and white wine datasets were combined
     2. **Feature Engineering**: Added wine_type as a binary feature
-    3. **Target Transformation**: Original quality (0-10) → Binary (Good/Not Good)
+    3. **Target Transformation**: Original quality (0-10) → Binary (Good/Not Good); the original grade is kept for the grade models
     4. **Missing Values**: None found
     5. **Scaling**: StandardScaler applied for model training
     6. **Split**: 80% training, 20% testing with stratification
@@ -445,21 +846,26 @@ elif page == "📈 About Dataset":
     Decision Support Systems, Elsevier, 47(4):547-553, 2009.
     """)
 
-    # Feature statistics (if dataset available)
+    # Feature statistics (from the precomputed profile, if the dataset is available)
     try:
-        df = pd.read_csv('data/wine_quality_prepared.csv')
+        profile = load_profile(dataset.version())
 
         st.subheader("📊 Feature Statistics")
-        st.dataframe(df.describe())
+        st.dataframe(data_profile.describe(profile))
+        st.caption(f"{profile['rows']:,} samples. Quartiles of continuous features are read from "
+                   f"{data_profile.HIST_BINS}-bin histograms.")
+
+        # Per-feature distribution
+        st.subheader("📉 Feature Distribution")
+        feature = st.selectbox("Feature", profile['columns'])
+        positions, counts, width = data_profile.histogram(profile, feature)
+        show_chart('feature_histogram', positions, counts, width, feature,
+                   profile['histograms'][feature]['discrete'])
 
         # Feature correlation
         st.subheader("🔗 Feature Correlations")
 
-        fig, ax = plt.subplots(figsize=(12, 10))
-        corr = df.corr()
-        sns.heatmap(corr, annot=True, fmt='.2f', cmap='coolwarm', center=0, ax=ax)
-        ax.set_title('Feature Correlation Matrix')
-        st.pyplot(fig)
+        show_chart('correlation_heatmap', data_profile.correlation(profile))
 
     except:
         st.info("Dataset file not found. Feature statistics unavailable.")
@@ -0,0 +1,129 @@
+"""
+Wine Quality Classification - Model Artifacts
+Locations and loaders for the trained models and scaler shared by all entry points
+"""
+
+import copy
+import hashlib
+import json
+import os
+import re
+import joblib
+
+from model.compiled import CompiledTrees
+
+MODEL_DIR = 'model'
+SCALER_PATH = os.path.join(MODEL_DIR, 'scaler.pkl')
+RESULTS_PATH = os.path.join(MODEL_DIR, 'results.json')
+PERFORMANCE_PATH = os.path.join(MODEL_DIR, 'performance.json')
+THRESHOLDS_PATH = os.path.join(MODEL_DIR, 'thresholds.json')
+# Statistics profile (model/data_profile.py layout) of the training split, for input drift checks
+TRAINING_PROFILE_PATH = os.path.join(MODEL_DIR, 'training_profile.json')
+GRADE_RESULTS_PATH = os.path.join(MODEL_DIR, 'grade_results.json')
+
+MODEL_NAMES = [
+    'Logistic Regression',
+    'Decision Tree',
+    'kNN',
+    'Naive Bayes',
+    'Random Forest',
+    'XGBoost',
+    'Ensemble'
+]
+
+
+def grade_model_name(model_name):
+    """Display name of a model's quality grade variant (model/grades.py), e.g. 'XGBoost (Grades)'."""
+    return f"{model_name} (Grades)"
+
+
+# Grade variants of the six base models, trained alongside them by train_models.py
+GRADE_MODEL_NAMES = [grade_model_name(name) for name in MODEL_NAMES if name != 'Ensemble']
+
+
+def model_path(model_name):
+    """Artifact path for a model display name, e.g. 'Random Forest (Grades)' -> model/random_forest_grades.pkl."""
+    slug = re.sub(r'[^a-z0-9]+', '_', model_name.lower()).strip('_')
+    return os.path.join(MODEL_DIR, f"{slug}.pkl")
+
+
+def fused_path(model_name):
+    """Path of the scaler-folded inference artifact, e.g. model/random_forest_fused.pkl."""
+    return model_path(model_name)[:-len('.pkl')] + '_fused.pkl'
+
+
+def compiled_path(model_name):
+    """Path of the compiled node-table artifact, e.g. model/random_forest_compiled.npz."""
+    return model_path(model_name)[:-len('.pkl')] + '_compiled.npz'
+
+
+def compact_path(model_name):
+    """Path of the memory-mapped compact artifact, e.g. model/random_forest_compact.bin."""
+    return model_path(model_name)[:-len('.pkl')] + '_compact.bin'
+
+
+def file_sha256(path):
+    """SHA-256 of a file, read in 1 MB blocks; identifies artifacts and data files across machines."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_model(model_name):
+    return joblib.load(model_path(model_name))
+
+
+def load_scaler():
+    return joblib.load(SCALER_PATH)
+
+
+def load_inference_model(model_name, compiled=False):
+    """
+    Prefer the fused artifact (raw features in, no separate scaler) when it exists.
+
+    With ``compiled``, tree models load from their compiled node table instead:
+    faster to load and lower latency for small batches (roughly up to a
+    thousand rows per call); the native predictors keep the edge on bulk scoring.
+    """
+    if compiled and os.path.exists(compiled_path(model_name)):
+        return CompiledTrees.load(compiled_path(model_name))
+    if os.path.exists(fused_path(model_name)):
+        return joblib.load(fused_path(model_name))
+    return load_model(model_name)
+
+
+def load_thresholds(path=THRESHOLDS_PATH):
+    """Operating threshold on P(Good) per model, chosen by train_models.py ({} before the first run)."""
+    try:
+        with open(path) as f:
+            return {name: entry['threshold'] for name, entry in json.load(f)['models'].items()}
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def is_fused(model):
+    return getattr(model, 'scaler_folded', False)
+
+
+def with_params(model, **params):
+    """
+    Copy of ``model`` with ``params`` set; the original is left untouched.
+
+    Loaded models are shared (the registry and the app cache one instance
+    for every caller), so per-request settings such as the kNN search mode
+    must not be set on them. The copy is shallow: fitted arrays are shared.
+    A fused model's parameters belong to its wrapped estimator, which is
+    copied as well.
+    """
+    model = copy.copy(model)
+    if hasattr(model, 'estimator') and is_fused(model):
+        model.estimator = copy.copy(model.estimator)
+    return model.set_params(**params)
+
+
+def load_pipeline(model_name, compiled=False):
+    """Return (model, scaler); scaler is None when the model has the scaling folded in."""
+    model = load_inference_model(model_name, compiled)
+    return model, None if is_fused(model) else load_scaler()
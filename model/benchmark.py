@@ -0,0 +1,265 @@
+"""
+Wine Quality Classification - Benchmark Suite
+Measures training and inference cost of every model and flags regressions against a baseline
+
+Usage:
+    python model/benchmark.py                          # full run, compared with the baseline
+    python model/benchmark.py --sizes 1 100 10000      # skip the 1M-row batch
+    python model/benchmark.py --save-baseline          # store this run as the new baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+warnings.filterwarnings('ignore')
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+import xgboost
+
+# Allow `python model/benchmark.py` from the repository root to import the model package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from model.dataset import FEATURE_COLUMNS, TARGET_COLUMN, load_prepared
+from model.fused import fuse
+from model.scoring import score_chunk
+
+RESULTS_PATH = os.path.join('model', 'benchmark.json')
+BASELINE_PATH = os.path.join('model', 'benchmark_baseline.json')
+BATCH_SIZES = [1, 100, 10_000, 1_000_000]
+
+# Repeat a measurement until it has run this long (or MAX_REPEATS times)
+MIN_SECONDS = 0.2
+MAX_REPEATS = 50
+# Calls slower than this (e.g. 1M rows) are timed once after the warm-up
+LONG_CALL_SECONDS = 1.0
+# Slowdowns smaller than this are timer noise, whatever the ratio
+NOISE_FLOOR = {'seconds': 0.002, 'ms': 2.0, 'mb': 1.0, 'bytes': 4096}
+
+
+def synthetic_rows(X, n_rows, seed=0):
+    """
+    Draw ``n_rows`` realistic samples from the wine feature distributions.
+
+    Rows are resampled from the real data (keeping the correlations between
+    features) and perturbed by 5% of each feature's standard deviation, then
+    clipped to the observed range; ``wine_type`` stays a 0/1 code.
+    """
+    rng = np.random.default_rng(seed)
+    values = X[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    rows = values[rng.integers(0, len(values), n_rows)]
+    continuous = [i for i, c in enumerate(FEATURE_COLUMNS) if c != 'wine_type']
+    noise = rng.normal(0.0, 0.05, (n_rows, len(continuous))) * values[:, continuous].std(axis=0)
+    rows[:, continuous] = np.clip(rows[:, continuous] + noise,
+                                  values[:, continuous].min(axis=0), values[:, continuous].max(axis=0))
+    return pd.DataFrame(rows, columns=FEATURE_COLUMNS).astype({'wine_type': np.int64})
+
+
+def time_call(fn, *args):
+    """Median wall time of ``fn(*args)`` over enough repeats to be stable."""
+    started = time.perf_counter()
+    fn(*args)  # warm-up: first-call imports, lazy initialisation, page faults
+    repeats = 1 if time.perf_counter() - started > LONG_CALL_SECONDS else MAX_REPEATS
+    timings = []
+    while len(timings) < repeats and (sum(timings) < MIN_SECONDS or len(timings) < 3):
+        started = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - started)
+    return float(np.median(timings))
+
+
+def peak_memory_mb(fn, *args):
+    """Peak Python/NumPy heap allocated while running ``fn`` (native library buffers are not traced)."""
+    tracemalloc.start()
+    try:
+        fn(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1e6
+
+
+def measure_artifact(obj):
+    """On-disk size and median load time of a joblib artifact."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'artifact.pkl')
+        joblib.dump(obj, path)
+        size = os.path.getsize(path)
+        load_seconds = time_call(joblib.load, path)
+        loaded = joblib.load(path)
+    return size, load_seconds, loaded
+
+
+def benchmark_inference(model, scaler, X, sizes=BATCH_SIZES, log=print):
+    """Latency, throughput and peak memory of ``score_chunk`` at each batch size."""
+    results = {}
+    for size in sizes:
+        batch = synthetic_rows(X, size, seed=size)
+        seconds = time_call(score_chunk, model, scaler, batch)
+        results[str(size)] = {
+            'seconds_per_call': round(seconds, 6),
+            'ms_per_row': round(seconds * 1000 / size, 6),
+            'rows_per_sec': round(size / seconds, 1),
+            'peak_mb': round(peak_memory_mb(score_chunk, model, scaler, batch), 2)
+        }
+        log(f"      batch {size:>9,}: {seconds * 1000:10.2f} ms/call  {size / seconds:14,.0f} rows/sec")
+    return results
+
+
+def run(sizes=BATCH_SIZES, log=print):
+    df = load_prepared()
+    X = df[FEATURE_COLUMNS]
+    y = df[TARGET_COLUMN]
+    X_train, _, y_train, _ = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+
+    results = {
+        'meta': {
+            'generated_at': pd.Timestamp.now(tz='UTC').isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sklearn': sklearn.__version__,
+            'xgboost': xgboost.__version__,
+            'cpu_count': os.cpu_count(),
+            'train_rows': len(X_train),
+            'batch_sizes': list(sizes)
+        },
+        'models': {}
+    }
+
+    # Imported here: train_models imports this module for its timing helpers
+    from model.train_models import build_models
+
+    for name, model in build_models().items():
+        log(f"\n⏱️  {name}")
+        started = time.perf_counter()
+        model.fit(X_train_scaled, y_train)
+        fit_seconds = time.perf_counter() - started
+        fit_peak = peak_memory_mb(build_models()[name].fit, X_train_scaled, y_train)
+        log(f"      fit: {fit_seconds:.3f}s (peak {fit_peak:.1f} MB)")
+
+        # Measure the artifact the app actually loads: the fused inference model
+        size, load_seconds, inference = measure_artifact(fuse(model, scaler, X_train))
+        log(f"      artifact: {size / 1e6:.2f} MB, loads in {load_seconds * 1000:.2f} ms")
+
+        results['models'][name] = {
+            'fit_seconds': round(fit_seconds, 4),
+            'fit_peak_mb': round(fit_peak, 2),
+            'artifact_bytes': size,
+            'load_ms': round(load_seconds * 1000, 3),
+            'predict': benchmark_inference(inference, None, X, sizes, log)
+        }
+    return results
+
+
+def _flatten(model_results):
+    """(metric label, value, noise floor) for every comparable measurement."""
+    yield 'fit_seconds', model_results['fit_seconds'], NOISE_FLOOR['seconds']
+    yield 'fit_peak_mb', model_results['fit_peak_mb'], NOISE_FLOOR['mb']
+    yield 'artifact_bytes', model_results['artifact_bytes'], NOISE_FLOOR['bytes']
+    yield 'load_ms', model_results['load_ms'], NOISE_FLOOR['ms']
+    for size, batch in model_results['predict'].items():
+        yield f'predict[{size}].seconds_per_call', batch['seconds_per_call'], NOISE_FLOOR['seconds']
+        yield f'predict[{size}].peak_mb', batch['peak_mb'], NOISE_FLOOR['mb']
+
+
+def compare(results, baseline, tolerance=0.25):
+    """
+    List measurements that got worse than the baseline by more than ``tolerance``.
+
+    Differences under the per-unit noise floor are ignored, so sub-millisecond
+    timings do not flag on scheduler jitter.
+    """
+    regressions = []
+    for name, current in results['models'].items():
+        previous = baseline.get('models', {}).get(name)
+        if previous is None:
+            continue
+        before = {label: value for label, value, _ in _flatten(previous)}
+        for label, value, floor in _flatten(current):
+            old = before.get(label)
+            if old is None:
+                continue
+            if value > old * (1 + tolerance) and value - old > floor:
+                regressions.append({
+                    'model': name,
+                    'metric': label,
+                    'baseline': old,
+                    'current': value,
+                    'change': f"{(value / old - 1) * 100:+.0f}%" if old else 'new'
+                })
+    return regressions
+
+
+def summary_table(results):
+    rows = {}
+    for name, r in results['models'].items():
+        row = {'fit (s)': r['fit_seconds'], 'artifact (MB)': round(r['artifact_bytes'] / 1e6, 3),
+               'load (ms)': r['load_ms']}
+        for size, batch in r['predict'].items():
+            row[f'rows/s @{int(size):,}'] = batch['rows_per_sec']
+        rows[name] = row
+    return pd.DataFrame(rows).T
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark training and inference for every model.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=BATCH_SIZES,
+                        help="Batch sizes in rows (default: %(default)s)")
+    parser.add_argument('--output', default=RESULTS_PATH, help="Results file (default: %(default)s)")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="Baseline file (default: %(default)s)")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Allowed slowdown vs the baseline before flagging (default: %(default)s)")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="Store this run as the baseline instead of comparing against it")
+    args = parser.parse_args(argv)
+
+    print("=" * 80)
+    print("WINE QUALITY CLASSIFICATION - BENCHMARK")
+    print("=" * 80)
+
+    results = run(args.sizes)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=4)
+
+    print("\n" + "=" * 80)
+    print(summary_table(results).to_string())
+    print("=" * 80)
+    print(f"✅ Results saved to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=4)
+        print(f"✅ Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"⚠️  No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) vs {args.baseline} (tolerance {args.tolerance:.0%}):")
+        print(pd.DataFrame(regressions).to_string(index=False))
+        return 1
+    print(f"✅ No regressions vs {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""
+Wine Quality Classification - Chart Rendering
+Builds the app's matplotlib/seaborn figures and returns them as PNG bytes
+
+Figures are created with ``matplotlib.figure.Figure`` rather than pyplot, so
+they never enter pyplot's global figure registry (which is shared by every
+Streamlit session and only emptied by ``plt.close``). Each figure is rendered
+once, cleared, and only the PNG bytes are kept, which is what the app caches.
+"""
+
+import io
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from matplotlib.figure import Figure
+
+DPI = 150
+
+
+@contextmanager
+def _figure(figsize):
+    fig = Figure(figsize=figsize)
+    try:
+        yield fig, fig.subplots()
+    finally:
+        fig.clear()
+
+
+def _png(fig):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=DPI, bbox_inches='tight')
+    return buffer.getvalue()
+
+
+def metric_bars(values, metric):
+    """Horizontal bar chart of one metric; ``values`` is a Series indexed by model name."""
+    with _figure((10, 6)) as (fig, ax):
+        ordered = values.sort_values(ascending=True)
+        ordered.plot(kind='barh', ax=ax, color='#8B0000')
+        ax.set_xlabel(metric, fontsize=12)
+        ax.set_ylabel('Model', fontsize=12)
+        ax.set_title(f'{metric} Comparison Across Models', fontsize=14, fontweight='bold')
+        ax.grid(axis='x', alpha=0.3)
+        for i, v in enumerate(ordered):
+            ax.text(v + 0.01, i, f'{v:.4f}', va='center')
+        return _png(fig)
+
+
+def metrics_heatmap(df_results):
+    with _figure((10, 6)) as (fig, ax):
+        sns.heatmap(df_results.T, annot=True, fmt='.4f', cmap='RdYlGn', center=0.7, ax=ax,
+                    cbar_kws={'label': 'Score'})
+        ax.set_title('All Metrics Heatmap', fontsize=14, fontweight='bold')
+        return _png(fig)
+
+
+def pareto_scatter(cost, score, front, cost_label, score_label):
+    """Quality vs cost per model, with the Pareto frontier (``front``, cheapest first) highlighted."""
+    with _figure((10, 6)) as (fig, ax):
+        others = [n for n in cost.index if n not in front]
+        ax.scatter(cost[others], score[others], s=80, color='#999999', label='Dominated')
+        ax.scatter(cost[front], score[front], s=100, color='#8B0000', label='Pareto frontier')
+        ax.step(cost[front], score[front], where='post', color='#8B0000', alpha=0.5)
+        for name in cost.index:
+            ax.annotate(name, (cost[name], score[name]), textcoords='offset points',
+                        xytext=(6, 6), fontsize=9)
+        ax.set_xscale('log')
+        ax.set_xlabel(f'{cost_label} (log scale, lower is better)', fontsize=12)
+        ax.set_ylabel(score_label, fontsize=12)
+        ax.set_title(f'{score_label} vs {cost_label}', fontsize=14, fontweight='bold')
+        ax.grid(alpha=0.3)
+        ax.legend()
+        return _png(fig)
+
+
+def threshold_curves(sweep, threshold, model_name, metrics=('Precision', 'Recall', 'F1', 'MCC')):
+    """Threshold metrics against the decision threshold, with the operating and default thresholds marked."""
+    with _figure((10, 6)) as (fig, ax):
+        for metric in metrics:
+            ax.plot(sweep['Threshold'], sweep[metric], label=metric, linewidth=2)
+        ax.axvline(threshold, color='#8B0000', linestyle='--', label=f'Operating threshold ({threshold:.3f})')
+        ax.axvline(0.5, color='#999999', linestyle=':', label='Default (0.50)')
+        ax.set_xlabel('Decision threshold on P(Good)', fontsize=12)
+        ax.set_ylabel('Score', fontsize=12)
+        ax.set_title(f'Threshold Sweep - {model_name}', fontsize=14, fontweight='bold')
+        ax.set_xlim(0, 1)
+        ax.grid(alpha=0.3)
+        ax.legend()
+        return _png(fig)
+
+
+def calibration_curve(bins, model_name):
+    """Reliability diagram: observed 'Good' rate per bin of predicted P(Good)."""
+    filled = bins[bins['Count'] > 0]
+    with _figure((8, 6)) as (fig, ax):
+        ax.plot([0, 1], [0, 1], linestyle='--', color='#999999', label='Perfectly calibrated')
+        ax.plot(filled['Mean Predicted'], filled['Observed Rate'], marker='o', color='#8B0000', label=model_name)
+        for _, row in filled.iterrows():
+            ax.annotate(f"{int(row['Count'])}", (row['Mean Predicted'], row['Observed Rate']),
+                        textcoords='offset points', xytext=(5, -12), fontsize=8)
+        ax.set_xlabel('Mean predicted P(Good)', fontsize=12)
+        ax.set_ylabel('Observed share of Good wines', fontsize=12)
+        ax.set_title(f'Calibration - {model_name}', fontsize=14, fontweight='bold')
+        ax.set_xlim(0, 1)
+        ax.set_ylim(0, 1)
+        ax.grid(alpha=0.3)
+        ax.legend()
+        return _png(fig)
+
+
+def confusion_heatmap(cm, model_name, labels=('Not Good', 'Good')):
+    with _figure((8, 6)) as (fig, ax):
+        sns.heatmap(np.asarray(cm), annot=True, fmt='d', cmap='Blues',
+                    xticklabels=list(labels), yticklabels=list(labels), ax=ax)
+        ax.set_ylabel('True Label')
+        ax.set_xlabel('Predicted Label')
+        ax.set_title(f'Confusion Matrix - {model_name}')
+        return _png(fig)
+
+
+def agreement_heatmap(agreement):
+    """Pairwise share of rows on which two models predict the same label."""
+    with _figure((9, 7)) as (fig, ax):
+        sns.heatmap(agreement, annot=True, fmt='.3f', cmap='Greens', vmin=min(0.5, agreement.values.min()),
+                    vmax=1.0, ax=ax, cbar_kws={'label': 'Agreement'})
+        ax.set_title('Model Agreement', fontsize=14, fontweight='bold')
+        return _png(fig)
+
+
+def prediction_distribution(pred_counts, labels=('Not Good', 'Good')):
+    counts = pd.Series(list(pred_counts), index=list(labels))
+    with _figure((8, 5)) as (fig, ax):
+        counts.plot(kind='bar', color=['#CD5C5C', '#90EE90'], ax=ax)
+        ax.set_xticklabels(list(labels), rotation=0)
+        ax.set_ylabel('Count')
+        ax.set_title('Distribution of Predictions')
+        ax.grid(axis='y', alpha=0.3)
+        for i, v in enumerate(counts):
+            ax.text(i, v + 5, str(v), ha='center', fontweight='bold')
+        return _png(fig)
+
+
+def grade_distribution(grade_counts, good_min=7):
+    """Predicted grade counts (index = grade), from the lowest to the highest grade predicted."""
+    seen = np.flatnonzero(grade_counts)
+    counts = pd.Series(list(grade_counts), index=range(len(grade_counts))).loc[seen.min():seen.max()]
+    with _figure((8, 5)) as (fig, ax):
+        counts.plot(kind='bar', color=['#90EE90' if g >= good_min else '#CD5C5C' for g in counts.index], ax=ax)
+        ax.set_xticklabels([str(g) for g in counts.index], rotation=0)
+        ax.set_xlabel('Predicted Grade')
+        ax.set_ylabel('Count')
+        ax.set_title('Distribution of Predicted Grades')
+        ax.grid(axis='y', alpha=0.3)
+        for i, v in enumerate(counts):
+            ax.text(i, v + 5, str(v), ha='center', fontweight='bold')
+        return _png(fig)
+
+
+def contribution_bars(table, units):
+    """Mean contribution per feature for rows predicted Not Good and Good (``table`` from ContributionSummary.table)."""
+    means = table.set_index('Feature')[['Mean (Not Good)', 'Mean (Good)']].iloc[::-1]
+    with _figure((10, 6)) as (fig, ax):
+        means.plot(kind='barh', color=['#CD5C5C', '#90EE90'], ax=ax)
+        ax.axvline(0, color='black', linewidth=0.8)
+        ax.set_xlabel(f'Mean contribution ({units})')
+        ax.set_ylabel('Feature')
+        ax.set_title('What Pushed Predictions Towards Good or Not Good', fontsize=14, fontweight='bold')
+        ax.grid(axis='x', alpha=0.3)
+        return _png(fig)
+
+
+def feature_histogram(positions, counts, width, feature, discrete):
+    with _figure((10, 4)) as (fig, ax):
+        ax.bar(positions, counts, width=width, align='center' if discrete else 'edge',
+               color='#8B0000', edgecolor='white')
+        if discrete:
+            ax.set_xticks(positions)
+        ax.set_xlabel(feature)
+        ax.set_ylabel('Samples')
+        return _png(fig)
+
+
+def correlation_heatmap(corr):
+    with _figure((12, 10)) as (fig, ax):
+        sns.heatmap(corr, annot=True, fmt='.2f', cmap='coolwarm', center=0, ax=ax)
+        ax.set_title('Feature Correlation Matrix')
+        return _png(fig)
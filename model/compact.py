@@ -0,0 +1,391 @@
+"""
+Wine Quality Classification - Compact Model Artifacts
+Exports trained models as float32 or 16/8-bit quantized arrays in one memory-mapped file
+
+Usage:
+    python model/compact.py                             # float32 artifacts for every model
+    python model/compact.py --bits 8                    # quantized tree thresholds, leaf values and kNN matrix
+    python model/compact.py --models kNN XGBoost --tolerance 0.002
+
+File layout: an 8-byte magic, a little-endian uint64 header length, a JSON
+header (model metadata plus dtype, shape and offset of every array), then
+the raw arrays, each aligned to 64 bytes. Loading maps the file with
+np.memmap and wraps the arrays without unpickling anything. Every exported
+model has the scaler folded in, so no scaler.pkl is needed alongside it.
+"""
+
+import argparse
+import json
+import os
+import struct
+import sys
+import warnings
+warnings.filterwarnings('ignore')
+
+import joblib
+import numpy as np
+
+# Allow `python model/compact.py` from the repository root to import the model package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split
+from sklearn.naive_bayes import GaussianNB
+
+from model.artifacts import MODEL_NAMES, RESULTS_PATH, compact_path, fused_path, load_pipeline, model_path
+from model.benchmark import time_call
+from model.compiled import CompiledTrees, compile_model
+from model.dataset import FEATURE_COLUMNS, TARGET_COLUMN, load_prepared
+from model.fused import FusedModel, fuse
+from model.knn_index import IndexedKNN
+from model.metrics import evaluate
+
+MAGIC = b'WQCMPCT1'
+ALIGN = 64
+BITS = (32, 16, 8)
+# Largest change in any results.json metric an exported model may show
+DEFAULT_TOLERANCE = 0.005
+
+
+def _align(offset):
+    return -(-offset // ALIGN) * ALIGN
+
+
+def write_arrays(path, meta, arrays):
+    """Write ``meta`` (JSON-serialisable) and named NumPy arrays in the compact layout."""
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        offset = _align(offset)
+        layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += array.nbytes
+    header = json.dumps({'meta': meta, 'arrays': layout}).encode()
+    start = _align(len(MAGIC) + 8 + len(header))
+
+    with open(path + '.tmp', 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(start + layout[name]['offset'])
+            f.write(np.ascontiguousarray(array).tobytes())
+    os.replace(path + '.tmp', path)
+    return os.path.getsize(path)
+
+
+def _read_header(path):
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a compact model artifact")
+        (length,) = struct.unpack('<Q', f.read(8))
+        return json.loads(f.read(length)), _align(len(MAGIC) + 8 + length)
+
+
+def read_meta(path):
+    """The model metadata of a compact artifact (``bits``, kind, ...) without mapping its arrays."""
+    return _read_header(path)[0]['meta']
+
+
+def read_arrays(path):
+    """Return (meta, arrays); the arrays are read-only views of one memory map of the file."""
+    header, start = _read_header(path)
+
+    buffer = np.memmap(path, dtype=np.uint8, mode='r')
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        begin = start + spec['offset']
+        count = int(np.prod(spec['shape']))
+        arrays[name] = buffer[begin:begin + count * dtype.itemsize].view(dtype).reshape(spec['shape'])
+    return header['meta'], arrays
+
+
+def _code_dtype(bits):
+    return np.uint8 if bits == 8 else np.uint16
+
+
+def _quantize(values, bits):
+    """Affine codes per column: values ~= low + code * step, with 2**bits levels."""
+    values = np.asarray(values, dtype=np.float64)
+    low, high = values.min(axis=0), values.max(axis=0)
+    step = np.where(high > low, (high - low) / (2 ** bits - 1), 1.0)
+    codes = np.rint((values - low) / step).astype(_code_dtype(bits))
+    return codes, low, step
+
+
+def _dequantize(codes, low, step):
+    return (low + codes * step).astype(np.float32)
+
+
+def _floor_float32(values):
+    """
+    Largest float32 <= each value.
+
+    For float32 inputs, ``x > t`` and ``x > floor32(t)`` agree for every x, so
+    sklearn's float64 split thresholds shrink to float32 without changing a
+    single routing decision.
+    """
+    rounded = np.asarray(values).astype(np.float32)
+    too_high = rounded.astype(np.float64) > values
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
+
+
+def _threshold_codebook(feature, threshold, internal, bits):
+    """
+    Per-feature table of split thresholds; each node keeps an index into its feature's table.
+
+    Exact while a feature has at most 2**bits distinct thresholds; beyond that
+    the table holds evenly spaced quantiles of them and each split moves to
+    the nearest entry.
+    """
+    levels = 2 ** bits
+    codes = np.zeros(len(threshold), dtype=_code_dtype(bits))
+    tables, offsets = [], [0]
+    for j in range(int(feature.max()) + 1):
+        mask = internal & (feature == j)
+        values = np.unique(threshold[mask])
+        if len(values) > levels:
+            values = np.unique(np.quantile(values, np.linspace(0, 1, levels), method='nearest'))
+        if not len(values):
+            values = np.zeros(1, dtype=np.float32)
+        split = threshold[mask]
+        index = np.minimum(np.searchsorted(values, split), len(values) - 1)
+        lower = np.maximum(index - 1, 0)
+        codes[mask] = np.where(np.abs(values[lower] - split) < np.abs(values[index] - split), lower, index)
+        tables.append(values.astype(np.float32))
+        offsets.append(offsets[-1] + len(values))
+    return codes, np.concatenate(tables), np.asarray(offsets[:-1], dtype=np.int32)
+
+
+def _export_trees(compiled, bits):
+    internal = compiled.left != np.arange(len(compiled.left))
+    threshold = compiled.threshold
+    if compiled.kind == 'sklearn':
+        threshold = _floor_float32(threshold)
+    threshold = threshold.astype(np.float32)
+    n_features = int(compiled.feature.max()) + 1
+    arrays = {
+        'feature': compiled.feature.astype(np.uint8 if n_features <= 256 else np.int16),
+        'left': compiled.left.astype(np.int32),
+        'right': compiled.right.astype(np.int32),
+        'nan_left': compiled.nan_left.astype(bool),
+        'roots': compiled.roots.astype(np.int32)
+    }
+    if bits == 32:
+        arrays['threshold'] = threshold
+        arrays['value'] = compiled.value.astype(np.float32)
+    else:
+        codes, table, offsets = _threshold_codebook(compiled.feature, threshold, internal, bits)
+        arrays.update(threshold_code=codes, threshold_table=table, threshold_offset=offsets)
+        # Only leaves carry values; internal nodes are left at the lowest code
+        value = np.where(internal[:, None], np.nan, compiled.value)
+        low, high = np.nanmin(value, axis=0), np.nanmax(value, axis=0)
+        step = np.where(high > low, (high - low) / (2 ** bits - 1), 1.0)
+        arrays['value_code'] = np.rint(np.nan_to_num((value - low) / step)).astype(_code_dtype(bits))
+        arrays.update(value_low=low, value_step=step)
+
+    meta = {
+        'kind': 'trees',
+        'compiled': {
+            'kind': compiled.kind,
+            'depth': compiled.depth,
+            'classes': compiled.classes_.tolist(),
+            'feature_names': compiled.feature_names,
+            'scaler_folded': compiled.scaler_folded,
+            'base_margin': float(compiled.base_margin)
+        }
+    }
+    return meta, arrays
+
+
+def _load_trees(meta, arrays):
+    if 'threshold' not in arrays:
+        arrays = dict(arrays)
+        arrays['threshold'] = arrays['threshold_table'].take(
+            arrays['threshold_offset'].take(arrays['feature']) + arrays['threshold_code'])
+        arrays['value'] = _dequantize(arrays['value_code'], arrays['value_low'], arrays['value_step'])
+    return CompiledTrees(arrays, meta['compiled'])
+
+
+def _export_estimator(estimator, bits):
+    if isinstance(estimator, IndexedKNN):
+        arrays = {'fit_y': estimator.fit_y_, 'classes': np.asarray(estimator.classes_)}
+        if bits == 8:
+            arrays['fit_X_code'], arrays['fit_X_low'], arrays['fit_X_step'] = _quantize(estimator.fit_X_, bits)
+        else:
+            arrays['fit_X'] = estimator.fit_X_.astype(np.float32 if bits == 32 else np.float16)
+        return {'kind': 'knn', 'params': estimator.get_params()}, arrays
+
+    # Coefficient vectors are a few hundred bytes and, with the scaling folded in,
+    # span several orders of magnitude: they stay float32 whatever ``bits`` is
+    dtype = np.float32
+    if isinstance(estimator, LogisticRegression):
+        arrays = {'coef': estimator.coef_.astype(dtype), 'intercept': estimator.intercept_.astype(dtype),
+                  'classes': np.asarray(estimator.classes_)}
+        return {'kind': 'linear', 'params': estimator.get_params()}, arrays
+    if isinstance(estimator, GaussianNB):
+        arrays = {'theta': estimator.theta_.astype(dtype), 'var': estimator.var_.astype(dtype),
+                  'class_prior': estimator.class_prior_.astype(dtype), 'classes': np.asarray(estimator.classes_)}
+        return {'kind': 'naive_bayes', 'params': estimator.get_params()}, arrays
+    return None
+
+
+def _load_estimator(meta, arrays):
+    kind = meta['kind']
+    classes = np.asarray(arrays['classes'])
+    if kind == 'knn':
+        estimator = IndexedKNN(**meta['params'])
+        fit_X = (_dequantize(arrays['fit_X_code'], arrays['fit_X_low'], arrays['fit_X_step'])
+                 if 'fit_X_code' in arrays else np.asarray(arrays['fit_X'], dtype=np.float32))
+        # __setstate__ builds the KD-tree, as when unpickling
+        estimator.__setstate__({'classes_': classes, 'n_features_in_': fit_X.shape[1],
+                                'fit_X_': fit_X, 'fit_y_': np.asarray(arrays['fit_y'])})
+    elif kind == 'linear':
+        estimator = LogisticRegression(**meta['params'])
+        estimator.coef_ = arrays['coef'].astype(np.float64)
+        estimator.intercept_ = arrays['intercept'].astype(np.float64)
+        estimator.classes_ = classes
+        estimator.n_features_in_ = estimator.coef_.shape[1]
+    elif kind == 'naive_bayes':
+        estimator = GaussianNB(**meta['params'])
+        estimator.theta_ = arrays['theta'].astype(np.float64)
+        estimator.var_ = arrays['var'].astype(np.float64)
+        estimator.class_prior_ = arrays['class_prior'].astype(np.float64)
+        estimator.classes_ = classes
+        estimator.n_features_in_ = estimator.theta_.shape[1]
+    else:
+        raise ValueError(f"Unknown compact model kind: {kind!r}")
+    return estimator
+
+
+def export(model, bits=32):
+    """
+    Return (meta, arrays) for a fused model, or None when it has no compact form.
+
+    Trees are exported from their compiled node table; kNN keeps its training
+    matrix; Logistic Regression and Naive Bayes keep their fitted parameters.
+    """
+    if bits not in BITS:
+        raise ValueError(f"bits must be one of {BITS}, got {bits!r}")
+    if not getattr(model, 'scaler_folded', False) or not isinstance(model, FusedModel):
+        raise ValueError("Only fused models (scaler folded in) can be exported")
+
+    compiled = compile_model(model)
+    if compiled is not None:
+        meta, arrays = _export_trees(compiled, bits)
+    else:
+        exported = _export_estimator(model.estimator, bits)
+        if exported is None:
+            return None
+        meta, arrays = exported
+        meta['fused'] = {
+            'feature_names': model.feature_names,
+            'method': model.method,
+            'embedded_scaling': model.mean is not None
+        }
+        if model.mean is not None:
+            arrays['mean'], arrays['scale'] = model.mean, model.scale
+    meta['bits'] = bits
+    return meta, arrays
+
+
+def save(model, path, bits=32):
+    """Write ``model`` as a compact artifact; returns its size in bytes, or None if unsupported."""
+    exported = export(model, bits)
+    if exported is None:
+        return None
+    return write_arrays(path, *exported)
+
+
+def load(path):
+    """Load a compact artifact as a model taking raw features (``scaler_folded`` is True)."""
+    meta, arrays = read_arrays(path)
+    if meta['kind'] == 'trees':
+        return _load_trees(meta, arrays)
+
+    fused = meta['fused']
+    scaling = (np.asarray(arrays['mean']), np.asarray(arrays['scale'])) if fused['embedded_scaling'] else (None, None)
+    return FusedModel(_load_estimator(meta, arrays), fused['feature_names'], fused['method'], *scaling)
+
+
+def drift(scores, reference):
+    """Largest absolute difference between two metric dicts over the metrics in ``reference``."""
+    return max(abs(scores[name] - reference[name]) for name in reference)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export compact model artifacts and check them for accuracy drift.")
+    parser.add_argument('--models', nargs='+', default=MODEL_NAMES, choices=MODEL_NAMES,
+                        help="Models to export (default: all)")
+    parser.add_argument('--bits', type=int, default=32, choices=BITS,
+                        help="Precision of thresholds, leaf values and the kNN matrix (default: %(default)s)")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Largest allowed change in any results.json metric (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    # Imported here: the registry imports this module to load compact artifacts
+    from model.registry import write_manifest
+
+    print("=" * 80)
+    print(f"WINE QUALITY CLASSIFICATION - COMPACT ARTIFACTS ({args.bits}-bit)")
+    print("=" * 80)
+
+    with open(RESULTS_PATH) as f:
+        reference = json.load(f)
+    df = load_prepared()
+    X = df[FEATURE_COLUMNS]
+    y = df[TARGET_COLUMN]
+    X_train, X_test, _, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+    failed = []
+    for name in args.models:
+        if not os.path.exists(model_path(name)):
+            print(f"⏭️  {name}: no trained artifact; run model/train_models.py first")
+            continue
+        model, scaler = load_pipeline(name)
+        source_path = fused_path(name) if os.path.exists(fused_path(name)) else model_path(name)
+        fused = model if scaler is None else fuse(model, scaler, X_train)
+        if not isinstance(fused, FusedModel):
+            print(f"⏭️  {name}: no compact form ({type(model).__name__} loads its members from their pickles)")
+            continue
+
+        path = compact_path(name)
+        tmp = path + '.check'
+        size = save(fused, tmp, args.bits)
+        if size is None:
+            print(f"⏭️  {name}: no compact form for {type(fused.estimator).__name__}")
+            continue
+
+        # Evaluated like train_models.py: labels from predict (argmax), AUC from P(Good)
+        compact = load(tmp)
+        y_pred = compact.predict(X_test)
+        scores = evaluate(y_test, y_pred, compact.predict_proba(X_test)[:, 1])
+        worst = drift(scores, reference[name]) if name in reference else 0.0
+        match = float(np.mean(y_pred == fused.predict(X_test)))
+        speedup = time_call(joblib.load, source_path) / time_call(load, tmp)
+        del compact
+
+        status = '✅' if worst <= args.tolerance else '❌'
+        print(f"{status} {name:20s} {os.path.getsize(source_path) / 1e3:9.1f} KB -> {size / 1e3:9.1f} KB  "
+              f"load {speedup:5.1f}x faster  drift {worst:.4f}  agreement {match * 100:6.2f}%")
+        if worst <= args.tolerance:
+            os.replace(tmp, path)
+        else:
+            os.remove(tmp)
+            failed.append(name)
+
+    write_manifest()
+    print("-" * 80)
+    if failed:
+        print(f"❌ Not exported (drift above {args.tolerance}): {', '.join(failed)}; try more --bits")
+    if args.bits == 32:
+        print("✅ Compact artifacts are loaded first by the app, score.py and serve.py")
+    else:
+        print(f"✅ {args.bits}-bit artifacts are only loaded when requested (registry variant 'compact'); "
+              f"the exact models stay the default")
+    print("=" * 80)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,278 @@
+"""
+Wine Quality Classification - Compiled Tree Ensembles
+Flattens Decision Tree, Random Forest and XGBoost models into contiguous node arrays
+"""
+
+import json
+
+import numpy as np
+
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.ensemble import RandomForestClassifier
+from xgboost import XGBClassifier
+
+# Batches up to this many (row, tree) pairs traverse all trees at once; larger
+# batches go tree by tree in row blocks so the working set stays cache-sized
+LOCKSTEP_PAIRS = 131_072
+BLOCK_ROWS = 8192
+# Steps between removing (row, tree) pairs that have reached a leaf
+COMPACT_EVERY = 4
+
+
+class CompiledTrees:
+    """
+    A tree ensemble stored as one flat node table and scored with vectorised traversal.
+
+    Every tree's nodes live in the same arrays; ``roots`` holds each tree's first
+    node. Leaves point to themselves, so all rows advance through all trees in
+    lock step for ``depth`` steps without per-row branching. Comparisons use the
+    source library's precision (sklearn: ``x <= t`` in float64 on float32 input;
+    XGBoost: ``x < t`` in float32) and leaf values are summed in the same tree
+    order, so predictions match the original estimator.
+    """
+
+    method = 'compiled node table'
+
+    def __init__(self, arrays, meta):
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.left = arrays['left']
+        self.right = arrays['right']
+        self.nan_left = arrays['nan_left']
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+        self.kind = meta['kind']
+        self.depth = meta['depth']
+        self.classes_ = np.asarray(meta['classes'])
+        self.feature_names = meta['feature_names']
+        self.scaler_folded = meta['scaler_folded']
+        self.base_margin = np.float32(meta.get('base_margin', 0.0))
+
+        # Traversal tables: children[2 * node + went_right], leaves loop onto themselves
+        self._children = np.column_stack([self.left, self.right]).ravel().astype(np.intp)
+        self._feature = self.feature.astype(np.intp)
+        self._is_leaf = self.left == np.arange(len(self.left))
+        self._values = [np.ascontiguousarray(self.value[:, k]) for k in range(self.value.shape[1])]
+
+    def _prepare(self, X):
+        if hasattr(X, 'columns'):
+            if self.feature_names is not None:
+                missing = [c for c in self.feature_names if c not in X.columns]
+                if missing:
+                    raise ValueError(f"Missing feature columns: {missing}")
+                X = X[self.feature_names]
+            X = X.to_numpy(dtype=np.float32)
+        return np.asarray(X, dtype=np.float32)
+
+    def _step(self, node, offset, X_flat, has_nan):
+        x = X_flat.take(offset + self._feature.take(node))
+        threshold = self.threshold.take(node)
+        went_right = x >= threshold if self.kind == 'xgboost' else x > threshold
+        if has_nan:
+            # Comparisons with NaN are False; missing values follow the learned default
+            went_right |= np.isnan(x) & ~self.nan_left.take(node)
+        return self._children.take(2 * node + went_right)
+
+    def _descend(self, node, offset, X_flat, has_nan):
+        """Advance every (row, tree) pair to its leaf, dropping pairs as they finish."""
+        leaves = node.copy()
+        pending = np.arange(len(node))
+        for step in range(1, self.depth + 1):
+            node = self._step(node, offset, X_flat, has_nan)
+            if step % COMPACT_EVERY == 0 or step == self.depth:
+                done = self._is_leaf.take(node)
+                leaves[pending[done]] = node[done]
+                if done.all():
+                    break
+                pending, node, offset = pending[~done], node[~done], offset[~done]
+        return leaves
+
+    def _leaves(self, X):
+        """Leaf node index of every (tree, row) pair, shape (trees, rows)."""
+        n_rows, n_trees = len(X), len(self.roots)
+        X_flat = X.ravel()
+        has_nan = bool(np.isnan(X_flat).any())
+        row_offset = np.arange(n_rows, dtype=np.intp) * X.shape[1]
+
+        if n_rows * n_trees <= LOCKSTEP_PAIRS:
+            node = np.repeat(self.roots.astype(np.intp), n_rows)
+            offset = np.tile(row_offset, n_trees)
+            return self._descend(node, offset, X_flat, has_nan).reshape(n_trees, n_rows)
+
+        leaves = np.empty((n_trees, n_rows), dtype=np.intp)
+        for t, root in enumerate(self.roots):
+            node = np.full(n_rows, root, dtype=np.intp)
+            leaves[t] = self._descend(node, row_offset, X_flat, has_nan)
+        return leaves
+
+    def _proba_block(self, X):
+        leaves = self._leaves(X)
+        if self.kind == 'xgboost':
+            # Leaf weights summed in tree order in float32, as XGBoost's CPU predictor does
+            margin = np.full(len(X), self.base_margin, dtype=np.float32)
+            for tree_leaves in leaves:
+                margin += self._values[0].take(tree_leaves)
+            p = np.float32(1) / (np.float32(1) + np.exp(-margin))
+            return np.column_stack([np.float32(1) - p, p])
+
+        # Per-tree class distributions, accumulated tree by tree like RandomForestClassifier
+        proba = np.zeros((len(X), len(self._values)))
+        for k, value in enumerate(self._values):
+            column = proba[:, k]
+            for tree_leaves in leaves:
+                column += value.take(tree_leaves)
+        return proba / len(leaves) if len(leaves) > 1 else proba
+
+    def predict_proba(self, X):
+        X = self._prepare(X)
+        if len(X) <= BLOCK_ROWS:
+            return self._proba_block(X)
+        return np.vstack([
+            self._proba_block(X[start:start + BLOCK_ROWS])
+            for start in range(0, len(X), BLOCK_ROWS)
+        ])
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+    def get_params(self, deep=True):
+        return {}
+
+    def set_params(self, **params):
+        return self
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def save(self, path):
+        meta = {
+            'kind': self.kind,
+            'depth': self.depth,
+            'classes': self.classes_.tolist(),
+            'feature_names': self.feature_names,
+            'scaler_folded': self.scaler_folded,
+            'base_margin': float(self.base_margin)
+        }
+        with open(path, 'wb') as f:
+            np.savez(
+                f, feature=self.feature, threshold=self.threshold, left=self.left,
+                right=self.right, nan_left=self.nan_left, value=self.value,
+                roots=self.roots, meta=np.array(json.dumps(meta))
+            )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files if name != 'meta'}
+            meta = json.loads(str(data['meta']))
+        return cls(arrays, meta)
+
+
+def _sklearn_trees(trees):
+    """Concatenate fitted sklearn trees into one node table."""
+    parts, roots, offset, depth = [], [], 0, 0
+    for estimator in trees:
+        tree = estimator.tree_
+        nodes = np.arange(tree.node_count)
+        leaf = tree.children_left == -1
+        value = tree.value[:, 0, :].astype(np.float64)
+        # DecisionTreeClassifier.predict_proba normalises each leaf distribution
+        value = value / value.sum(axis=1, keepdims=True)
+        nan_left = getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count, dtype=np.uint8))
+        parts.append({
+            'feature': np.where(leaf, 0, tree.feature),
+            'threshold': np.where(leaf, 0.0, tree.threshold),
+            'left': np.where(leaf, nodes, tree.children_left) + offset,
+            'right': np.where(leaf, nodes, tree.children_right) + offset,
+            'nan_left': np.asarray(nan_left, dtype=bool) & ~leaf,
+            'value': value
+        })
+        roots.append(offset)
+        offset += tree.node_count
+        depth = max(depth, tree.max_depth)
+    return parts, roots, depth
+
+
+def _xgboost_trees(model):
+    config = json.loads(model.get_booster().save_raw('json'))
+    learner = config['learner']
+    if learner['objective']['name'] != 'binary:logistic':
+        raise ValueError(f"Unsupported XGBoost objective: {learner['objective']['name']}")
+
+    parts, roots, offset, depth = [], [], 0, 0
+    for tree in learner['gradient_booster']['model']['trees']:
+        left = np.asarray(tree['left_children'], dtype=np.int64)
+        right = np.asarray(tree['right_children'], dtype=np.int64)
+        if any(tree['split_type']):
+            raise ValueError("Categorical XGBoost splits are not supported")
+        nodes = np.arange(len(left))
+        leaf = left == -1
+        conditions = np.asarray(tree['split_conditions'], dtype=np.float32)
+        parts.append({
+            'feature': np.where(leaf, 0, tree['split_indices']),
+            'threshold': np.where(leaf, np.float32(0), conditions),
+            'left': np.where(leaf, nodes, left) + offset,
+            'right': np.where(leaf, nodes, right) + offset,
+            'nan_left': np.asarray(tree['default_left'], dtype=bool) & ~leaf,
+            # A leaf's split_condition holds its (learning-rate scaled) weight
+            'value': np.where(leaf, conditions, np.float32(0))[:, None]
+        })
+        roots.append(offset)
+        offset += len(left)
+        parents = np.asarray(tree['parents'])
+        node_depth = np.zeros(len(left), dtype=np.int64)
+        for n in range(1, len(left)):
+            node_depth[n] = node_depth[parents[n]] + 1
+        depth = max(depth, int(node_depth.max()))
+
+    # Stored as a probability, e.g. '[1.964595E-1]' (a one-element vector in XGBoost 3)
+    base_score = float(learner['learner_model_param']['base_score'].strip('[]'))
+    base_margin = np.log(np.float32(base_score) / (np.float32(1) - np.float32(base_score)))
+    return parts, roots, depth, float(base_margin)
+
+
+def compile_model(model, feature_names=None):
+    """
+    Compile a tree model (or a FusedModel wrapping one) into CompiledTrees.
+
+    Returns None for models that are not tree ensembles.
+    """
+    scaler_folded = getattr(model, 'scaler_folded', False)
+    if scaler_folded:
+        feature_names = model.feature_names
+        model = model.estimator
+
+    base_margin = 0.0
+    if isinstance(model, DecisionTreeClassifier):
+        parts, roots, depth = _sklearn_trees([model])
+        kind, threshold_dtype, value_dtype = 'sklearn', np.float64, np.float64
+    elif isinstance(model, RandomForestClassifier):
+        parts, roots, depth = _sklearn_trees(model.estimators_)
+        kind, threshold_dtype, value_dtype = 'sklearn', np.float64, np.float64
+    elif isinstance(model, XGBClassifier):
+        parts, roots, depth, base_margin = _xgboost_trees(model)
+        kind, threshold_dtype, value_dtype = 'xgboost', np.float32, np.float32
+    else:
+        return None
+
+    n_features = int(max(p['feature'].max() for p in parts)) + 1
+    index_dtype = np.int32
+    arrays = {
+        'feature': np.concatenate([p['feature'] for p in parts]).astype(np.int16 if n_features < 2 ** 15 else np.int32),
+        'threshold': np.concatenate([p['threshold'] for p in parts]).astype(threshold_dtype),
+        'left': np.concatenate([p['left'] for p in parts]).astype(index_dtype),
+        'right': np.concatenate([p['right'] for p in parts]).astype(index_dtype),
+        'nan_left': np.concatenate([p['nan_left'] for p in parts]),
+        'value': np.concatenate([p['value'] for p in parts]).astype(value_dtype),
+        'roots': np.asarray(roots, dtype=index_dtype)
+    }
+    meta = {
+        'kind': kind,
+        'depth': int(depth),
+        'classes': np.asarray(model.classes_).tolist(),
+        'feature_names': list(feature_names) if feature_names is not None else None,
+        'scaler_folded': bool(scaler_folded),
+        'base_margin': base_margin
+    }
+    return CompiledTrees(arrays, meta)
@@ -0,0 +1,243 @@
+"""
+Wine Quality Classification - Dataset Profile
+Summary statistics, correlations and histograms of the prepared dataset, computed once and merged on append
+
+Usage:
+    python model/data_profile.py    # rebuild the profile from the prepared dataset
+
+The profile keeps mergeable statistics instead of results: per-column count,
+mean and sum of squared deviations, the co-moment matrix, min/max and
+fixed-edge histograms. Two profiles combine exactly (Chan et al.'s parallel
+variance update), so appending a batch costs time proportional to the batch.
+Quantiles of continuous columns are read from the histograms (within one bin
+width); integer columns with few values (wine_type, quality) are counted
+exactly.
+"""
+
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Allow `python model/data_profile.py` from the repository root to import the model package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model.dataset import PREPARED_CSV, load_prepared
+
+PROFILE_PATH = os.path.join('data', 'wine_quality_profile.json')
+HIST_BINS = 512
+DISPLAY_BINS = 32
+# Integer-valued columns with at most this many distinct values are counted per value
+MAX_DISCRETE_VALUES = 64
+# The profile is stamped with the CSV size and a checksum of this many trailing bytes
+SOURCE_TAIL_BYTES = 1024 * 1024
+
+
+def _histogram_spec(values):
+    finite = values[~np.isnan(values)]
+    if len(finite) and np.all(finite == np.round(finite)) and len(np.unique(finite)) <= MAX_DISCRETE_VALUES:
+        return {'discrete': True}
+    lo = float(finite.min()) if len(finite) else 0.0
+    hi = float(finite.max()) if len(finite) else 1.0
+    return {'discrete': False, 'range': [lo, hi if hi > lo else lo + 1.0], 'bins': HIST_BINS}
+
+
+def _histogram(values, spec):
+    values = values[~np.isnan(values)]
+    if spec['discrete']:
+        uniques, counts = np.unique(values, return_counts=True)
+        return {'discrete': True, 'values': uniques.tolist(), 'counts': counts.tolist()}
+    lo, hi = spec['range']
+    # Values outside the original range land in the edge bins; min/max stay exact
+    counts, _ = np.histogram(np.clip(values, lo, hi), bins=spec['bins'], range=(lo, hi))
+    return {'discrete': False, 'range': [lo, hi], 'bins': spec['bins'], 'counts': counts.tolist()}
+
+
+def build_profile(df, specs=None):
+    """
+    Profile of ``df``; ``specs`` reuses another profile's histogram layout so the two can be merged.
+    """
+    columns = list(df.columns)
+    X = df.to_numpy(dtype=np.float64)
+    n = len(X)
+    mean = X.mean(axis=0) if n else np.zeros(len(columns))
+    centred = X - mean
+    specs = specs or {c: _histogram_spec(X[:, i]) for i, c in enumerate(columns)}
+    return {
+        'rows': n,
+        'columns': columns,
+        'mean': mean.tolist(),
+        'm2': (centred ** 2).sum(axis=0).tolist(),
+        'comoment': (centred.T @ centred).tolist(),
+        'min': X.min(axis=0).tolist() if n else [None] * len(columns),
+        'max': X.max(axis=0).tolist() if n else [None] * len(columns),
+        'histograms': {c: _histogram(X[:, i], specs[c]) for i, c in enumerate(columns)}
+    }
+
+
+def _merge_histograms(a, b):
+    if a['discrete']:
+        counts = dict(zip(a['values'], a['counts']))
+        for value, count in zip(b['values'], b['counts']):
+            counts[value] = counts.get(value, 0) + count
+        values = sorted(counts)
+        return {'discrete': True, 'values': values, 'counts': [counts[v] for v in values]}
+    return dict(a, counts=(np.asarray(a['counts']) + np.asarray(b['counts'])).tolist())
+
+
+def merge_profiles(a, b):
+    """Profile of the rows of ``a`` followed by the rows of ``b`` (same columns and histogram layout)."""
+    if a['columns'] != b['columns']:
+        raise ValueError(f"Cannot merge profiles with different columns: {a['columns']} vs {b['columns']}")
+    if not b['rows']:
+        return a
+    if not a['rows']:
+        return b
+
+    n_a, n_b = a['rows'], b['rows']
+    n = n_a + n_b
+    mean_a, mean_b = np.asarray(a['mean']), np.asarray(b['mean'])
+    delta = mean_b - mean_a
+    return {
+        'rows': n,
+        'columns': a['columns'],
+        'mean': (mean_a + delta * n_b / n).tolist(),
+        'm2': (np.asarray(a['m2']) + np.asarray(b['m2']) + delta ** 2 * n_a * n_b / n).tolist(),
+        'comoment': (np.asarray(a['comoment']) + np.asarray(b['comoment'])
+                     + np.outer(delta, delta) * n_a * n_b / n).tolist(),
+        'min': np.minimum(a['min'], b['min']).tolist(),
+        'max': np.maximum(a['max'], b['max']).tolist(),
+        'histograms': {c: _merge_histograms(a['histograms'][c], b['histograms'][c]) for c in a['columns']}
+    }
+
+
+def update_profile(profile, df):
+    """Add the rows of ``df`` to ``profile``; cost is proportional to ``len(df)``."""
+    specs = {c: {k: h[k] for k in ('discrete', 'range', 'bins') if k in h}
+             for c, h in profile['histograms'].items()}
+    return merge_profiles(profile, build_profile(df[profile['columns']], specs))
+
+
+def quantile(profile, column, q):
+    """``q``-quantile of ``column`` (linear interpolation, as pandas does for discrete columns)."""
+    i = profile['columns'].index(column)
+    hist = profile['histograms'][column]
+    counts = np.asarray(hist['counts'], dtype=np.float64)
+    n = counts.sum()
+    if not n:
+        return np.nan
+
+    if hist['discrete']:
+        values = np.asarray(hist['values'], dtype=np.float64)
+        cumulative = np.cumsum(counts)
+        position = (n - 1) * q
+        lower = values[np.searchsorted(cumulative, np.floor(position), side='right')]
+        upper = values[np.searchsorted(cumulative, np.ceil(position), side='right')]
+        return float(lower + (upper - lower) * (position - np.floor(position)))
+
+    lo, hi = hist['range']
+    edges = np.linspace(lo, hi, hist['bins'] + 1)
+    cumulative = np.concatenate([[0.0], np.cumsum(counts)])
+    value = np.interp(q * n, cumulative, edges)
+    return float(np.clip(value, profile['min'][i], profile['max'][i]))
+
+
+def describe(profile):
+    """Same layout as ``DataFrame.describe()``."""
+    n = profile['rows']
+    std = np.sqrt(np.asarray(profile['m2']) / (n - 1)) if n > 1 else np.full(len(profile['columns']), np.nan)
+    stats = {
+        'count': [float(n)] * len(profile['columns']),
+        'mean': profile['mean'],
+        'std': std,
+        'min': profile['min'],
+        '25%': [quantile(profile, c, 0.25) for c in profile['columns']],
+        '50%': [quantile(profile, c, 0.50) for c in profile['columns']],
+        '75%': [quantile(profile, c, 0.75) for c in profile['columns']],
+        'max': profile['max']
+    }
+    return pd.DataFrame(stats, index=profile['columns']).T
+
+
+def correlation(profile):
+    """Pearson correlation matrix, as ``DataFrame.corr()``."""
+    comoment = np.asarray(profile['comoment'])
+    scale = np.sqrt(np.diag(comoment))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        corr = comoment / np.outer(scale, scale)
+    return pd.DataFrame(corr, index=profile['columns'], columns=profile['columns'])
+
+
+def histogram(profile, column, bins=DISPLAY_BINS):
+    """(bin labels or left edges, counts, width) for plotting ``column``; continuous bins are merged to ``bins``."""
+    hist = profile['histograms'][column]
+    if hist['discrete']:
+        return np.asarray(hist['values']), np.asarray(hist['counts']), 0.8
+    counts = np.asarray(hist['counts'])
+    group = max(1, len(counts) // bins)
+    counts = np.add.reduceat(counts, np.arange(0, len(counts), group))
+    lo, hi = hist['range']
+    width = (hi - lo) * group / hist['bins']
+    return lo + width * np.arange(len(counts)), counts, width
+
+
+def source_identity(csv_path=PREPARED_CSV):
+    """
+    Size and a checksum of the last SOURCE_TAIL_BYTES of the CSV (unlike mtimes, these survive a git checkout).
+
+    Appending a batch changes both, and only the tail is read, so stamping and
+    checking the profile costs the same however long the history is. A full
+    rebuild rewrites the CSV and the profile together.
+    """
+    if not os.path.exists(csv_path):
+        return None
+    size = os.path.getsize(csv_path)
+    with open(csv_path, 'rb') as f:
+        f.seek(max(0, size - SOURCE_TAIL_BYTES))
+        tail = hashlib.sha256(f.read()).hexdigest()
+    return {'bytes': size, 'tail_sha256': tail}
+
+
+def write_profile(profile, csv_path=PREPARED_CSV, path=PROFILE_PATH):
+    """Store ``profile`` next to the dataset, stamped with the CSV it describes."""
+    with open(path + '.tmp', 'w') as f:
+        json.dump(dict(profile, source=source_identity(csv_path)), f)
+    os.replace(path + '.tmp', path)
+
+
+def read_profile(path=PROFILE_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_profile(csv_path=PREPARED_CSV, path=PROFILE_PATH):
+    """The stored profile if it describes the current CSV, else None."""
+    profile = read_profile(path)
+    if profile is None:
+        return None
+    source = profile.get('source') or {}
+    if not os.path.exists(csv_path):
+        return profile
+    if source.get('bytes') != os.path.getsize(csv_path):
+        return None
+    return profile if source == source_identity(csv_path) else None
+
+
+def main():
+    print("=" * 60)
+    print("WINE QUALITY DATASET - PROFILE")
+    print("=" * 60)
+    df = load_prepared()
+    write_profile(build_profile(df))
+    print(f"✅ Profile of {len(df)} rows x {len(df.columns)} columns saved to: {PROFILE_PATH}")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""
+Wine Quality Classification - Prepared Dataset Store
+Typed Arrow cache of the prepared dataset, memory-mapped instead of re-parsing the CSV
+"""
+
+import json
+import os
+
+import pandas as pd
+import pyarrow as pa
+
+from model.tracing import span
+
+PREPARED_CSV = os.path.join('data', 'wine_quality_prepared.csv')
+CACHE_DIR = os.path.join('data', '.cache', 'wine_quality_prepared')
+CACHE_META = 'meta.json'
+
+FEATURE_COLUMNS = [
+    'fixed acidity',
+    'volatile acidity',
+    'citric acid',
+    'residual sugar',
+    'chlorides',
+    'free sulfur dioxide',
+    'total sulfur dioxide',
+    'density',
+    'pH',
+    'sulphates',
+    'alcohol',
+    'wine_type'
+]
+TARGET_COLUMN = 'quality'
+# Raw quality score (0-10) kept next to the binary target, for the grade models (model/grades.py)
+GRADE_COLUMN = 'grade'
+# Raw quality scores (0-10) at or above this are 'good' (1)
+GOOD_QUALITY_MIN = 7
+WINE_TYPE_CODES = {'red': 1, 'white': 0}
+
+# Same dtypes pandas infers from the CSV, so cached and parsed frames are interchangeable
+SCHEMA = pa.schema(
+    [(c, pa.float64()) for c in FEATURE_COLUMNS if c != 'wine_type']
+    + [('wine_type', pa.int64()), (TARGET_COLUMN, pa.int64()), (GRADE_COLUMN, pa.int64())]
+)
+
+
+def _source_stamp(csv_path):
+    if not os.path.exists(csv_path):
+        return None
+    stat = os.stat(csv_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _read_meta(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, CACHE_META)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(cache_dir, meta):
+    path = os.path.join(cache_dir, CACHE_META)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(meta, f, indent=4)
+    os.replace(path + '.tmp', path)
+
+
+def is_fresh(csv_path=PREPARED_CSV, cache_dir=CACHE_DIR):
+    """True when the cache exists and was built from the current CSV."""
+    meta = _read_meta(cache_dir)
+    if meta is None:
+        return False
+    stamp = _source_stamp(csv_path)
+    # Without the CSV the cache is the only copy of the data
+    return stamp is None or meta.get('source') == stamp
+
+
+def version(csv_path=PREPARED_CSV, cache_dir=CACHE_DIR):
+    """Cheap token that changes whenever the prepared data changes (for memoisation keys)."""
+    meta = _read_meta(cache_dir) or {}
+    return json.dumps([_source_stamp(csv_path), meta.get('source'), meta.get('rows')])
+
+
+def _write_part(table, cache_dir, index):
+    part = os.path.join(cache_dir, f"part-{index:05d}.arrow")
+    with pa.OSFile(part + '.tmp', 'wb') as sink, pa.ipc.new_file(sink, SCHEMA) as writer:
+        writer.write_table(table)
+    os.replace(part + '.tmp', part)
+    return part
+
+
+def write_cache(df, csv_path=PREPARED_CSV, cache_dir=CACHE_DIR):
+    """Write ``df`` as the cache for ``csv_path`` (call after the CSV itself is written)."""
+    os.makedirs(cache_dir, exist_ok=True)
+    table = pa.Table.from_pandas(df[SCHEMA.names], schema=SCHEMA, preserve_index=False)
+
+    for stale in os.listdir(cache_dir):
+        if stale.endswith('.arrow'):
+            os.remove(os.path.join(cache_dir, stale))
+    part = _write_part(table, cache_dir, 0)
+
+    _write_meta(cache_dir, {
+        'source': _source_stamp(csv_path),
+        'rows': table.num_rows,
+        'parts': [os.path.basename(part)]
+    })
+
+
+def append_rows(df, csv_path=PREPARED_CSV, cache_dir=CACHE_DIR):
+    """
+    Append prepared rows to the CSV and, if the cache is current, as a new cache part.
+
+    Cost is proportional to ``len(df)``: existing rows are never rewritten. A
+    stale cache is left stale and rebuilt on the next full load.
+    """
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"{csv_path} not found; run a full preparation first")
+    if pd.read_csv(csv_path, nrows=0).columns.tolist() != SCHEMA.names:
+        raise ValueError(f"{csv_path} has an older column layout; run a full preparation first")
+
+    cache_current = is_fresh(csv_path, cache_dir)
+    df = df[SCHEMA.names]
+    df.to_csv(csv_path, mode='a', header=False, index=False)
+
+    if not cache_current:
+        return False
+
+    meta = _read_meta(cache_dir)
+    table = pa.Table.from_pandas(df, schema=SCHEMA, preserve_index=False)
+    part = _write_part(table, cache_dir, len(meta['parts']))
+
+    _write_meta(cache_dir, {
+        'source': _source_stamp(csv_path),
+        'rows': meta['rows'] + table.num_rows,
+        'parts': meta['parts'] + [os.path.basename(part)]
+    })
+    return True
+
+
+def load_table(cache_dir=CACHE_DIR):
+    """Memory-map the cached parts as one Arrow table (no parsing, no copy)."""
+    meta = _read_meta(cache_dir)
+    tables = []
+    for part in meta['parts']:
+        source = pa.memory_map(os.path.join(cache_dir, part), 'r')
+        tables.append(pa.ipc.open_file(source).read_all())
+    return pa.concat_tables(tables) if len(tables) > 1 else tables[0]
+
+
+def load_prepared(csv_path=PREPARED_CSV, cache_dir=CACHE_DIR, refresh=True):
+    """
+    Load the prepared dataset, from the Arrow cache when it is fresh.
+
+    Falls back to parsing the CSV when the cache is missing or stale; with
+    ``refresh`` the cache is then rebuilt so the next load is fast again.
+    """
+    if is_fresh(csv_path, cache_dir):
+        with span('load dataset', source='arrow cache'):
+            return load_table(cache_dir).to_pandas(split_blocks=True)
+
+    with span('load dataset', source='csv'):
+        df = pd.read_csv(csv_path)
+    if refresh:
+        try:
+            with span('write arrow cache'):
+                write_cache(df, csv_path, cache_dir)
+        except OSError:
+            pass
+    return df
+
+
+def iter_chunks(chunk_size, csv_path=PREPARED_CSV, cache_dir=CACHE_DIR):
+    """
+    Yield the prepared dataset as DataFrames of at most ``chunk_size`` rows.
+
+    Uses the memory-mapped Arrow parts when the cache is fresh (only the
+    current batch is materialised), otherwise streams the CSV.
+    """
+    if is_fresh(csv_path, cache_dir):
+        for batch in load_table(cache_dir).to_batches(max_chunksize=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(csv_path, chunksize=chunk_size)
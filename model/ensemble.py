@@ -0,0 +1,212 @@
+"""
+Wine Quality Classification - Ensemble Model
+Soft voting and stacking over the six trained models, with concurrent member inference
+
+Training fits a logistic-regression meta-learner on out-of-fold member
+probabilities (5-fold, computed in a process pool and cached). At inference
+the cheap members are scored first; rows on which they all agree with high
+confidence are answered from them alone, and only the remaining rows go
+through the expensive members, which run concurrently in threads.
+"""
+
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import joblib
+import numpy as np
+
+from sklearn.base import clone
+from sklearn.linear_model import LogisticRegression
+
+from model.orchestrator import fingerprint_data, fingerprint_model, fit_cost, set_n_jobs
+from model.tuning import prepare_folds
+
+METHODS = ('stacking', 'soft')
+OOF_CACHE_DIR = os.path.join('model', '.cache', 'oof')
+# Probabilities are clipped before the logit so a 0/1 vote (e.g. an unpruned tree) stays finite
+PROBA_EPS = 1e-4
+
+
+def _logit(p):
+    p = np.clip(p, PROBA_EPS, 1 - PROBA_EPS)
+    return np.log(p / (1 - p))
+
+
+class EnsembleModel:
+    """
+    Combines fused member models (raw features in) into one classifier.
+
+    ``method='stacking'`` feeds the members' log-odds to the meta-learner;
+    ``method='soft'`` averages their probabilities. With ``short_circuit``,
+    rows where every member in ``cheap`` predicts the same class with
+    probability >= ``confidence`` take the cheap members' average and skip
+    the others. ``n_jobs`` threads score members concurrently.
+    """
+
+    scaler_folded = True
+
+    def __init__(self, members, cheap=(), method='stacking', short_circuit=True, confidence=0.9, n_jobs=None):
+        self.members = dict(members)
+        self.cheap = [name for name in self.members if name in cheap]
+        self.method = method
+        self.short_circuit = short_circuit
+        self.confidence = confidence
+        self.n_jobs = n_jobs
+        first = next(iter(self.members.values()))
+        self.feature_names = list(first.feature_names)
+        self.classes_ = np.asarray(first.classes_)
+        self.meta = None
+        self._executor = None
+
+    @property
+    def method_label(self):
+        return 'stacking meta-learner' if self.method == 'stacking' else 'soft voting'
+
+    def fit_meta(self, member_proba, y):
+        """Fit the stacking meta-learner on out-of-fold member probabilities (rows x members)."""
+        self.meta = LogisticRegression(max_iter=1000).fit(_logit(member_proba), y)
+        return self
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_executor'] = None
+        return state
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.n_jobs or len(self.members))
+        return self._executor
+
+    def _prepare(self, X):
+        if hasattr(X, 'columns'):
+            missing = [c for c in self.feature_names if c not in X.columns]
+            if missing:
+                raise ValueError(f"Missing feature columns: {missing}")
+            X = X[self.feature_names].to_numpy(dtype=np.float64)
+        return np.asarray(X, dtype=np.float64)
+
+    def member_proba(self, X, names=None):
+        """P(class 1) from each member in ``names`` (default: all), shape (rows, members)."""
+        names = list(self.members) if names is None else names
+        X = self._prepare(X)
+        if len(names) == 1 or self.n_jobs == 1:
+            columns = [self.members[n].predict_proba(X)[:, 1] for n in names]
+        else:
+            columns = list(self._pool().map(lambda n: self.members[n].predict_proba(X)[:, 1], names))
+        return np.column_stack(columns)
+
+    def combine(self, member_proba):
+        """Ensemble P(class 1) from all members' probabilities."""
+        if self.method == 'soft' or self.meta is None:
+            return member_proba.mean(axis=1)
+        return self.meta.predict_proba(_logit(member_proba))[:, 1]
+
+    def resolved_by_cheap(self, cheap_proba):
+        """Rows the cheap members settle on their own: unanimous and confident."""
+        if not self.short_circuit or not self.cheap or len(self.cheap) == len(self.members):
+            return np.zeros(len(cheap_proba), dtype=bool)
+        votes = cheap_proba >= 0.5
+        agree = votes.all(axis=1) | ~votes.any(axis=1)
+        confident = np.maximum(cheap_proba, 1 - cheap_proba).min(axis=1) >= self.confidence
+        return agree & confident
+
+    def predict_proba(self, X):
+        X = self._prepare(X)
+        names = list(self.members)
+        proba = np.empty(len(X))
+
+        cheap_proba = self.member_proba(X, self.cheap) if self.short_circuit and self.cheap else None
+        done = self.resolved_by_cheap(cheap_proba) if cheap_proba is not None else np.zeros(len(X), dtype=bool)
+        if done.any():
+            proba[done] = cheap_proba[done].mean(axis=1)
+
+        todo = ~done
+        if todo.any():
+            rest = [n for n in names if cheap_proba is None or n not in self.cheap]
+            rest_proba = self.member_proba(X[todo], rest)
+            full = np.empty((int(todo.sum()), len(names)))
+            for j, name in enumerate(names):
+                if name in rest:
+                    full[:, j] = rest_proba[:, rest.index(name)]
+                else:
+                    full[:, j] = cheap_proba[todo, self.cheap.index(name)]
+            proba[todo] = self.combine(full)
+
+        return np.column_stack([1 - proba, proba])
+
+    def predict(self, X):
+        return self.classes_.take((self.predict_proba(X)[:, 1] >= 0.5).astype(np.int64))
+
+    def get_params(self, deep=True):
+        return {'method': self.method, 'short_circuit': self.short_circuit,
+                'confidence': self.confidence, 'n_jobs': self.n_jobs}
+
+    def set_params(self, **params):
+        for key, value in params.items():
+            if key not in self.get_params():
+                raise ValueError(f"Invalid parameter {key!r} for EnsembleModel")
+            if key == 'method' and value not in METHODS:
+                raise ValueError(f"method must be one of {METHODS}, got {value!r}")
+            setattr(self, key, value)
+        if 'n_jobs' in params:
+            self._executor = None
+        return self
+
+
+# Per-process fold data for out-of-fold fits, set once by the pool initializer
+_worker = {}
+
+
+def _init_worker(folds):
+    _worker['folds'] = folds
+
+
+def _oof_fold(estimator, fold):
+    X_train, y_train, X_val, y_val = _worker['folds'][fold]
+    model = clone(estimator)
+    set_n_jobs(model, 1)
+    model.fit(X_train, y_train)
+    return model.predict_proba(X_val)[:, 1], y_val
+
+
+def out_of_fold_proba(models, X, y, n_folds=5, max_workers=None, cache_dir=OOF_CACHE_DIR, log=print):
+    """
+    Out-of-fold P(class 1) of every model in ``models`` ({name: unfitted estimator}).
+
+    Returns (proba of shape (rows, models), y in the same row order). Each
+    fold's scaler is fitted on its training part only (see tuning.prepare_folds).
+    Model x fold fits run in a process pool, slowest first; results are cached
+    per model on the data and hyperparameters, like the main fits.
+    """
+    folds = prepare_folds(X, y, n_folds)
+    y_oof = np.concatenate([fold[3] for fold in folds])
+    data_key = fingerprint_data(np.asarray(X, dtype=np.float64), np.asarray(y, dtype=np.int64))
+    os.makedirs(cache_dir, exist_ok=True)
+
+    columns, pending = {}, {}
+    for name, estimator in models.items():
+        key = hashlib.sha256(f"{data_key}:{fingerprint_model(estimator)}:{n_folds}".encode()).hexdigest()[:32]
+        path = os.path.join(cache_dir, f"{key}.pkl")
+        if os.path.exists(path):
+            columns[name] = joblib.load(path)
+            log(f"   ♻️  {name}: reusing cached out-of-fold predictions")
+        else:
+            pending[name] = (estimator, path)
+
+    if pending:
+        started = time.perf_counter()
+        order = sorted(pending, key=lambda n: -fit_cost(pending[n][0]))
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count() or 1,
+                                 initializer=_init_worker, initargs=(folds,)) as pool:
+            futures = {
+                name: [pool.submit(_oof_fold, pending[name][0], f) for f in range(n_folds)]
+                for name in order
+            }
+            for name in order:
+                columns[name] = np.concatenate([future.result()[0] for future in futures[name]])
+                joblib.dump(columns[name], pending[name][1])
+        log(f"   ⏱️  {len(pending)} model(s) x {n_folds} folds in {time.perf_counter() - started:.1f}s")
+
+    return np.column_stack([columns[name] for name in models]), y_oof
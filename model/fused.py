@@ -0,0 +1,219 @@
+"""
+Wine Quality Classification - Fused Inference Artifacts
+Folds the StandardScaler into each trained model so raw features are scored in one pass
+"""
+
+import copy
+import json
+
+import numpy as np
+
+from sklearn.linear_model import LogisticRegression
+from sklearn.naive_bayes import GaussianNB
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.ensemble import RandomForestClassifier
+from xgboost import XGBClassifier
+
+
+class FusedModel:
+    """
+    A classifier whose parameters already include the feature scaling.
+
+    ``predict``/``predict_proba`` take raw (unscaled) features. DataFrames are
+    reordered to the training column order, so a fused model cannot silently
+    drift out of step with the columns its scaler was fitted on.
+    """
+
+    scaler_folded = True
+
+    def __init__(self, estimator, feature_names, method, mean=None, scale=None):
+        self.estimator = estimator
+        self.feature_names = list(feature_names)
+        self.method = method
+        # Only set for estimators that cannot absorb the scaling (kNN)
+        self.mean = mean
+        self.scale = scale
+
+    @property
+    def classes_(self):
+        return self.estimator.classes_
+
+    def _prepare(self, X):
+        if hasattr(X, 'columns'):
+            missing = [c for c in self.feature_names if c not in X.columns]
+            if missing:
+                raise ValueError(f"Missing feature columns: {missing}")
+            # Already in training order: no column selection, and a float64 frame converts without a copy
+            if list(X.columns) != self.feature_names:
+                X = X[self.feature_names]
+            X = X.to_numpy(dtype=np.float64, copy=False)
+        else:
+            X = np.asarray(X, dtype=np.float64)
+        if self.mean is not None:
+            X = (X - self.mean) / self.scale
+        return X
+
+    def predict_proba(self, X):
+        return self.estimator.predict_proba(self._prepare(X))
+
+    def predict(self, X):
+        return self.estimator.predict(self._prepare(X))
+
+    def get_params(self, deep=True):
+        return self.estimator.get_params(deep)
+
+    def set_params(self, **params):
+        self.estimator.set_params(**params)
+        return self
+
+
+def _scaler_stats(scaler):
+    mean = scaler.mean_ if scaler.with_mean else np.zeros(scaler.n_features_in_)
+    scale = scaler.scale_ if scaler.with_std else np.ones(scaler.n_features_in_)
+    return mean, scale
+
+
+def _fold_linear(model, grid):
+    mean, scale = grid.mean, grid.scale
+    # w.x_s + b = w.((x - mean) / scale) + b = (w / scale).x + (b - w.(mean / scale))
+    fused = copy.deepcopy(model)
+    fused.coef_ = model.coef_ / scale
+    fused.intercept_ = model.intercept_ - model.coef_ @ (mean / scale)
+    return fused
+
+
+def _fold_naive_bayes(model, grid):
+    mean, scale = grid.mean, grid.scale
+    # A Gaussian in scaled space maps to a Gaussian in raw space
+    fused = copy.deepcopy(model)
+    fused.theta_ = model.theta_ * scale + mean
+    fused.var_ = model.var_ * scale ** 2
+    return fused
+
+
+class _SplitGrid:
+    """
+    Observed raw values per feature, used to place folded split thresholds.
+
+    Trees compare float32 features, so mapping a threshold with
+    ``t * scale + mean`` alone can flip rows that sit exactly on a split. The
+    mapped threshold is therefore clamped into the gap between the
+    neighbouring raw values that the original split separates, which
+    reproduces the original routing for every value seen in the reference data.
+    """
+
+    def __init__(self, X_reference, mean, scale):
+        self.mean = mean
+        self.scale = scale
+        self.raw = []
+        self.scaled = []
+        if X_reference is not None:
+            X_reference = np.asarray(X_reference, dtype=np.float64)
+            for j in range(X_reference.shape[1]):
+                raw = np.unique(X_reference[:, j])
+                self.raw.append(raw)
+                self.scaled.append(((raw - mean[j]) / scale[j]).astype(np.float32))
+
+    def fold(self, features, thresholds, strict):
+        """Map scaled-space thresholds to raw space; strict=True for ``x < t`` splits."""
+        folded = thresholds * self.scale[features] + self.mean[features]
+        if not self.raw:
+            return folded
+
+        for j in np.unique(features):
+            at = features == j
+            raw, scaled = self.raw[j], self.scaled[j]
+            # Number of observed values routed left by each original split, using
+            # the estimator's own comparison precision (XGBoost float32, sklearn float64)
+            if strict:
+                k = np.searchsorted(scaled, thresholds[at].astype(np.float32), side='left')
+            else:
+                k = np.searchsorted(scaled.astype(np.float64), thresholds[at], side='right')
+            inside = (k > 0) & (k < len(raw))
+            lo = raw[k[inside] - 1].astype(np.float32)
+            hi = raw[k[inside]].astype(np.float32)
+
+            clamped = folded[at]
+            if strict:
+                # float32 condition: lo < t <= hi
+                t = clamped[inside].astype(np.float32)
+                t = np.minimum(np.maximum(t, np.nextafter(lo, np.float32(np.inf))), hi)
+            else:
+                # float64 threshold against float32 input: lo <= t < hi
+                t = np.maximum(clamped[inside], lo.astype(np.float64))
+                t = np.minimum(t, np.nextafter(hi.astype(np.float64), -np.inf))
+            clamped[inside] = t
+            folded[at] = clamped
+        return folded
+
+
+def _fold_tree(tree, grid):
+    # x_s <= t  <=>  x <= t' in raw space, applied to split nodes only
+    split = tree.tree_.children_left != -1
+    features = tree.tree_.feature[split]
+    tree.tree_.threshold[split] = grid.fold(features, tree.tree_.threshold[split], strict=False)
+
+
+def _fold_decision_tree(model, grid):
+    fused = copy.deepcopy(model)
+    _fold_tree(fused, grid)
+    return fused
+
+
+def _fold_random_forest(model, grid):
+    fused = copy.deepcopy(model)
+    for tree in fused.estimators_:
+        _fold_tree(tree, grid)
+    return fused
+
+
+def _fold_xgboost(model, grid):
+    booster = model.get_booster()
+    config = json.loads(booster.save_raw('json'))
+
+    # XGBoost routes x < condition to the left child
+    for tree in config['learner']['gradient_booster']['model']['trees']:
+        split = np.asarray(tree['left_children']) != -1
+        features = np.asarray(tree['split_indices'])[split]
+        conditions = np.asarray(tree['split_conditions'], dtype=np.float64)
+        conditions[split] = grid.fold(features, conditions[split], strict=True)
+        tree['split_conditions'] = conditions.tolist()
+
+    fused = copy.deepcopy(model)
+    fused.get_booster().load_model(bytearray(json.dumps(config), 'utf-8'))
+    return fused
+
+
+_FOLDERS = [
+    (LogisticRegression, _fold_linear, 'coefficients'),
+    (GaussianNB, _fold_naive_bayes, 'class means/variances'),
+    (DecisionTreeClassifier, _fold_decision_tree, 'split thresholds'),
+    (RandomForestClassifier, _fold_random_forest, 'split thresholds'),
+    (XGBClassifier, _fold_xgboost, 'split thresholds'),
+]
+
+
+def fuse(model, scaler, X_reference=None):
+    """
+    Return a FusedModel equivalent to ``model.predict_proba(scaler.transform(X))``.
+
+    ``X_reference`` (the raw training features) is used to place folded tree
+    thresholds between observed values; without it thresholds are mapped
+    affinely, which can flip rows lying exactly on a float32 split.
+    """
+    mean, scale = _scaler_stats(scaler)
+    feature_names = getattr(scaler, 'feature_names_in_', range(scaler.n_features_in_))
+    grid = _SplitGrid(X_reference, mean, scale)
+
+    for cls, folder, method in _FOLDERS:
+        if isinstance(model, cls):
+            return FusedModel(folder(model, grid), feature_names, method)
+
+    # Distance-based models (kNN) depend on the scaled geometry itself;
+    # they keep an explicit standardisation step inside the artifact
+    return FusedModel(copy.deepcopy(model), feature_names, 'embedded scaling', mean, scale)
+
+
+def agreement(fused, model, scaler, X):
+    """Fraction of rows where the fused and the original pipeline predict the same label."""
+    return float(np.mean(fused.predict(X) == model.predict(scaler.transform(X))))
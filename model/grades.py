@@ -0,0 +1,80 @@
+"""
+Wine Quality Classification - Quality Grade Models
+Multi-class and ordinal models of the raw quality grade that also answer the Good/Not Good question
+
+A grade model is fitted on the same scaled feature matrix as the binary
+models, with the raw 3-9 grade as the target. ``method='multiclass'`` fits
+the estimator once over all grades; ``method='ordinal'`` fits one binary
+copy per cut-off, P(grade > k), and takes the grade probabilities as the
+differences of those (Frank & Hall), which respects the order of the grades.
+Either way ``predict_proba`` returns the binary [P(Not Good), P(Good)] with
+P(Good) = P(grade >= 7) summed from the grade probabilities, so a grade
+model drops in wherever a binary model is scored, and one evaluation gives
+both the grade and the Good/Not Good label (see scoring.score_grade_chunk).
+"""
+
+import numpy as np
+
+from sklearn.base import BaseEstimator, ClassifierMixin, clone
+
+from model.dataset import GOOD_QUALITY_MIN
+
+METHODS = ('multiclass', 'ordinal')
+
+
+class GradeModel(ClassifierMixin, BaseEstimator):
+    """
+    Quality grade classifier over a base estimator, with the binary task derived from it.
+
+    ``fit(X, grades)`` takes raw grades; grades seen in training are
+    ``grades_``. The base estimator sees them as codes 0..n-1, so any
+    classifier works (XGBoost needs consecutive labels).
+    """
+
+    def __init__(self, estimator, method='multiclass', good_min=GOOD_QUALITY_MIN):
+        self.estimator = estimator
+        self.method = method
+        self.good_min = good_min
+
+    def fit(self, X, y):
+        if self.method not in METHODS:
+            raise ValueError(f"method must be one of {METHODS}, got {self.method!r}")
+        self.grades_, codes = np.unique(np.asarray(y, dtype=np.int64), return_inverse=True)
+        if len(self.grades_) < 2:
+            raise ValueError("Grade models need at least two distinct grades to fit")
+        self.classes_ = np.array([0, 1])
+        if self.method == 'multiclass':
+            self.estimators_ = [clone(self.estimator).fit(X, codes)]
+        else:
+            self.estimators_ = [clone(self.estimator).fit(X, (codes > k).astype(np.int64))
+                                for k in range(len(self.grades_) - 1)]
+        return self
+
+    def predict_grade_proba(self, X):
+        """Probability of each grade in ``grades_``, shape (rows, grades)."""
+        if self.method == 'multiclass':
+            return self.estimators_[0].predict_proba(X)
+        # P(grade > k) per cut-off, made non-increasing in k so every difference is a probability
+        above = np.column_stack([model.predict_proba(X)[:, 1] for model in self.estimators_])
+        above = np.minimum.accumulate(above, axis=1)
+        return -np.diff(np.hstack([np.ones((len(above), 1)), above, np.zeros((len(above), 1))]), axis=1)
+
+    def good_proba(self, grade_proba):
+        """P(Good): the probability mass on grades >= good_min."""
+        return grade_proba[:, self.grades_ >= self.good_min].sum(axis=1)
+
+    def most_likely(self, grade_proba):
+        return self.grades_.take(grade_proba.argmax(axis=1))
+
+    def expected_grade(self, grade_proba):
+        return grade_proba @ self.grades_
+
+    def predict_proba(self, X):
+        good = self.good_proba(self.predict_grade_proba(X))
+        return np.column_stack([1 - good, good])
+
+    def predict(self, X):
+        return self.classes_.take(self.predict_proba(X).argmax(axis=1))
+
+    def predict_grade(self, X):
+        return self.most_likely(self.predict_grade_proba(X))
@@ -0,0 +1,182 @@
+"""
+Wine Quality Classification - Indexed kNN Backend
+k-nearest neighbours over a KD-tree index, with exact and approximate search modes
+
+Usage:
+    python model/knn_index.py    # recall-vs-latency report for the trained kNN model
+"""
+
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.model_selection import train_test_split
+from sklearn.neighbors import KNeighborsClassifier
+
+# Allow `python model/knn_index.py` from the repository root to import the model package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model.artifacts import load_model, load_scaler
+from model.dataset import FEATURE_COLUMNS, TARGET_COLUMN, load_prepared
+
+MODES = ('exact', 'approx')
+REPORT_PATH = os.path.join('model', 'knn_report.json')
+REPORT_EPS = [0.0, 0.25, 0.5, 1.0, 2.0, 4.0]
+
+
+class IndexedKNN(ClassifierMixin, BaseEstimator):
+    """
+    Drop-in replacement for ``KNeighborsClassifier`` (uniform weights, Euclidean).
+
+    ``fit`` keeps a float32 copy of the training matrix and builds a KD-tree on it.
+    ``mode='exact'`` returns the true k nearest neighbours. ``mode='approx'``
+    lets the tree prune branches that cannot contain a neighbour more than
+    ``(1 + eps)`` times closer than the current candidates, trading recall for speed.
+    """
+
+    def __init__(self, n_neighbors=5, mode='exact', eps=0.5, leaf_size=16, n_jobs=None):
+        self.n_neighbors = n_neighbors
+        self.mode = mode
+        self.eps = eps
+        self.leaf_size = leaf_size
+        self.n_jobs = n_jobs
+
+    def fit(self, X, y):
+        if self.mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got {self.mode!r}")
+        X = np.asarray(X, dtype=np.float32)
+        self.classes_, y_encoded = np.unique(np.asarray(y), return_inverse=True)
+        self.n_features_in_ = X.shape[1]
+        self.fit_X_ = np.ascontiguousarray(X)
+        self.fit_y_ = y_encoded.astype(np.int8)
+        # Balanced median splits suit the low-dimensional (12 feature) data
+        self.tree_ = cKDTree(self.fit_X_, leafsize=self.leaf_size,
+                             balanced_tree=True, compact_nodes=True, copy_data=False)
+        return self
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # A pickled cKDTree carries a float64 copy of the data (~2.5x the float32
+        # matrix); rebuilding it from the float32 matrix on load takes milliseconds
+        state.pop('tree_', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if hasattr(self, 'fit_X_'):
+            self.tree_ = cKDTree(self.fit_X_, leafsize=self.leaf_size,
+                                 balanced_tree=True, compact_nodes=True, copy_data=False)
+
+    def kneighbors(self, X, n_neighbors=None):
+        """Return (distances, indices) of the nearest training rows, closest first."""
+        k = n_neighbors or self.n_neighbors
+        eps = self.eps if self.mode == 'approx' else 0.0
+        X = np.asarray(X, dtype=np.float32)
+        distances, indices = self.tree_.query(X, k=k, eps=eps, workers=self.n_jobs or 1)
+        if k == 1:
+            distances, indices = distances[:, None], indices[:, None]
+        return distances, indices
+
+    def predict_proba(self, X):
+        _, indices = self.kneighbors(X)
+        votes = self.fit_y_[indices]
+        proba = np.zeros((len(votes), len(self.classes_)))
+        for code in range(len(self.classes_)):
+            proba[:, code] = (votes == code).mean(axis=1)
+        return proba
+
+    def predict(self, X):
+        return self.classes_.take(self.predict_proba(X).argmax(axis=1))
+
+
+def _timed(fn, X, repeats=3):
+    best = float('inf')
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn(X)
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+
+def recall_latency_report(model, X, y=None, eps_values=REPORT_EPS):
+    """
+    Measure neighbour recall and query latency of ``model`` at each ``eps``.
+
+    Recall is the fraction of the exact k nearest neighbours that the search
+    returns; ``label_agreement`` is the fraction of predictions unchanged from
+    exact search. ``X`` must already be scaled like the training data.
+    """
+    original = model.get_params()
+    rows = []
+    try:
+        model.set_params(mode='exact')
+        (_, exact_idx), _ = _timed(model.kneighbors, X)
+        exact_pred = model.predict(X)
+
+        for eps in eps_values:
+            model.set_params(mode='approx' if eps else 'exact', eps=eps)
+            (_, idx), seconds = _timed(model.kneighbors, X)
+            recall = np.mean([len(np.intersect1d(a, b)) for a, b in zip(idx, exact_idx)]) / idx.shape[1]
+            pred = model.predict(X)
+            row = {
+                'mode': 'approx' if eps else 'exact',
+                'eps': eps,
+                'recall_at_k': round(float(recall), 4),
+                'label_agreement': round(float(np.mean(pred == exact_pred)), 4),
+                'ms_per_1k_rows': round(seconds * 1000 / len(X) * 1000, 3)
+            }
+            if y is not None:
+                row['accuracy'] = round(float(np.mean(pred == np.asarray(y))), 4)
+            rows.append(row)
+    finally:
+        model.set_params(**original)
+    return rows
+
+
+def main():
+    print("=" * 80)
+    print("kNN INDEX - RECALL VS LATENCY")
+    print("=" * 80)
+
+    df = load_prepared()
+    X, y = df[FEATURE_COLUMNS], df[TARGET_COLUMN]
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+    scaler = load_scaler()
+    X_train_scaled, X_test_scaled = scaler.transform(X_train), scaler.transform(X_test)
+
+    model = load_model('kNN')
+    # (isinstance would fail here: run as a script this module is __main__)
+    if getattr(model, 'mode', None) not in MODES:
+        sys.exit("model/knn.pkl is not an IndexedKNN model; retrain with model/train_models.py")
+
+    rows = recall_latency_report(model, X_test_scaled, y_test)
+
+    # Reference: the previous backend, scikit-learn's KD-tree over float64 training data
+    reference = KNeighborsClassifier(n_neighbors=model.n_neighbors, algorithm='kd_tree')
+    reference.fit(X_train_scaled, y_train)
+    reference_pred, seconds = _timed(reference.predict, X_test_scaled)
+    rows.append({
+        'mode': 'sklearn kd_tree',
+        'eps': None,
+        'recall_at_k': None,
+        'label_agreement': round(float(np.mean(reference_pred == model.predict(X_test_scaled))), 4),
+        'ms_per_1k_rows': round(seconds * 1000 / len(X_test_scaled) * 1000, 3),
+        'accuracy': round(float(np.mean(reference_pred == y_test)), 4)
+    })
+
+    print(pd.DataFrame(rows).to_string(index=False))
+    with open(REPORT_PATH, 'w') as f:
+        json.dump(rows, f, indent=4)
+    print(f"\n✅ Report saved to {REPORT_PATH}")
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
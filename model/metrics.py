@@ -0,0 +1,278 @@
+"""
+Wine Quality Classification - Metrics Engine
+Every evaluation metric from one confusion matrix and one sort, with bounded-memory streaming accumulation
+
+Accuracy, precision, recall, F1 and MCC are all derived from the 2x2
+confusion matrix, which is built with a single bincount. AUC is the
+Mann-Whitney statistic: P(score of a positive > score of a negative), ties
+counted as one half. It is computed from one sort of the scores, or, when
+accumulating chunks, from per-class score histograms. The same sort gives
+the confusion matrix at every decision threshold (``threshold_sweep``).
+Quality grade metrics (``grade_metrics``) likewise come from one confusion
+matrix over the 0-10 grade scale.
+"""
+
+import numpy as np
+import pandas as pd
+
+METRIC_NAMES = ['Accuracy', 'AUC', 'Precision', 'Recall', 'F1', 'MCC']
+# Score histogram resolution for streaming AUC (per class, 1 MB in total)
+AUC_BINS = 65536
+GRADE_METRIC_NAMES = ['Accuracy', 'Within One', 'MAE', 'Macro F1', 'QWK']
+# Grades are the raw 0-10 quality scores
+GRADE_LEVELS = 11
+
+
+def _binary(labels, name):
+    labels = np.asarray(labels, dtype=np.int64)
+    if labels.size and (labels.min() < 0 or labels.max() > 1):
+        raise ValueError(f"{name} must hold 0/1 labels, got values from {labels.min()} to {labels.max()}")
+    return labels
+
+
+def confusion(y_true, y_pred):
+    """2x2 confusion matrix (rows: true label, columns: predicted label); ValueError for labels other than 0/1."""
+    flat = _binary(y_true, 'y_true') * 2 + _binary(y_pred, 'y_pred')
+    return np.bincount(flat, minlength=4).reshape(2, 2)
+
+
+def _ratio(numerator, denominator):
+    """numerator / denominator, 0 where the denominator is 0 (sklearn's zero_division=0)."""
+    denominator = np.asarray(denominator, dtype=np.float64)
+    return np.divide(numerator, denominator, out=np.zeros_like(denominator), where=denominator != 0)
+
+
+def _counts_to_metrics(tn, fp, fn, tp):
+    """Threshold metrics from confusion counts; scalars or arrays (one entry per threshold)."""
+    tn, fp, fn, tp = (np.asarray(v, dtype=np.float64) for v in (tn, fp, fn, tp))
+    precision = _ratio(tp, tp + fp)
+    recall = _ratio(tp, tp + fn)
+    return {
+        'Accuracy': _ratio(tp + tn, tn + fp + fn + tp),
+        'Precision': precision,
+        'Recall': recall,
+        'F1': _ratio(2 * precision * recall, precision + recall),
+        'MCC': _ratio(tp * tn - fp * fn, np.sqrt((tp + fp) * (tp + fn) * (tn + fp) * (tn + fn)))
+    }
+
+
+def threshold_metrics(cm):
+    """Accuracy, precision, recall, F1 and MCC for the positive class from a confusion matrix."""
+    scores = _counts_to_metrics(*np.asarray(cm).ravel())
+    return {name: float(value) for name, value in scores.items()}
+
+
+def _auc_from_counts(neg, pos):
+    """AUC from negative/positive counts per ascending score group."""
+    neg = np.asarray(neg, dtype=np.float64)
+    pos = np.asarray(pos, dtype=np.float64)
+    n_neg, n_pos = neg.sum(), pos.sum()
+    if not n_neg or not n_pos:
+        return float('nan')
+    neg_below = np.cumsum(neg) - neg
+    return float(pos @ (neg_below + 0.5 * neg) / (n_pos * n_neg))
+
+
+def roc_auc(y_true, y_score):
+    """Exact ROC AUC (same value as sklearn's roc_auc_score) from a single sort."""
+    y_score = np.asarray(y_score, dtype=np.float64)
+    order = np.argsort(y_score, kind='stable')
+    scores = y_score[order]
+    positive = np.asarray(y_true, dtype=np.int64)[order]
+    # Group equal scores: ends of each run of ties in the sorted order
+    ends = np.append(np.flatnonzero(np.diff(scores)), len(scores) - 1)
+    pos = np.diff(np.concatenate([[0], np.cumsum(positive)[ends]]))
+    size = np.diff(np.concatenate([[-1], ends]))
+    return _auc_from_counts(size - pos, pos)
+
+
+def evaluate(y_true, y_pred, y_score, digits=4):
+    """The six comparison metrics, rounded as stored in results.json."""
+    scores = threshold_metrics(confusion(y_true, y_pred))
+    scores['AUC'] = roc_auc(y_true, y_score)
+    return {name: round(scores[name], digits) for name in METRIC_NAMES}
+
+
+def threshold_sweep(y_true, y_score, thresholds=None):
+    """
+    Accuracy, precision, recall, F1 and MCC at every decision threshold, from one sort.
+
+    A row is predicted positive when its score is >= the threshold. Without
+    ``thresholds`` every distinct score is a threshold (highest first);
+    otherwise the curves are read at the given values. Returns a DataFrame
+    with a ``Threshold`` and a ``Predicted Positive`` column.
+    """
+    y_true = np.asarray(y_true, dtype=np.int64)
+    y_score = np.asarray(y_score, dtype=np.float64)
+    order = np.argsort(-y_score, kind='stable')
+    scores = y_score[order]
+    # True positives among the k highest-scoring rows, for k = 0..n
+    tp_top = np.concatenate([[0], np.cumsum(y_true[order])])
+
+    if thresholds is None:
+        ends = np.append(np.flatnonzero(np.diff(scores)), len(scores) - 1)
+        thresholds = scores[ends]
+        predicted = ends + 1
+    else:
+        thresholds = np.asarray(thresholds, dtype=np.float64)
+        predicted = np.searchsorted(-scores, -thresholds, side='right')
+
+    positives, negatives = tp_top[-1], len(y_true) - tp_top[-1]
+    tp = tp_top[predicted]
+    fp = predicted - tp
+    sweep = pd.DataFrame(_counts_to_metrics(negatives - fp, fp, positives - tp, tp))
+    sweep.insert(0, 'Threshold', thresholds)
+    sweep['Predicted Positive'] = predicted
+    return sweep
+
+
+def best_threshold(y_true, y_score, metric='F1'):
+    """
+    Threshold maximising ``metric`` on (y_true, y_score), with the metric's value there.
+
+    The threshold is placed halfway between the best score cut-off and the next
+    lower distinct score, so rows just below the cut-off seen in fitting stay negative.
+    """
+    sweep = threshold_sweep(y_true, y_score)
+    best = int(sweep[metric].to_numpy().argmax())
+    threshold = sweep['Threshold'].iloc[best]
+    if best + 1 < len(sweep):
+        threshold = (threshold + sweep['Threshold'].iloc[best + 1]) / 2
+    return float(threshold), float(sweep[metric].iloc[best])
+
+
+def calibration_bins(y_true, y_score, n_bins=10):
+    """
+    Reliability table: mean predicted probability vs observed positive rate per equal-width bin.
+
+    Empty bins have NaN means and a zero count.
+    """
+    y_score = np.asarray(y_score, dtype=np.float64)
+    index = np.clip((y_score * n_bins).astype(np.int64), 0, n_bins - 1)
+    count = np.bincount(index, minlength=n_bins)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_score = np.bincount(index, weights=y_score, minlength=n_bins) / count
+        observed = np.bincount(index, weights=np.asarray(y_true, dtype=np.float64), minlength=n_bins) / count
+    edges = np.linspace(0, 1, n_bins + 1)
+    return pd.DataFrame({
+        'Bin Lower': edges[:-1],
+        'Bin Upper': edges[1:],
+        'Mean Predicted': mean_score,
+        'Observed Rate': observed,
+        'Count': count
+    })
+
+
+def calibration_error(bins):
+    """Expected calibration error: count-weighted mean |predicted - observed| over the bins."""
+    filled = bins[bins['Count'] > 0]
+    weights = filled['Count'] / filled['Count'].sum()
+    return float((weights * (filled['Mean Predicted'] - filled['Observed Rate']).abs()).sum())
+
+
+def report(cm, target_names=('Not Good', 'Good')):
+    """Build a classification_report(output_dict=True) style DataFrame from a confusion matrix."""
+    cm = np.asarray(cm, dtype=float)
+    support = cm.sum(axis=1)
+    predicted = cm.sum(axis=0)
+    hits = np.diag(cm)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(predicted > 0, hits / predicted, 0.0)
+        recall = np.where(support > 0, hits / support, 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+
+    total = support.sum()
+    rows = {
+        name: [precision[i], recall[i], f1[i], support[i]]
+        for i, name in enumerate(target_names)
+    }
+    accuracy = hits.sum() / total if total else 0.0
+    rows['accuracy'] = [accuracy, accuracy, accuracy, total]
+    rows['macro avg'] = [precision.mean(), recall.mean(), f1.mean(), total]
+    weights = support / total if total else np.zeros_like(support)
+    rows['weighted avg'] = [precision @ weights, recall @ weights, f1 @ weights, total]
+
+    return pd.DataFrame(rows, index=['precision', 'recall', 'f1-score', 'support']).T
+
+
+def grade_confusion(y_true, y_pred, levels=GRADE_LEVELS):
+    """levels x levels confusion matrix of integer grades (rows: true grade, columns: predicted grade)."""
+    flat = np.asarray(y_true, dtype=np.int64) * levels + np.asarray(y_pred, dtype=np.int64)
+    return np.bincount(flat, minlength=levels * levels).reshape(levels, levels)
+
+
+def grade_metrics(cm, digits=4):
+    """
+    Exact-grade accuracy, share within one grade, mean absolute error, macro F1 and
+    quadratic weighted kappa (QWK) from a grade confusion matrix.
+
+    Macro F1 averages over the grades present in the truth or the predictions.
+    QWK weighs each disagreement by its squared grade distance, so near misses
+    cost little. The distances are on the fixed 0-10 grade scale, not between
+    the grades that happen to occur. This deliberately differs from sklearn's
+    cohen_kappa_score(weights='quadratic'), which spaces the observed labels
+    one apart. The result equals cohen_kappa_score(..., weights='quadratic',
+    labels=range(11)). The defaults agree whenever no grade in between is
+    missing from both the truth and the predictions.
+    """
+    cm = np.asarray(cm, dtype=np.float64)
+    n = cm.sum()
+    grades = np.arange(len(cm))
+    distance = np.abs(grades[:, None] - grades[None, :])
+    support, predicted, hits = cm.sum(axis=1), cm.sum(axis=0), np.diag(cm)
+    present = support + predicted > 0
+    f1 = _ratio(2 * hits, support + predicted)
+    expected = np.outer(support, predicted) / n if n else cm
+    scores = {
+        'Accuracy': _ratio(hits.sum(), n),
+        'Within One': _ratio(cm[distance <= 1].sum(), n),
+        'MAE': _ratio((cm * distance).sum(), n),
+        'Macro F1': f1[present].mean() if present.any() else 0.0,
+        'QWK': 1 - _ratio((distance ** 2 * cm).sum(), (distance ** 2 * expected).sum())
+    }
+    return {name: round(float(scores[name]), digits) for name in GRADE_METRIC_NAMES}
+
+
+def evaluate_grades(y_true, y_pred, digits=4):
+    """The grade metrics of predicted against true grades, rounded as stored in grade_results.json."""
+    return grade_metrics(grade_confusion(y_true, y_pred), digits)
+
+
+class MetricsAccumulator:
+    """
+    Metrics over any number of chunks in one pass with constant memory.
+
+    The confusion matrix is exact. AUC is computed over ``bins`` equal-width
+    score bins per class; scores that share a bin count as ties, so the value
+    is within about 1/bins of the exact AUC. Accumulators of separate slices
+    (e.g. score.py shards) combine with ``merge``.
+    """
+
+    def __init__(self, bins=AUC_BINS):
+        self.bins = bins
+        self.confusion = np.zeros((2, 2), dtype=np.int64)
+        self.hist = np.zeros((2, bins), dtype=np.int64)
+
+    @property
+    def n_rows(self):
+        return int(self.confusion.sum())
+
+    def update(self, y_true, y_pred, y_score=None):
+        """Add a chunk of 0/1 labels; ``y_score`` (P(class 1)) is needed for AUC."""
+        y_true = _binary(y_true, 'y_true')
+        self.confusion += confusion(y_true, y_pred)
+        if y_score is not None:
+            index = np.clip((np.asarray(y_score, dtype=np.float64) * self.bins).astype(np.int64), 0, self.bins - 1)
+            self.hist += np.bincount(y_true * self.bins + index, minlength=2 * self.bins).reshape(2, self.bins)
+        return self
+
+    def merge(self, other):
+        self.confusion += other.confusion
+        self.hist += other.hist
+        return self
+
+    def results(self, digits=4):
+        scores = threshold_metrics(self.confusion)
+        scores['AUC'] = _auc_from_counts(self.hist[0], self.hist[1])
+        return {name: round(scores[name], digits) for name in METRIC_NAMES}
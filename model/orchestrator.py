@@ -0,0 +1,232 @@
+"""
+Wine Quality Classification - Training Orchestrator
+Fits independent models concurrently in a process pool and caches finished fits
+"""
+
+import hashlib
+import inspect
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import joblib
+import numpy as np
+import sklearn
+import xgboost
+
+from model.artifacts import file_sha256
+from model.grades import GradeModel
+
+CACHE_DIR = os.path.join('model', '.cache', 'fits')
+# Cached fits beyond this are evicted, least recently used first
+DEFAULT_CACHE_MAX_BYTES = int(os.environ.get('WINE_FIT_CACHE_MB', 1024)) * 1024 * 1024
+
+# Parameters that change how fast a fit runs but not what it learns
+RUNTIME_PARAMS = {'n_jobs', 'nthread', 'verbose', 'verbosity'}
+
+# Relative fit cost, used to hand out cores and to start the slowest fits first
+FIT_COST = {
+    'RandomForestClassifier': 8,
+    'XGBClassifier': 8,
+    'LogisticRegression': 2,
+    'DecisionTreeClassifier': 2,
+    'KNeighborsClassifier': 1,
+    'IndexedKNN': 1,
+    'GaussianNB': 1,
+}
+# A grade model (model/grades.py) runs about one base fit per cut-off when ordinal.
+# Multi-class, these estimators also cost about one fit per grade, and the rest about
+# one fit in all. The prepared data has seven grades.
+GRADE_FITS = 6
+MULTICLASS_PER_GRADE = {'XGBClassifier', 'LogisticRegression'}
+
+
+def fit_cost(estimator):
+    """Relative fit cost from FIT_COST; a grade model costs its base estimator's times the fits it runs."""
+    if isinstance(estimator, GradeModel):
+        base = estimator.estimator
+        per_grade = estimator.method == 'ordinal' or type(base).__name__ in MULTICLASS_PER_GRADE
+        return fit_cost(base) * (GRADE_FITS if per_grade else 1)
+    return FIT_COST.get(type(estimator).__name__, 1)
+
+
+def fingerprint_data(X, y):
+    """Content hash of the training data."""
+    digest = hashlib.sha256()
+    for part in (X, y):
+        array = np.ascontiguousarray(np.asarray(part))
+        digest.update(str((array.shape, array.dtype.str)).encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def _class_spec(cls):
+    """Module and name of an estimator class; classes of this repository also hash their source file."""
+    spec = f"{cls.__module__}.{cls.__qualname__}"
+    # Their fit logic changes without a library version bump
+    if cls.__module__.split('.')[0] == 'model':
+        spec += f"@{file_sha256(inspect.getfile(cls))}"
+    return spec
+
+
+def _param_spec(value):
+    # A nested estimator's own parameters are listed separately by get_params(deep=True)
+    if hasattr(value, 'get_params'):
+        return _class_spec(type(value))
+    if isinstance(value, np.ndarray):
+        digest = hashlib.sha256(np.ascontiguousarray(value).tobytes()).hexdigest()
+        return f"ndarray {value.dtype} {value.shape} {digest}"
+    return repr(value)
+
+
+def fingerprint_model(estimator):
+    """Hash of estimator class, learning hyperparameters (nested ones included) and library versions."""
+    params = {
+        k: v for k, v in estimator.get_params(deep=True).items()
+        if k.rsplit('__', 1)[-1] not in RUNTIME_PARAMS
+    }
+    # FusedModel reports its inner estimator's parameters but not the estimator itself
+    inner = getattr(estimator, 'estimator', None)
+    spec = repr((
+        _class_spec(type(estimator)),
+        None if inner is None else _class_spec(type(inner)),
+        sorted((k, _param_spec(v)) for k, v in params.items()),
+        sklearn.__version__,
+        xgboost.__version__,
+    ))
+    return hashlib.sha256(spec.encode()).hexdigest()
+
+
+def n_jobs_param(estimator):
+    """The parameter setting an estimator's cores ('estimator__n_jobs' for a grade model), or None."""
+    params = estimator.get_params(deep=True)
+    for name in ('n_jobs', 'estimator__n_jobs'):
+        if name in params:
+            return name
+    return None
+
+
+def supports_n_jobs(estimator):
+    return n_jobs_param(estimator) is not None
+
+
+def core_budget(models, total_cores=None):
+    """
+    Split the available cores between jobs in proportion to their fit cost.
+
+    Single-threaded estimators always get one core; the rest of the machine is
+    shared by the estimators that can use ``n_jobs``.
+    """
+    total_cores = total_cores or os.cpu_count() or 1
+    budget = {name: 1 for name in models}
+    parallel = [name for name, est in models.items() if supports_n_jobs(est)]
+    spare = max(0, total_cores - len(models))
+    weights = {name: fit_cost(models[name]) for name in parallel}
+
+    for name in parallel:
+        budget[name] += int(spare * weights[name] / sum(weights.values()))
+    return budget
+
+
+def set_n_jobs(estimator, n_jobs):
+    """Set the cores of an estimator that supports n_jobs, including a fitted grade model's clones."""
+    param = n_jobs_param(estimator)
+    if param is not None:
+        estimator.set_params(**{param: n_jobs})
+    if isinstance(estimator, GradeModel):
+        for fitted in getattr(estimator, 'estimators_', []):
+            set_n_jobs(fitted, n_jobs)
+
+
+def _fit(name, estimator, X, y, n_jobs):
+    set_n_jobs(estimator, n_jobs)
+    started = time.perf_counter()
+    estimator.fit(X, y)
+    return name, estimator, time.perf_counter() - started
+
+
+class FitResult:
+    def __init__(self, model, fit_seconds, cached):
+        self.model = model
+        self.fit_seconds = fit_seconds
+        self.cached = cached
+
+
+def fit_models(models, X, y, max_workers=None, cache_dir=CACHE_DIR, use_cache=True, log=print,
+               max_cache_bytes=DEFAULT_CACHE_MAX_BYTES):
+    """
+    Fit every estimator in ``models`` and return {name: FitResult} in input order.
+
+    Fits whose data and hyperparameters match a cached fit are loaded from
+    ``cache_dir``; the rest run concurrently, slowest first, each with its
+    share of the machine's cores. The cache is then trimmed to ``max_cache_bytes``.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    data_key = fingerprint_data(X, y)
+    keys = {
+        name: hashlib.sha256((data_key + fingerprint_model(est)).encode()).hexdigest()[:32]
+        for name, est in models.items()
+    }
+
+    results = {}
+    pending = {}
+    for name, estimator in models.items():
+        path = os.path.join(cache_dir, f"{keys[name]}.pkl")
+        if use_cache and os.path.exists(path):
+            cached = joblib.load(path)
+            os.utime(path)
+            results[name] = FitResult(cached['model'], cached['fit_seconds'], cached=True)
+            log(f"   ♻️  {name}: reusing cached fit ({keys[name][:12]})")
+        else:
+            pending[name] = estimator
+
+    if pending:
+        budget = core_budget(pending)
+        order = sorted(pending, key=lambda n: -fit_cost(pending[n]))
+        max_workers = max_workers or min(len(pending), os.cpu_count() or 1)
+
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = [
+                pool.submit(_fit, name, pending[name], X, y, budget[name])
+                for name in order
+            ]
+            for future in as_completed(futures):
+                name, model, seconds = future.result()
+                # Restore the configured n_jobs so the saved model matches the definition
+                if supports_n_jobs(model):
+                    set_n_jobs(model, pending[name].get_params()[n_jobs_param(model)])
+                # Write then rename, so an interrupted run never leaves a partial cache entry
+                path = os.path.join(cache_dir, f"{keys[name]}.pkl")
+                joblib.dump({'model': model, 'fit_seconds': seconds}, path + '.tmp')
+                os.replace(path + '.tmp', path)
+                results[name] = FitResult(model, seconds, cached=False)
+                log(f"   ✅ {name}: fitted in {seconds:.2f}s on {budget[name]} core(s)")
+
+    evict(cache_dir, max_cache_bytes, keep={f"{key}.pkl" for key in keys.values()})
+    return {name: results[name] for name in models}
+
+
+def evict(cache_dir, max_bytes, keep=()):
+    """Remove the least recently used .pkl entries of ``cache_dir`` until it fits ``max_bytes``, sparing ``keep``."""
+    entries = sorted(
+        (os.path.getmtime(os.path.join(cache_dir, entry)), os.path.getsize(os.path.join(cache_dir, entry)), entry)
+        for entry in os.listdir(cache_dir) if entry.endswith('.pkl')
+    )
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, entry in entries:
+        if total <= max_bytes:
+            break
+        if entry in keep:
+            continue
+        os.remove(os.path.join(cache_dir, entry))
+        total -= size
+        removed += 1
+    return removed
+
+
+def clear_cache(cache_dir=CACHE_DIR):
+    if os.path.isdir(cache_dir):
+        for entry in os.listdir(cache_dir):
+            if entry.endswith('.pkl'):
+                os.remove(os.path.join(cache_dir, entry))
@@ -0,0 +1,135 @@
+"""
+Wine Quality Classification - Prediction Cache
+Content-addressed disk cache of scored uploads, bounded in size and evicted least recently used first
+"""
+
+import hashlib
+import os
+import shutil
+import threading
+import uuid
+
+import joblib
+
+CACHE_DIR = os.path.join('model', '.cache', 'predictions')
+DEFAULT_MAX_BYTES = int(os.environ.get('WINE_PREDICTION_CACHE_MB', 256)) * 1024 * 1024
+# Bump when the scoring output or ScoringSummary layout changes
+CACHE_FORMAT = 5
+
+OUTPUT_FILE = 'predictions.csv'
+SUMMARY_FILE = 'summary.pkl'
+
+
+def cache_key(data, *parts):
+    """
+    Key for scoring ``data`` (the uploaded bytes) with a given model.
+
+    ``parts`` identify everything else that changes the output: the model and
+    scaler artifact checksums and any inference-time setting (e.g. kNN mode).
+    """
+    digest = hashlib.sha256()
+    digest.update(f"format={CACHE_FORMAT}".encode())
+    for part in parts:
+        digest.update(b'\0' + str(part).encode())
+    digest.update(b'\0')
+    digest.update(data)
+    return digest.hexdigest()[:40]
+
+
+class PredictionCache:
+    """
+    One directory per key holding the scored CSV and the pickled ScoringSummary.
+
+    Entries are written to a temporary directory and renamed into place, so a
+    reader never sees a half-written entry. A hit refreshes the entry's mtime;
+    once the cache exceeds ``max_bytes`` the entries with the oldest mtime are
+    removed. Entries larger than the whole budget are not stored.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key):
+        """(summary, path of the scored CSV), or None on a miss."""
+        path = self._path(key)
+        try:
+            summary = joblib.load(os.path.join(path, SUMMARY_FILE))
+            os.utime(path)
+        except (OSError, EOFError, ValueError):
+            return None
+        return summary, os.path.join(path, OUTPUT_FILE)
+
+    def put(self, key, summary, output):
+        """
+        Store ``summary`` and the scored CSV in ``output`` (a path or a readable file object).
+
+        Returns the path of the stored CSV, or None when the entry exceeds the budget.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        staging = self._path(f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(staging)
+        try:
+            target = os.path.join(staging, OUTPUT_FILE)
+            if isinstance(output, (str, os.PathLike)):
+                shutil.copyfile(output, target)
+            else:
+                output.seek(0)
+                with open(target, 'w', newline='') as f:
+                    shutil.copyfileobj(output, f)
+                output.seek(0)
+            joblib.dump(summary, os.path.join(staging, SUMMARY_FILE))
+
+            if _dir_bytes(staging) > self.max_bytes:
+                return None
+            with self._lock:
+                final = self._path(key)
+                if os.path.exists(final):
+                    shutil.rmtree(final, ignore_errors=True)
+                os.replace(staging, final)
+                self.evict()
+            return os.path.join(final, OUTPUT_FILE)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def entries(self):
+        """(mtime, bytes, path) of every stored entry, oldest first."""
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = self._path(name)
+            if name.startswith('.tmp-') or not os.path.isdir(path):
+                continue
+            try:
+                entries.append((os.path.getmtime(path), _dir_bytes(path), path))
+            except OSError:
+                continue
+        return sorted(entries)
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits ``max_bytes``."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+def _dir_bytes(path):
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
@@ -1,66 +1,223 @@
 """
 Wine Quality Dataset Preparation
 Combines red and white wine datasets and prepares for binary classification
+
+Usage:
+    python model/prepare_wine_data.py                                  # full rebuild
+    python model/prepare_wine_data.py --append batch.csv --wine-type red  # add a new lab batch
+    python model/prepare_wine_data.py --timings                        # where the time went
 """
 
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
 import pandas as pd
 import numpy as np
 
-# Load both datasets
-red_wine = pd.read_csv('data/winequality-red.csv', sep=';')
-white_wine = pd.read_csv('data/winequality-white.csv', sep=';')
+# Allow `python model/prepare_wine_data.py` from the repository root to import the model package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model.dataset import (
+    PREPARED_CSV, CACHE_DIR, FEATURE_COLUMNS, GOOD_QUALITY_MIN, GRADE_COLUMN, SCHEMA, WINE_TYPE_CODES,
+    write_cache, append_rows
+)
+from model.artifacts import file_sha256
+from model.data_profile import PROFILE_PATH, build_profile, update_profile, write_profile, load_profile
+from model import tracing
+from model.tracing import span
+
+RAW_FILES = {
+    'red': 'data/winequality-red.csv',
+    'white': 'data/winequality-white.csv'
+}
+MANIFEST_PATH = 'data/ingest_manifest.json'
+
+
+def to_binary(df):
+    """
+    Derive the binary target: quality >= GOOD_QUALITY_MIN (7) is 'good' (1), otherwise 'not good' (0).
+
+    The raw score is kept as the last column, ``grade``, for the grade models.
+    """
+    df = df.copy()
+    df['quality_binary'] = (df['quality'] >= GOOD_QUALITY_MIN).astype(int)
+    df[GRADE_COLUMN] = df['quality']
+    df = df.drop('quality', axis=1)
+    return df.rename(columns={'quality_binary': 'quality'})[SCHEMA.names]
+
+
+def load_manifest():
+    if os.path.exists(MANIFEST_PATH):
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    return {'batches': []}
+
+
+def save_manifest(manifest):
+    with open(MANIFEST_PATH + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=4)
+    os.replace(MANIFEST_PATH + '.tmp', MANIFEST_PATH)
+
+
+def manifest_entry(path, wine_type, rows):
+    return {
+        'file': path,
+        'sha256': file_sha256(path),
+        'wine_type': wine_type,
+        'rows': int(rows),
+        'ingested_at': datetime.now(timezone.utc).isoformat(timespec='seconds')
+    }
+
+
+def prepare_full():
+    # Load both datasets
+    with span('load csv', files=2):
+        red_wine = pd.read_csv(RAW_FILES['red'], sep=';')
+        white_wine = pd.read_csv(RAW_FILES['white'], sep=';')
+
+    # Add wine type column
+    red_wine['wine_type'] = WINE_TYPE_CODES['red']  # Red wine
+    white_wine['wine_type'] = WINE_TYPE_CODES['white']  # White wine
+
+    # Combine datasets
+    df = pd.concat([red_wine, white_wine], axis=0, ignore_index=True)
+
+    print("=" * 60)
+    print("WINE QUALITY DATASET PREPARATION")
+    print("=" * 60)
+    print(f"\nRed Wine samples: {len(red_wine)}")
+    print(f"White Wine samples: {len(white_wine)}")
+    print(f"Total samples: {len(df)}")
+    print(f"Total features: {len(FEATURE_COLUMNS)}")
+
+    print("\nColumn names:")
+    print(df.columns.tolist())
+
+    print("\nDataset Info:")
+    print(df.info())
+
+    print("\nFirst 5 rows:")
+    print(df.head())
+
+    print("\nQuality Distribution (Original):")
+    print(df['quality'].value_counts().sort_index())
+
+    # Convert to binary classification
+    df_binary = to_binary(df)
+
+    print("\nBinary Quality Distribution:")
+    print(df_binary['quality'].value_counts())
+    print(f"Good wine (quality >= 7): {df_binary['quality'].sum()}")
+    print(f"Not good wine (quality < 7): {len(df_binary) - df_binary['quality'].sum()}")
+
+    print("\nFinal Dataset Shape:", df_binary.shape)
+    print("Features:", FEATURE_COLUMNS)
+
+    # Check for missing values
+    print("\nMissing Values:")
+    print(df_binary.isnull().sum().sum(), "missing values found")
+
+    # Save prepared dataset
+    with span('write csv', rows=len(df_binary)):
+        df_binary.to_csv(PREPARED_CSV, index=False)
+    print(f"\n✅ Prepared dataset saved to: {PREPARED_CSV}")
+
+    # Save typed columnar cache so training and the app skip CSV parsing
+    with span('write arrow cache'):
+        write_cache(df_binary, PREPARED_CSV)
+    print(f"✅ Arrow cache saved to: {CACHE_DIR}")
+
+    # Statistics profile for the About Dataset page (describe, correlations, histograms)
+    with span('build profile'):
+        write_profile(build_profile(df_binary), PREPARED_CSV)
+    print(f"✅ Statistics profile saved to: {PROFILE_PATH}")
+
+    # A full rebuild starts a fresh ingest history from the raw source files
+    save_manifest({'batches': [
+        manifest_entry(RAW_FILES['red'], 'red', len(red_wine)),
+        manifest_entry(RAW_FILES['white'], 'white', len(white_wine))
+    ]})
+    print(f"✅ Ingest manifest saved to: {MANIFEST_PATH}")
+
+    print(f"✅ Total Features: {len(FEATURE_COLUMNS)}")
+    print(f"✅ Total Instances: {len(df_binary)}")
+    print(f"✅ Classification Type: Binary (Good/Not Good Wine), raw grade kept in '{GRADE_COLUMN}'")
+    print("=" * 60)
 
-# Add wine type column
-red_wine['wine_type'] = 1  # Red wine
-white_wine['wine_type'] = 0  # White wine
 
-# Combine datasets
-df = pd.concat([red_wine, white_wine], axis=0, ignore_index=True)
+def append_batch(path, wine_type, sep=';'):
+    """Ingest one new lab batch; work is proportional to the batch, not the history."""
+    print("=" * 60)
+    print("WINE QUALITY DATASET - INCREMENTAL INGEST")
+    print("=" * 60)
 
-print("=" * 60)
-print("WINE QUALITY DATASET PREPARATION")
-print("=" * 60)
-print(f"\nRed Wine samples: {len(red_wine)}")
-print(f"White Wine samples: {len(white_wine)}")
-print(f"Total samples: {len(df)}")
-print(f"Total features: {len(df.columns) - 1}")  # Excluding target
+    manifest = load_manifest()
+    digest = file_sha256(path)
+    for entry in manifest['batches']:
+        if entry['sha256'] == digest:
+            print(f"⏭️  {path} already ingested on {entry['ingested_at']} ({entry['rows']} rows), skipping")
+            print("=" * 60)
+            return 0
 
-print("\nColumn names:")
-print(df.columns.tolist())
+    with span('load csv', files=1):
+        batch = pd.read_csv(path, sep=sep)
+    batch['wine_type'] = WINE_TYPE_CODES[wine_type]
+    batch_binary = to_binary(batch)
 
-print("\nDataset Info:")
-print(df.info())
+    missing = batch_binary.isnull().sum().sum()
+    if missing:
+        raise ValueError(f"{path} has {missing} missing values; fix the batch before ingesting")
 
-print("\nFirst 5 rows:")
-print(df.head())
+    print(f"\n{wine_type.title()} wine batch: {len(batch_binary)} samples")
+    print(f"Good wine (quality >= 7): {batch_binary['quality'].sum()}")
+    print(f"Not good wine (quality < 7): {len(batch_binary) - batch_binary['quality'].sum()}")
 
-print("\nQuality Distribution (Original):")
-print(df['quality'].value_counts().sort_index())
+    profile = load_profile(PREPARED_CSV)
+    with span('append rows', rows=len(batch_binary)):
+        cache_updated = append_rows(batch_binary, PREPARED_CSV)
+    print(f"\n✅ Appended {len(batch_binary)} rows to: {PREPARED_CSV}")
+    if cache_updated:
+        print(f"✅ Arrow cache extended with a new part: {CACHE_DIR}")
+    else:
+        print("⚠️  Arrow cache was stale; it will be rebuilt on next load")
+    if profile is not None:
+        with span('update profile'):
+            write_profile(update_profile(profile, batch_binary), PREPARED_CSV)
+        print(f"✅ Statistics profile updated with the batch: {PROFILE_PATH}")
+    else:
+        print("⚠️  Statistics profile was missing or stale; rebuild it with `python model/data_profile.py`")
 
-# Convert to binary classification
-# Quality >= 7 is considered 'good' (1), otherwise 'not good' (0)
-df['quality_binary'] = (df['quality'] >= 7).astype(int)
+    entry = manifest_entry(path, wine_type, len(batch_binary))
+    manifest['batches'].append(entry)
+    save_manifest(manifest)
+    total = sum(b['rows'] for b in manifest['batches'])
+    print(f"✅ Manifest updated: {len(manifest['batches'])} batches, {total} rows ingested")
+    print("=" * 60)
+    return len(batch_binary)
 
-print("\nBinary Quality Distribution:")
-print(df['quality_binary'].value_counts())
-print(f"Good wine (quality >= 7): {df['quality_binary'].sum()}")
-print(f"Not good wine (quality < 7): {len(df) - df['quality_binary'].sum()}")
 
-# Remove original quality column and use binary target
-df_binary = df.drop('quality', axis=1)
-df_binary = df_binary.rename(columns={'quality_binary': 'quality'})
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prepare the wine quality dataset.")
+    parser.add_argument('--append', metavar='CSV',
+                        help="Ingest a new raw batch instead of rebuilding from the source files")
+    parser.add_argument('--wine-type', choices=sorted(WINE_TYPE_CODES),
+                        help="Wine type of the appended batch (required with --append)")
+    parser.add_argument('--sep', default=';',
+                        help="Field separator of the appended batch (default: %(default)r)")
+    tracing.add_arguments(parser)
+    args = parser.parse_args(argv)
 
-print("\nFinal Dataset Shape:", df_binary.shape)
-print("Features:", [col for col in df_binary.columns if col != 'quality'])
+    if args.append and not args.wine_type:
+        parser.error("--wine-type is required with --append")
+    with tracing.session(args, label='prepare_wine_data'):
+        if args.append:
+            append_batch(args.append, args.wine_type, args.sep)
+        else:
+            prepare_full()
 
-# Check for missing values
-print("\nMissing Values:")
-print(df_binary.isnull().sum().sum(), "missing values found")
 
-# Save prepared dataset
-df_binary.to_csv('data/wine_quality_prepared.csv', index=False)
-print("\n✅ Prepared dataset saved to: data/wine_quality_prepared.csv")
-print(f"✅ Total Features: {len(df_binary.columns) - 1}")
-print(f"✅ Total Instances: {len(df_binary)}")
-print(f"✅ Classification Type: Binary (Good/Not Good Wine)")
-print("=" * 60)
+if __name__ == '__main__':
+    main()
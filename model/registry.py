@@ -0,0 +1,282 @@
+"""
+Wine Quality Classification - Model Registry
+Manifest of trained artifacts, lazy loading and an LRU memory budget for loaded models
+
+Usage:
+    python model/registry.py             # validate artifacts against the manifest
+    python model/registry.py --rebuild   # rewrite the manifest from the files in model/
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import joblib
+
+# Allow `python model/registry.py` from the repository root to import the model package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model.artifacts import (
+    MODEL_DIR,
+    MODEL_NAMES,
+    GRADE_MODEL_NAMES,
+    SCALER_PATH,
+    model_path,
+    fused_path,
+    compiled_path,
+    compact_path,
+    file_sha256
+)
+from model import compact
+from model.compiled import CompiledTrees
+
+MANIFEST_PATH = os.path.join(MODEL_DIR, 'manifest.json')
+DEFAULT_MEMORY_BUDGET = int(os.environ.get('WINE_MODEL_MEMORY_MB', 512)) * 1024 * 1024
+
+# Artifact variants per model, in load preference order; compact artifacts
+# only exist after an explicit `python model/compact.py` export
+VARIANTS = {
+    'compact': compact_path,
+    'compiled': compiled_path,
+    'fused': fused_path,
+    'model': model_path
+}
+# Only lossless compact artifacts are preferred automatically: quantized ones
+# (compact.py --bits 16/8) drift from the exact model that results.json and
+# thresholds.json describe, so they load only when asked for by variant
+LOSSLESS_BITS = 32
+
+
+def _entry(path, variant=None):
+    entry = {'file': path.replace(os.sep, '/'), 'bytes': os.path.getsize(path), 'sha256': file_sha256(path)}
+    if variant == 'compact':
+        entry['bits'] = compact.read_meta(path)['bits']
+    return entry
+
+
+def build_manifest(model_names=MODEL_NAMES + GRADE_MODEL_NAMES):
+    """Describe every artifact currently on disk; models without any artifact are left out."""
+    models = {}
+    for name in model_names:
+        files = {variant: _entry(path(name), variant)
+                 for variant, path in VARIANTS.items() if os.path.exists(path(name))}
+        if files:
+            models[name] = files
+    return {
+        'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'scaler': _entry(SCALER_PATH) if os.path.exists(SCALER_PATH) else None,
+        'models': models
+    }
+
+
+def write_manifest(manifest=None, path=MANIFEST_PATH):
+    manifest = manifest or build_manifest()
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=4)
+    os.replace(path + '.tmp', path)
+    return manifest
+
+
+def read_manifest(path=MANIFEST_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _manifest_stamp(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _loaded_checksum(manifest, key):
+    """Manifest SHA-256 of a loaded artifact's key ((name, variant) or ('scaler', 'scaler'))."""
+    name, variant = key
+    entry = manifest.get('scaler') if key == ('scaler', 'scaler') else manifest['models'].get(name, {}).get(variant)
+    return (entry or {}).get('sha256')
+
+
+class ModelRegistry:
+    """
+    Loads model artifacts listed in the manifest on first use and keeps them under a memory budget.
+
+    Loaded artifacts are charged their on-disk size (a close proxy for the
+    NumPy-backed objects they contain) and evicted least recently used first
+    once the total exceeds ``memory_budget``. The artifact just requested is
+    never evicted, so a single model larger than the budget still loads.
+    The manifest is re-read when the file changes (a retrain rewrites it),
+    and loaded artifacts whose checksum changed are dropped.
+    Safe to share between threads (Streamlit sessions, service handlers).
+    """
+
+    def __init__(self, manifest_path=MANIFEST_PATH, memory_budget=DEFAULT_MEMORY_BUDGET, verify=True):
+        self.manifest_path = manifest_path
+        self.memory_budget = memory_budget
+        self.verify = verify
+        self._stamp = _manifest_stamp(manifest_path)
+        self.manifest = read_manifest(manifest_path)
+        self.from_disk = self.manifest is None
+        if self.from_disk:
+            self.manifest = build_manifest()
+        self._loaded = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_used = 0
+        self.evictions = 0
+
+    def refresh(self):
+        """Re-read the manifest if its file changed since it was read; True when it was reloaded."""
+        stamp = _manifest_stamp(self.manifest_path)
+        if stamp is None or stamp == self._stamp:
+            return False
+        manifest = read_manifest(self.manifest_path)
+        if manifest is None:
+            return False
+        with self._lock:
+            for key in list(self._loaded):
+                if _loaded_checksum(manifest, key) != _loaded_checksum(self.manifest, key):
+                    _, size = self._loaded.pop(key)
+                    self.memory_used -= size
+            self.manifest, self._stamp, self.from_disk = manifest, stamp, False
+        return True
+
+    def available(self, names=MODEL_NAMES):
+        """Those of ``names`` (default: the binary models) with at least one artifact present, in display order."""
+        self.refresh()
+        return [name for name in names
+                if any(os.path.exists(e['file']) for e in self.manifest['models'].get(name, {}).values())]
+
+    def validate(self):
+        """Return human-readable problems: missing models, missing or modified files."""
+        self.refresh()
+        problems = []
+        if self.from_disk:
+            problems.append(f"{self.manifest_path} not found; using the artifacts present in {MODEL_DIR}/")
+        entries = [('Scaler', self.manifest.get('scaler'))]
+        for name in MODEL_NAMES:
+            files = self.manifest['models'].get(name)
+            if not files:
+                problems.append(f"{name}: no trained artifact (expected {model_path(name)})")
+                continue
+            entries += [(f"{name} ({variant})", entry) for variant, entry in files.items()]
+        # Grade models are optional (train_models.py --grades none); only check the ones recorded
+        for name in GRADE_MODEL_NAMES:
+            entries += [(f"{name} ({variant})", entry)
+                        for variant, entry in self.manifest['models'].get(name, {}).items()]
+
+        for label, entry in entries:
+            if entry is None:
+                problems.append(f"{label}: not in manifest")
+            elif not os.path.exists(entry['file']):
+                problems.append(f"{label}: {entry['file']} is missing")
+            elif os.path.getsize(entry['file']) != entry['bytes']:
+                problems.append(f"{label}: {entry['file']} size differs from the manifest")
+        return problems
+
+    def _resolve(self, name, compiled, variant=None):
+        self.refresh()
+        files = self.manifest['models'].get(name, {})
+        candidates = [variant] if variant else [v for v in VARIANTS if v != 'compiled' or compiled]
+        for candidate in candidates:
+            if candidate == 'compact' and not variant and files.get(candidate, {}).get('bits') != LOSSLESS_BITS:
+                continue
+            if candidate in files and os.path.exists(files[candidate]['file']):
+                return candidate, files[candidate]
+        raise FileNotFoundError(f"No {variant + ' ' if variant else ''}artifact for model {name!r}; "
+                                f"run model/train_models.py first")
+
+    def _load(self, key, entry, loader):
+        with self._lock:
+            if key in self._loaded:
+                self._loaded.move_to_end(key)
+                return self._loaded[key][0]
+
+        if self.verify and file_sha256(entry['file']) != entry['sha256']:
+            raise ValueError(f"{entry['file']} does not match its manifest checksum; "
+                             f"retrain or run `python model/registry.py --rebuild`")
+        obj = loader(entry['file'])
+
+        with self._lock:
+            if key not in self._loaded:
+                self._loaded[key] = (obj, entry['bytes'])
+                self.memory_used += entry['bytes']
+            self._loaded.move_to_end(key)
+            while self.memory_used > self.memory_budget and len(self._loaded) > 1:
+                _, (_, size) = self._loaded.popitem(last=False)
+                self.memory_used -= size
+                self.evictions += 1
+            return self._loaded[key][0]
+
+    def get(self, name, compiled=False, variant=None):
+        """
+        Inference model for ``name``: lossless compact > compiled (if requested) > fused > plain artifact.
+
+        ``variant`` (a key of VARIANTS) loads that artifact instead, e.g. 'model'
+        for the plain estimator on scaled features (see model/explain.py).
+        """
+        variant, entry = self._resolve(name, compiled, variant)
+        loader = {'compact': compact.load, 'compiled': CompiledTrees.load}.get(variant, joblib.load)
+        return self._load((name, variant), entry, loader)
+
+    def checksum(self, name, compiled=False, variant=None):
+        """Manifest SHA-256 of the artifact ``get(name, compiled, variant)`` loads (identifies the model version)."""
+        return self._resolve(name, compiled, variant)[1]['sha256']
+
+    def scaler_checksum(self):
+        self.refresh()
+        return (self.manifest.get('scaler') or {}).get('sha256')
+
+    def scaler(self):
+        self.refresh()
+        entry = self.manifest.get('scaler')
+        if entry is None or not os.path.exists(entry['file']):
+            raise FileNotFoundError(f"Scaler not found ({SCALER_PATH}); run model/train_models.py first")
+        return self._load(('scaler', 'scaler'), entry, joblib.load)
+
+    def pipeline(self, name, compiled=False):
+        """Return (model, scaler); scaler is None when the model has the scaling folded in."""
+        model = self.get(name, compiled)
+        return model, None if getattr(model, 'scaler_folded', False) else self.scaler()
+
+    def loaded(self):
+        """Currently loaded artifacts, least recently used first, with their charged bytes."""
+        with self._lock:
+            return [(key, size) for key, (_, size) in self._loaded.items()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate or rebuild the model artifact manifest.")
+    parser.add_argument('--rebuild', action='store_true',
+                        help="Rewrite the manifest from the artifacts currently in model/")
+    args = parser.parse_args(argv)
+
+    print("=" * 60)
+    print("WINE QUALITY CLASSIFICATION - MODEL REGISTRY")
+    print("=" * 60)
+
+    if args.rebuild:
+        write_manifest()
+        print(f"✅ Manifest written to {MANIFEST_PATH}")
+
+    registry = ModelRegistry()
+    for name, files in registry.manifest['models'].items():
+        for variant, entry in files.items():
+            print(f"   📦 {name:20s} {variant:9s} {entry['bytes'] / 1e6:8.2f} MB  {entry['file']}")
+
+    problems = registry.validate()
+    for problem in problems:
+        print(f"   ⚠️  {problem}")
+    print(f"{'❌' if problems else '✅'} {len(problems)} problem(s) found")
+    print("=" * 60)
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
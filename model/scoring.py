@@ -0,0 +1,421 @@
+"""
+Wine Quality Classification - Batch Scoring Engine
+Streams CSV files through the scaler and a trained model in fixed-size chunks
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from model.dataset import FEATURE_COLUMNS, GOOD_QUALITY_MIN, GRADE_COLUMN, TARGET_COLUMN
+from model.explain import CONTRIBUTION_COLUMNS, ContributionSummary, top_reasons
+# Re-exported under their original names for app.py and score.py
+from model.metrics import (
+    GRADE_LEVELS,
+    MetricsAccumulator,
+    grade_confusion,
+    grade_metrics,
+    report as report_from_confusion,
+    threshold_metrics as metrics_from_confusion
+)
+from model.tracing import iter_spans, span
+
+CLASS_NAMES = np.array(['Not Good', 'Good'], dtype=object)
+# Columns score_csv appends to the input; grade models add the GRADE_OUTPUT_COLUMNS after them
+OUTPUT_COLUMNS = ['Predicted_Quality', 'Confidence']
+GRADE_OUTPUT_COLUMNS = ['Predicted_Grade', 'Expected_Grade']
+
+# Rows per chunk: large enough to amortise the per-call overhead of
+# scaler/model, small enough that a chunk stays a few MB in memory
+DEFAULT_CHUNK_SIZE = 50_000
+PREVIEW_ROWS = 1_000
+
+
+def read_chunks(source, chunk_size=DEFAULT_CHUNK_SIZE, names=None):
+    """
+    Iterate over a CSV path or buffer as DataFrames of at most chunk_size rows.
+
+    Pass ``names`` to read a headerless slice of a larger file (see score.py).
+    """
+    if names is not None:
+        return pd.read_csv(source, chunksize=chunk_size, header=None, names=names)
+    return pd.read_csv(source, chunksize=chunk_size)
+
+
+def split_target(chunk):
+    """
+    Split a chunk into (features, 0/1 target); target is None when absent. A grade column is dropped too.
+
+    Raw 0-10 quality scores in the target column (detected as in split_grades)
+    map to Good at GOOD_QUALITY_MIN and above, as the validator does.
+    """
+    X = chunk.drop(columns=[c for c in (TARGET_COLUMN, GRADE_COLUMN) if c in chunk.columns])
+    if TARGET_COLUMN not in chunk.columns:
+        return X, None
+    y = chunk[TARGET_COLUMN].to_numpy(dtype=np.int64)
+    if (y > 1).any():
+        y = (y >= GOOD_QUALITY_MIN).astype(np.int64)
+    return X, y
+
+
+def split_grades(chunk):
+    """True grades of a chunk: the grade column, else raw 0-10 scores in the target column; None otherwise."""
+    if GRADE_COLUMN in chunk.columns:
+        return chunk[GRADE_COLUMN].to_numpy(dtype=np.int64)
+    if TARGET_COLUMN in chunk.columns and (chunk[TARGET_COLUMN] > 1).any():
+        return chunk[TARGET_COLUMN].to_numpy(dtype=np.int64)
+    return None
+
+
+def _scale(scaler, X):
+    if scaler is None:
+        return X
+    with span('scale', rows=len(X)):
+        return scaler.transform(X)
+
+
+def _decide(proba, classes, threshold):
+    """(labels, confidence) from class probabilities; see score_chunk for ``threshold``."""
+    if threshold is None:
+        codes = np.argmax(proba, axis=1)
+    else:
+        codes = (proba[:, 1] >= threshold).astype(np.int64)
+    return classes.take(codes), np.take_along_axis(proba, codes[:, None], axis=1)[:, 0]
+
+
+def score_chunk(model, scaler, X, threshold=None):
+    """
+    Return (labels, confidence) for one feature chunk using a single model pass.
+
+    ``scaler`` is None for fused models, which take raw features directly.
+    With a ``threshold``, rows are 'Good' once P(Good) reaches it instead of
+    taking the most probable class; confidence is the probability of the
+    predicted label either way.
+    """
+    X_scaled = _scale(scaler, X)
+
+    if hasattr(model, 'predict_proba'):
+        with span('predict', rows=len(X)):
+            proba = model.predict_proba(X_scaled)
+        labels, confidence = _decide(proba, model.classes_, threshold)
+    else:
+        with span('predict', rows=len(X)):
+            labels = model.predict(X_scaled)
+        confidence = np.ones(len(labels))
+
+    return labels, confidence
+
+
+def score_grade_chunk(model, scaler, X, threshold=None):
+    """
+    Return (labels, confidence, grade, expected_grade) for one chunk from a grade model (model/grades.py).
+
+    The grade probabilities are computed once; the Good/Not Good label and its
+    confidence come from P(Good), their mass on grades >= 7, exactly as in
+    score_chunk. ``grade`` is the most likely grade and ``expected_grade`` the
+    probability-weighted mean grade. Near the boundary the most likely grade
+    can fall on the other side of 7 from the label.
+    """
+    X_scaled = _scale(scaler, X)
+    with span('predict', rows=len(X)):
+        grade_proba = model.predict_grade_proba(X_scaled)
+    good = model.good_proba(grade_proba)
+    labels, confidence = _decide(np.column_stack([1 - good, good]), model.classes_, threshold)
+    return labels, confidence, model.most_likely(grade_proba), model.expected_grade(grade_proba)
+
+
+class ScoringSummary:
+    """Running totals for a scoring pass; memory does not grow with row count."""
+
+    def __init__(self):
+        self.n_rows = 0
+        self.pred_counts = np.zeros(2, dtype=np.int64)
+        self.evaluation = None
+        self.validation = None
+        self.preview = None
+        # Grade models only: predicted grade counts and, with true grades, their confusion matrix
+        self.grade_counts = None
+        self.grade_confusion = None
+        # Explained passes only: per-feature contribution totals (model/explain.py)
+        self.explanations = None
+
+    def update_grades(self, grades, y_grade=None):
+        if self.grade_counts is None:
+            self.grade_counts = np.zeros(GRADE_LEVELS, dtype=np.int64)
+        self.grade_counts += np.bincount(grades, minlength=GRADE_LEVELS)[:GRADE_LEVELS]
+        if y_grade is not None:
+            if self.grade_confusion is None:
+                self.grade_confusion = np.zeros((GRADE_LEVELS, GRADE_LEVELS), dtype=np.int64)
+            self.grade_confusion += grade_confusion(y_grade, grades)
+
+    def update(self, result, labels, y_true, confidence=None):
+        self.n_rows += len(labels)
+        self.pred_counts += np.bincount(labels, minlength=2)[:2]
+
+        if y_true is not None:
+            if self.evaluation is None:
+                self.evaluation = MetricsAccumulator()
+            # P(Good) from the predicted label and its confidence, for AUC
+            score = None if confidence is None else np.where(labels == 1, confidence, 1 - confidence)
+            self.evaluation.update(y_true, labels, score)
+
+        if self.preview is None:
+            self.preview = result.head(PREVIEW_ROWS)
+        elif len(self.preview) < PREVIEW_ROWS:
+            missing = PREVIEW_ROWS - len(self.preview)
+            self.preview = pd.concat([self.preview, result.head(missing)], ignore_index=True)
+
+    def merge(self, other):
+        """Fold in the totals of a summary computed over a later slice of the input."""
+        self.n_rows += other.n_rows
+        self.pred_counts += other.pred_counts
+        if other.evaluation is not None:
+            if self.evaluation is None:
+                self.evaluation = MetricsAccumulator(other.evaluation.bins)
+            self.evaluation.merge(other.evaluation)
+        if other.grade_counts is not None:
+            if self.grade_counts is None:
+                self.grade_counts = np.zeros_like(other.grade_counts)
+            self.grade_counts += other.grade_counts
+        if other.grade_confusion is not None:
+            if self.grade_confusion is None:
+                self.grade_confusion = np.zeros_like(other.grade_confusion)
+            self.grade_confusion += other.grade_confusion
+        if other.explanations is not None:
+            if self.explanations is None:
+                self.explanations = ContributionSummary(other.explanations.units, other.explanations.feature_names)
+            self.explanations.merge(other.explanations)
+        if other.validation is not None:
+            if self.validation is None:
+                self.validation = other.validation
+            else:
+                self.validation.merge(other.validation)
+        if self.preview is None:
+            self.preview = other.preview
+        return self
+
+    @property
+    def has_target(self):
+        return self.evaluation is not None
+
+    @property
+    def confusion(self):
+        return None if self.evaluation is None else self.evaluation.confusion
+
+    def metrics(self):
+        """Accuracy, AUC, precision, recall, F1 and MCC against the target column (None without one)."""
+        return None if self.evaluation is None else self.evaluation.results()
+
+    @property
+    def has_grade_target(self):
+        return self.grade_confusion is not None
+
+    def grade_metrics(self):
+        """Grade accuracy, within-one accuracy, MAE, macro F1 and QWK against the true grades (None without them)."""
+        return None if self.grade_confusion is None else grade_metrics(self.grade_confusion)
+
+
+def prepare_chunk(chunk, validator=None):
+    """(features, target) of a chunk, through ``validator`` (model/validation.py) when given."""
+    if validator is None:
+        return split_target(chunk)
+    with span('validate', rows=len(chunk)):
+        return validator.prepare(chunk)
+
+
+def chunk_grades(chunk, validator=None):
+    """True grades of a chunk (see split_grades), through ``validator`` when given."""
+    return split_grades(chunk) if validator is None else validator.grades(chunk)
+
+
+def explain_chunk(explainer, X, labels):
+    """The EXPLANATION_COLUMNS of a chunk as a DataFrame, plus the raw (rows, features) contributions."""
+    with span('explain', rows=len(X)):
+        contributions, base = explainer.explain(X)
+    explained = pd.DataFrame(contributions, columns=CONTRIBUTION_COLUMNS)
+    explained.insert(0, 'Base_Score', base)
+    explained['Top_Reason'] = top_reasons(contributions, labels, explainer.feature_names)
+    return explained, contributions
+
+
+def score_csv(source, model, scaler, output=None, chunk_size=DEFAULT_CHUNK_SIZE,
+              names=None, write_header=True, threshold=None, validator=None, explainer=None):
+    """
+    Score a CSV chunk by chunk, streaming results to ``output``.
+
+    ``output`` is a path or writable text buffer; the input columns are copied
+    through with ``Predicted_Quality`` and ``Confidence`` appended. Returns a
+    ScoringSummary with prediction counts, a preview of the first rows and,
+    when a ``quality`` column is present, the accumulated evaluation metrics.
+    ``threshold`` is the decision threshold on P(Good) (see score_chunk).
+    A grade model (model/grades.py) also writes ``Predicted_Grade`` and
+    ``Expected_Grade`` from the same evaluation, and is scored on true
+    grades when the input has them (see split_grades).
+    A ``validator`` (model/validation.InputValidator) aligns each chunk to the
+    training features and collects value and drift checks into ``summary.validation``.
+    An ``explainer`` (model/explain.py) appends the EXPLANATION_COLUMNS, why
+    each row got its label, and totals them in ``summary.explanations``.
+    """
+    summary = ScoringSummary()
+    summary.validation = validator
+    grades = hasattr(model, 'predict_grade_proba')
+    header = write_header
+    mode = 'w'
+
+    for chunk in iter_spans('parse csv', read_chunks(source, chunk_size, names)):
+        X, y_true = prepare_chunk(chunk, validator)
+        if grades:
+            labels, confidence, grade, expected = score_grade_chunk(model, scaler, X, threshold)
+        else:
+            labels, confidence = score_chunk(model, scaler, X, threshold)
+        labels = labels.astype(np.int64)
+
+        result = chunk.copy()
+        result['Predicted_Quality'] = CLASS_NAMES.take(labels)
+        result['Confidence'] = confidence
+        if grades:
+            result['Predicted_Grade'] = grade
+            result['Expected_Grade'] = expected
+        if explainer is not None:
+            explained, contributions = explain_chunk(explainer, X, labels)
+            result = pd.concat([result, explained.set_axis(result.index)], axis=1)
+
+        if output is not None:
+            with span('write output', rows=len(result)):
+                result.to_csv(output, mode=mode, header=header, index=False)
+            header = False
+            mode = 'a'
+
+        with span('metrics', rows=len(result)):
+            summary.update(result, labels, y_true, confidence)
+            if grades:
+                summary.update_grades(grade, chunk_grades(chunk, validator))
+            if explainer is not None:
+                if summary.explanations is None:
+                    summary.explanations = ContributionSummary(explainer.units, explainer.feature_names)
+                summary.explanations.update(contributions, labels)
+
+    return summary
+
+
+class ComparisonSummary:
+    """
+    Running totals for scoring one file with several models at once.
+
+    Keeps a ScoringSummary per model plus agreement counts: how often each
+    pair of models predicts the same label, how often each model sides with
+    the majority vote, and how many rows all models agree on.
+    """
+
+    def __init__(self, model_names):
+        self.model_names = list(model_names)
+        self.models = {name: ScoringSummary() for name in self.model_names}
+        n = len(self.model_names)
+        self.n_rows = 0
+        self.pair_agreement = np.zeros((n, n), dtype=np.int64)
+        self.majority_agreement = np.zeros(n, dtype=np.int64)
+        self.unanimous = 0
+        self.validation = None
+        self.preview = None
+
+    def update(self, result, labels, y_true, confidence=None):
+        """``labels`` and ``confidence`` are (rows, models); ``result`` the combined output chunk."""
+        self.n_rows += len(labels)
+        for i, name in enumerate(self.model_names):
+            self.models[name].update(result.iloc[:0], labels[:, i], y_true,
+                                     None if confidence is None else confidence[:, i])
+
+        majority = (labels.sum(axis=1) * 2 > labels.shape[1]).astype(np.int64)
+        self.pair_agreement += (labels[:, :, None] == labels[:, None, :]).sum(axis=0)
+        self.majority_agreement += (labels == majority[:, None]).sum(axis=0)
+        self.unanimous += int((labels.min(axis=1) == labels.max(axis=1)).sum())
+
+        if self.preview is None:
+            self.preview = result.head(PREVIEW_ROWS)
+        elif len(self.preview) < PREVIEW_ROWS:
+            missing = PREVIEW_ROWS - len(self.preview)
+            self.preview = pd.concat([self.preview, result.head(missing)], ignore_index=True)
+
+    @property
+    def has_target(self):
+        return self.models[self.model_names[0]].has_target if self.model_names else False
+
+    def agreement_matrix(self):
+        """Fraction of rows on which each pair of models predicts the same label."""
+        return pd.DataFrame(self.pair_agreement / max(self.n_rows, 1),
+                            index=self.model_names, columns=self.model_names)
+
+    def model_table(self):
+        """Per-model share of 'Good' predictions, agreement with the majority and, with a target, metrics."""
+        rows = {}
+        for i, name in enumerate(self.model_names):
+            summary = self.models[name]
+            row = {
+                'Predicted Good (%)': 100 * summary.pred_counts[1] / max(summary.n_rows, 1),
+                'Agrees with Majority (%)': 100 * self.majority_agreement[i] / max(self.n_rows, 1)
+            }
+            if summary.has_target:
+                row.update(summary.metrics())
+            rows[name] = row
+        return pd.DataFrame(rows).T
+
+
+def score_all(source, models, scaler, output=None, chunk_size=DEFAULT_CHUNK_SIZE, max_workers=None,
+              thresholds=None, validator=None):
+    """
+    Score a CSV with every model in ``models`` ({name: model}) in one pass over the file.
+
+    Each chunk is parsed once and, if any model needs it, scaled once; the
+    shared matrices are then scored by all models concurrently in threads
+    (NumPy, scikit-learn and XGBoost release the GIL in their inner loops).
+    The output has the input columns, ``<model> Prediction`` and
+    ``<model> Confidence`` per model, then ``Votes Good`` and ``Majority``
+    (ties go to 'Not Good'). ``thresholds`` ({name: threshold}) sets each
+    model's decision threshold; models not in it take the most probable class.
+    ``validator`` is as in score_csv. Returns a ComparisonSummary.
+    """
+    names = list(models)
+    thresholds = thresholds or {}
+    summary = ComparisonSummary(names)
+    summary.validation = validator
+    needs_scaling = [not getattr(models[n], 'scaler_folded', False) for n in names]
+    header = True
+    mode = 'w'
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(names)) as pool:
+        for chunk in iter_spans('parse csv', read_chunks(source, chunk_size)):
+            X, y_true = prepare_chunk(chunk, validator)
+            X = X[FEATURE_COLUMNS]
+            X_scaled = None
+            if scaler is not None and any(needs_scaling):
+                with span('scale', rows=len(X)):
+                    X_scaled = scaler.transform(X)
+            inputs = [X_scaled if scale else X for scale in needs_scaling]
+
+            # Per-model spans inside the pool threads are not recorded (no active trace there)
+            with span('predict', rows=len(X), models=len(names)):
+                scored = list(pool.map(lambda args: score_chunk(models[args[0]], None, args[1], thresholds.get(args[0])),
+                                       zip(names, inputs)))
+            labels = np.column_stack([l.astype(np.int64) for l, _ in scored])
+            confidence = np.column_stack([c for _, c in scored])
+
+            result = chunk.copy()
+            for i, name in enumerate(names):
+                result[f'{name} Prediction'] = CLASS_NAMES.take(labels[:, i])
+                result[f'{name} Confidence'] = scored[i][1]
+            votes = labels.sum(axis=1)
+            result['Votes Good'] = votes
+            result['Majority'] = CLASS_NAMES.take((votes * 2 > len(names)).astype(np.int64))
+
+            if output is not None:
+                with span('write output', rows=len(result)):
+                    result.to_csv(output, mode=mode, header=header, index=False)
+                header = False
+                mode = 'a'
+
+            with span('metrics', rows=len(result)):
+                summary.update(result, labels, y_true, confidence)
+
+    return summary
+
@@ -0,0 +1,381 @@
+"""
+Wine Quality Classification - Tracing and Profiling
+Timed spans with peak-memory sampling, Chrome trace export and cProfile / stack-sampler hooks
+
+Usage:
+    python model/train_models.py --timings                       # span table after the run
+    python model/train_models.py --trace train_trace.json        # + Chrome trace file
+    python model/train_models.py --trace-memory                  # + peak memory per span (slower)
+    python model/train_models.py --profile cprofile              # top functions by cumulative time
+    python model/train_models.py --profile sample --profile-output stacks.txt   # flame graph input
+    python score.py lab_export.csv --trace score_trace.json      # includes the worker processes
+
+Open trace files in https://ui.perfetto.dev or chrome://tracing; collapsed stack
+files in https://www.speedscope.app or flamegraph.pl.
+
+Code marks a region with ``with span('predict', rows=n):``. Spans are only
+recorded inside an active ``trace()`` (tracked per thread of execution with a
+context variable), so instrumented code costs one lookup when nobody traces.
+"""
+
+import contextvars
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+import pandas as pd
+
+PROFILERS = ['cprofile', 'sample']
+# Seconds between stack samples; coarse enough that sampling costs ~1% of a core
+SAMPLE_INTERVAL = 0.005
+
+_active = contextvars.ContextVar('wine_quality_tracer', default=None)
+_disabled = nullcontext()
+_END = object()
+
+
+class Tracer:
+    """
+    Collects timed spans, optionally with the peak traced memory of each.
+
+    A span record is a dict with ``name``, ``path`` (the names of the open
+    spans it is nested in, then its own, joined by '/'), ``start``
+    (``time.perf_counter`` seconds, comparable across processes on one
+    machine), ``duration``, ``depth`` (nesting level within its thread), ``pid``, ``thread``,
+    ``attrs`` and, with ``memory``, ``peak_mb``: the most memory allocated
+    (Python and NumPy, via tracemalloc) above the level at the span's start.
+    Memory peaks are process-wide, so they are exact for single-threaded
+    sections and an upper bound when threads overlap.
+    """
+
+    def __init__(self, memory=False, label=None):
+        self.memory = memory
+        self.label = label
+        self.origin = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _sample_memory(self, stack):
+        """Fold the traced peak since the last sample into every open span, then restart it."""
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for record in stack:
+            record['peak'] = max(record['peak'], peak)
+        return current
+
+    @contextmanager
+    def span(self, name, **attrs):
+        stack = self._stack()
+        record = {
+            'name': name,
+            'path': f"{stack[-1]['path']}/{name}" if stack else name,
+            'start': 0.0,
+            'duration': 0.0,
+            'depth': len(stack),
+            'pid': os.getpid(),
+            'thread': threading.get_ident(),
+            'attrs': attrs
+        }
+        if self.memory:
+            record['base'] = record['peak'] = self._sample_memory(stack)
+        stack.append(record)
+        record['start'] = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['duration'] = time.perf_counter() - record['start']
+            if self.memory:
+                self._sample_memory(stack)
+                record['peak_mb'] = (record.pop('peak') - record.pop('base')) / 1e6
+            stack.pop()
+            with self._lock:
+                self.spans.append(record)
+
+    def extend(self, spans):
+        """Add span records collected elsewhere, e.g. by a worker process."""
+        with self._lock:
+            self.spans.extend(spans)
+
+    def wall_seconds(self):
+        if not self.spans:
+            return 0.0
+        return max(s['start'] + s['duration'] for s in self.spans) - min(s['start'] for s in self.spans)
+
+    def summary(self):
+        """
+        One row per span path (a name under a given chain of parents), in order of first occurrence.
+
+        ``Share`` is the span's total time over the traced wall time; nested,
+        threaded and worker-process spans overlap, so shares can add up past 100%.
+        """
+        columns = ['Span', 'Calls', 'Total (ms)', 'Mean (ms)', 'Share']
+        if self.memory:
+            columns.append('Peak Memory (MB)')
+        if not self.spans:
+            return pd.DataFrame(columns=columns)
+
+        df = pd.DataFrame(self.spans).sort_values('start', kind='stable')
+        if 'peak_mb' not in df:
+            df['peak_mb'] = float('nan')
+        table = df.groupby('path', sort=False).agg(
+            name=('name', 'first'),
+            depth=('depth', 'min'),
+            calls=('duration', 'size'),
+            total=('duration', 'sum'),
+            peak=('peak_mb', 'max')
+        )
+        wall = self.wall_seconds()
+        result = pd.DataFrame({
+            'Span': [('  ' * (depth - 1) + '└ ' if depth else '') + name
+                     for name, depth in zip(table['name'], table['depth'])],
+            'Calls': table['calls'].to_numpy(),
+            'Total (ms)': (table['total'] * 1000).round(2).to_numpy(),
+            'Mean (ms)': (table['total'] / table['calls'] * 1000).round(2).to_numpy(),
+            'Share': (table['total'] / wall if wall else table['total'] * 0).round(4).to_numpy(),
+            'Peak Memory (MB)': table['peak'].round(2).to_numpy()
+        })
+        return result[columns]
+
+    def chrome_trace(self):
+        """The spans as a Chrome trace event document (complete 'X' events, microseconds)."""
+        events = []
+        for pid in sorted({s['pid'] for s in self.spans}):
+            name = self.label or 'wine-quality'
+            if pid != os.getpid():
+                name += f' worker {pid}'
+            events.append({'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': name}})
+        for s in self.spans:
+            args = dict(s['attrs'])
+            if 'peak_mb' in s:
+                args['peak_mb'] = round(s['peak_mb'], 3)
+            events.append({
+                'name': s['name'],
+                'ph': 'X',
+                'ts': round((s['start'] - self.origin) * 1e6, 1),
+                'dur': round(s['duration'] * 1e6, 1),
+                'pid': s['pid'],
+                'tid': s['thread'],
+                'args': args
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f, default=str)
+
+
+@contextmanager
+def trace(tracer=None, memory=False, label=None):
+    """
+    Record the spans of this block into ``tracer`` (a new Tracer by default) and yield it.
+
+    Entering again with the same tracer continues it, e.g. around a later chart.
+    With ``memory``, tracemalloc runs for the duration of the block.
+    """
+    tracer = tracer if tracer is not None else Tracer(memory, label)
+    started_tracemalloc = tracer.memory and not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start()
+    token = _active.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _active.reset(token)
+        if started_tracemalloc:
+            tracemalloc.stop()
+
+
+def current():
+    """The active Tracer, or None."""
+    return _active.get()
+
+
+@contextmanager
+def paused():
+    """Record nothing inside this block, e.g. around repeated benchmark calls."""
+    token = _active.set(None)
+    try:
+        yield
+    finally:
+        _active.reset(token)
+
+
+def span(name, **attrs):
+    """Time a block as ``name`` in the active trace; a no-op context manager when none is active."""
+    tracer = _active.get()
+    if tracer is None:
+        return _disabled
+    return tracer.span(name, **attrs)
+
+
+def iter_spans(name, iterable, **attrs):
+    """Yield the items of ``iterable``, timing the production of each one (e.g. parsing CSV chunks)."""
+    iterator = iter(iterable)
+    while True:
+        with span(name, **attrs):
+            item = next(iterator, _END)
+        if item is _END:
+            return
+        yield item
+
+
+class StackSampler:
+    """
+    Statistical profiler: records the call stack of one thread every ``interval`` seconds.
+
+    Nothing runs between samples, so the overhead is far below cProfile's, and
+    time inside C extensions is charged to the Python function that called them.
+    Samples are kept as collapsed stacks ('outer;inner;leaf' -> count).
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if frames:
+                self.stacks[';'.join(reversed(frames))] += 1
+
+    @property
+    def n_samples(self):
+        return sum(self.stacks.values())
+
+    def top(self, n=20):
+        """DataFrame of the ``n`` functions with the most samples at the top of the stack."""
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        samples = max(self.n_samples, 1)
+        rows = [(f, own[f] / samples, total[f] / samples) for f, _ in own.most_common(n)]
+        return pd.DataFrame(rows, columns=['Function', 'Self', 'Total'])
+
+    def write(self, path):
+        """Collapsed stack lines ('a;b;c count'), the input of flamegraph.pl and speedscope."""
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+@contextmanager
+def profile(kind, output=None, top=20):
+    """
+    Run the block under cProfile ('cprofile') or the StackSampler ('sample') and print the hot spots.
+
+    ``output`` receives the cProfile stats (open with pstats or snakeviz) or
+    the collapsed stacks. ``kind=None`` profiles nothing.
+    """
+    if kind is None:
+        yield
+        return
+    if kind not in PROFILERS:
+        raise ValueError(f"unknown profiler {kind!r}; expected one of {PROFILERS}")
+
+    if kind == 'cprofile':
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(top)
+            print("\n🔬 cPROFILE: TOP FUNCTIONS BY CUMULATIVE TIME")
+            print(stream.getvalue())
+            if output:
+                profiler.dump_stats(output)
+                print(f"💾 Profile stats saved to: {output}")
+    else:
+        sampler = StackSampler().start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            print(f"\n🔬 STACK SAMPLES: {sampler.n_samples:,} every {sampler.interval * 1000:.0f} ms "
+                  f"(share of samples in / under each function)")
+            print(_table_text(sampler.top(top), 'Function', {'Self': '{:.1%}'.format, 'Total': '{:.1%}'.format}))
+            if output:
+                sampler.write(output)
+                print(f"💾 Collapsed stacks saved to: {output}")
+
+
+def _table_text(table, label_column, formatters):
+    """Plain-text table with the ``label_column`` left-aligned (pandas right-aligns text)."""
+    width = max([len(label_column)] + [len(label) for label in table[label_column]])
+    padded = label_column.ljust(width)
+    return table.rename(columns={label_column: padded}).to_string(
+        index=False, formatters=dict(formatters, **{padded: f'{{:<{width}}}'.format}))
+
+
+def add_arguments(parser):
+    """Add the --timings / --trace / --trace-memory / --profile options to a script's parser."""
+    group = parser.add_argument_group('profiling')
+    group.add_argument('--timings', action='store_true',
+                       help="Print a table of where the run spent its time")
+    group.add_argument('--trace', metavar='PATH',
+                       help="Also write the timed spans as a Chrome trace file (implies --timings)")
+    group.add_argument('--trace-memory', action='store_true',
+                       help="Also record the peak memory of each span; slows the run down (implies --timings)")
+    group.add_argument('--profile', choices=PROFILERS,
+                       help="Run under cProfile or the low-overhead stack sampler and print the hot spots")
+    group.add_argument('--profile-output', metavar='PATH',
+                       help="Save the cProfile stats (.prof) or collapsed stacks (.txt) here")
+
+
+@contextmanager
+def session(args, label=None):
+    """
+    Trace and/or profile a script run as requested by the ``add_arguments`` options.
+
+    Yields the Tracer (None when not tracing); the span table is printed and
+    the trace file written when the block ends.
+    """
+    tracing = args.timings or args.trace or args.trace_memory
+    with trace(memory=args.trace_memory, label=label) if tracing else nullcontext() as tracer:
+        with profile(args.profile, args.profile_output):
+            yield tracer
+
+    if tracer is not None:
+        print(f"\n⏱️  TIMING BREAKDOWN ({tracer.wall_seconds():.2f}s traced)")
+        print("-" * 80)
+        print(_table_text(tracer.summary(), 'Span', {'Share': '{:.1%}'.format}))
+        if args.trace:
+            tracer.write(args.trace)
+            print(f"🧭 Trace saved to: {args.trace} (open in https://ui.perfetto.dev)")
@@ -0,0 +1,198 @@
+"""
+Wine Quality Classification - Out-of-Core Training Script
+Trains the models that support incremental learning from dataset chunks
+
+Usage:
+    python model/train_streaming.py --chunk-size 100000 --epochs 5
+
+The prepared dataset is never loaded whole: the scaler statistics, the
+incremental models and the holdout evaluation are all computed chunk by chunk.
+Artifacts go to model/streaming/ so they never overwrite the in-memory models.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+warnings.filterwarnings('ignore')
+
+import numpy as np
+import pandas as pd
+
+# Allow `python model/train_streaming.py` from the repository root to import the model package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sklearn.preprocessing import StandardScaler
+from sklearn.linear_model import SGDClassifier
+from sklearn.naive_bayes import GaussianNB
+import xgboost as xgb
+import joblib
+
+from model.dataset import FEATURE_COLUMNS, TARGET_COLUMN, iter_chunks
+from model.artifacts import model_path
+from model.metrics import MetricsAccumulator
+
+OUTPUT_DIR = os.path.join('model', 'streaming')
+CLASSES = np.array([0, 1])
+TEST_FRACTION = 0.2
+AUC_BINS = 4096
+
+# Models in train_models.py that need the full training matrix in memory
+UNSUPPORTED = {
+    'Decision Tree': "split search sorts each feature over all rows at every node",
+    'kNN': "prediction searches the stored training set, which must be held in memory",
+    'Random Forest': "bootstrap sampling and split search need random access to all rows",
+}
+
+
+def holdout_mask(row_ids):
+    """
+    Deterministic ~20% holdout from global row numbers (Knuth multiplicative hash).
+
+    Stateless, so every pass over the data agrees on the split without storing it.
+    """
+    hashed = (row_ids.astype(np.uint64) * np.uint64(2654435761)) % np.uint64(2 ** 32)
+    return hashed < np.uint64(TEST_FRACTION * 2 ** 32)
+
+
+def iter_split(chunk_size, want_test):
+    """Yield (X, y) numpy chunks of either the training or the holdout rows."""
+    offset = 0
+    for chunk in iter_chunks(chunk_size):
+        row_ids = np.arange(offset, offset + len(chunk))
+        offset += len(chunk)
+        mask = holdout_mask(row_ids) == want_test
+        if mask.any():
+            yield (chunk[FEATURE_COLUMNS].to_numpy(dtype=np.float64)[mask],
+                   chunk[TARGET_COLUMN].to_numpy(dtype=np.int64)[mask])
+
+
+class _ScaledChunks(xgb.DataIter):
+    """Feeds scaled training chunks to XGBoost's external-memory DMatrix."""
+
+    def __init__(self, scaler, chunk_size, cache_prefix):
+        self._scaler = scaler
+        self._chunk_size = chunk_size
+        self._chunks = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self._chunks is None:
+            self._chunks = iter_split(self._chunk_size, want_test=False)
+        try:
+            X, y = next(self._chunks)
+        except StopIteration:
+            return False
+        input_data(data=self._scaler.transform(X), label=y)
+        return True
+
+    def reset(self):
+        self._chunks = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train incremental models from dataset chunks.")
+    parser.add_argument('--chunk-size', type=int, default=100_000,
+                        help="Rows per chunk (default: %(default)s)")
+    parser.add_argument('--epochs', type=int, default=5,
+                        help="Passes over the data for SGD logistic regression (default: %(default)s)")
+    parser.add_argument('--rounds', type=int, default=100,
+                        help="XGBoost boosting rounds (default: %(default)s)")
+    parser.add_argument('--output-dir', default=OUTPUT_DIR,
+                        help="Where to write artifacts and results (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    print("=" * 80)
+    print("WINE QUALITY CLASSIFICATION - OUT-OF-CORE TRAINING")
+    print("=" * 80)
+
+    print("\n⚠️  Models without an incremental training path:")
+    for name, reason in UNSUPPORTED.items():
+        print(f"   ❌ {name}: {reason}")
+
+    # Pass 1: scaler statistics
+    print(f"\n[1/4] Computing scaler statistics (chunks of {args.chunk_size:,} rows)...")
+    scaler = StandardScaler()
+    n_train = 0
+    for X, y in iter_split(args.chunk_size, want_test=False):
+        scaler.partial_fit(pd.DataFrame(X, columns=FEATURE_COLUMNS))
+        n_train += len(X)
+    print(f"✅ Scaler fitted on {n_train:,} training rows")
+
+    # Pass 2..: incremental models
+    print(f"\n[2/4] Training incremental models ({args.epochs} epoch(s))...")
+    models = {
+        'Logistic Regression': SGDClassifier(loss='log_loss', alpha=1e-4, average=True, random_state=42),
+        'Naive Bayes': GaussianNB()
+    }
+    fit_seconds = dict.fromkeys(list(models) + ['XGBoost'], 0.0)
+
+    rng = np.random.default_rng(42)
+    for epoch in range(args.epochs):
+        for X, y in iter_split(args.chunk_size, want_test=False):
+            # partial_fit does not shuffle; the prepared data is ordered by wine type
+            order = rng.permutation(len(X))
+            X_scaled, y = scaler.transform(X[order]), y[order]
+            for name, model in models.items():
+                # Gaussian NB statistics are exact after a single pass
+                if name == 'Naive Bayes' and epoch > 0:
+                    continue
+                started = time.perf_counter()
+                model.partial_fit(X_scaled, y, classes=CLASSES)
+                fit_seconds[name] += time.perf_counter() - started
+    print("✅ Logistic Regression (SGD, log loss) and Naive Bayes trained")
+
+    print("\n[3/4] Training XGBoost from an external-memory DMatrix...")
+    cache_dir = tempfile.mkdtemp(prefix='xgb-extmem-')
+    try:
+        started = time.perf_counter()
+        dtrain = xgb.ExtMemQuantileDMatrix(
+            _ScaledChunks(scaler, args.chunk_size, os.path.join(cache_dir, 'train'))
+        )
+        booster = xgb.train(
+            {'objective': 'binary:logistic', 'tree_method': 'hist', 'eval_metric': 'logloss', 'seed': 42},
+            dtrain, num_boost_round=args.rounds
+        )
+        fit_seconds['XGBoost'] = time.perf_counter() - started
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    models['XGBoost'] = xgb.XGBClassifier()
+    models['XGBoost'].load_model(bytearray(booster.save_raw('json')))
+    print("✅ XGBoost trained")
+
+    # Final pass: holdout evaluation
+    print("\n[4/4] Evaluating on the holdout rows...")
+    evaluators = {name: MetricsAccumulator(AUC_BINS) for name in models}
+    for X, y in iter_split(args.chunk_size, want_test=True):
+        X_scaled = scaler.transform(X)
+        for name, model in models.items():
+            proba = model.predict_proba(X_scaled)[:, 1]
+            evaluators[name].update(y, proba > 0.5, proba)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    joblib.dump(scaler, os.path.join(args.output_dir, 'scaler.pkl'))
+    results = {}
+    for name, model in models.items():
+        results[name] = evaluators[name].results()
+        path = os.path.join(args.output_dir, os.path.basename(model_path(name)))
+        joblib.dump(model, path)
+        print(f"\n📊 {name} (fit {fit_seconds[name]:.2f}s)")
+        for metric, value in results[name].items():
+            print(f"   ✅ {metric:10s} {value:.4f}")
+        print(f"   💾 Model saved: {path}")
+
+    with open(os.path.join(args.output_dir, 'results.json'), 'w') as f:
+        json.dump(results, f, indent=4)
+
+    print("\n" + "=" * 80)
+    print(pd.DataFrame(results).T.to_string())
+    print("=" * 80)
+    print(f"✅ Results saved to {os.path.join(args.output_dir, 'results.json')}")
+
+
+if __name__ == '__main__':
+    main()
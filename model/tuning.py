@@ -0,0 +1,324 @@
+"""
+Wine Quality Classification - Hyperparameter Tuning
+Stratified k-fold search for all six model families with successive halving in a process pool
+
+Usage:
+    python model/tuning.py                                   # all models, AUC, 5 folds
+    python model/tuning.py --models "Random Forest" XGBoost --metric F1
+    python model/train_models.py --tuned                     # train with the best parameters
+
+Successive halving treats folds as the budget: every candidate is scored on
+one fold, the best third go on to more folds, and only the finalists are
+scored on all of them. Scores from earlier rungs are kept, so no fit is
+repeated. Fold splits and the per-fold scalers are computed once per dataset
+and cached, and each worker process receives the scaled folds once.
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import warnings
+warnings.filterwarnings('ignore')
+
+import joblib
+import numpy as np
+
+# Allow `python model/tuning.py` from the repository root to import the model package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sklearn.base import clone
+from sklearn.model_selection import StratifiedKFold, train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from model.dataset import FEATURE_COLUMNS, TARGET_COLUMN, load_prepared
+from model.metrics import confusion, roc_auc, threshold_metrics
+from model.orchestrator import fingerprint_data, fit_cost, set_n_jobs
+
+TUNING_PATH = os.path.join('model', 'tuning.json')
+CACHE_DIR = os.path.join('model', '.cache', 'tuning')
+
+# Search spaces per model family (keys are estimator parameters)
+SEARCH_SPACES = {
+    'Logistic Regression': {
+        'C': [0.01, 0.1, 1.0, 10.0, 100.0],
+        'class_weight': [None, 'balanced']
+    },
+    'Decision Tree': {
+        'max_depth': [None, 5, 10, 20],
+        'min_samples_leaf': [1, 5, 20],
+        'criterion': ['gini', 'entropy']
+    },
+    'kNN': {
+        'n_neighbors': [3, 5, 7, 11, 15, 21, 31, 41, 61, 81]
+    },
+    'Naive Bayes': {
+        'var_smoothing': [1e-11, 1e-10, 1e-9, 1e-8, 1e-7, 1e-6, 1e-5]
+    },
+    'Random Forest': {
+        'n_estimators': [100, 300],
+        'max_depth': [None, 10, 20],
+        'max_features': ['sqrt', 0.5],
+        'min_samples_leaf': [1, 2, 4]
+    },
+    'XGBoost': {
+        'n_estimators': [100, 300],
+        'max_depth': [3, 6, 9],
+        'learning_rate': [0.05, 0.1, 0.3],
+        'subsample': [0.8, 1.0]
+    }
+}
+
+
+def _auc(model, X, y):
+    return roc_auc(y, model.predict_proba(X)[:, 1])
+
+
+def _threshold_scorer(metric):
+    return lambda model, X, y: threshold_metrics(confusion(y, model.predict(X)))[metric]
+
+
+SCORERS = {
+    'AUC': _auc,
+    'Accuracy': _threshold_scorer('Accuracy'),
+    'F1': _threshold_scorer('F1'),
+    'MCC': _threshold_scorer('MCC')
+}
+
+
+def candidates(space):
+    """Every combination of the grid, as a list of parameter dicts."""
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+
+def rung_folds(n_candidates, n_folds, eta):
+    """Folds per rung, e.g. 36 candidates, 5 folds, eta 3 -> [1, 2, 5]."""
+    n_rungs = 1 + int(math.log(max(n_candidates, 1), eta) + 1e-9)
+    return sorted({max(1, round(n_folds / eta ** (n_rungs - 1 - i))) for i in range(n_rungs)})
+
+
+def prepare_folds(X, y, n_folds=5, seed=42, cache_dir=CACHE_DIR):
+    """
+    Stratified folds with a scaler fitted on each training part, cached per dataset.
+
+    Returns a list of (X_train_scaled, y_train, X_val_scaled, y_val) tuples.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.int64)
+    key = hashlib.sha256(f"{fingerprint_data(X, y)}:{n_folds}:{seed}".encode()).hexdigest()[:32]
+    path = os.path.join(cache_dir, f"folds-{key}.pkl")
+    if os.path.exists(path):
+        return joblib.load(path)
+
+    folds = []
+    splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=seed)
+    for train_idx, val_idx in splitter.split(X, y):
+        scaler = StandardScaler().fit(X[train_idx])
+        folds.append((scaler.transform(X[train_idx]), y[train_idx],
+                      scaler.transform(X[val_idx]), y[val_idx]))
+
+    os.makedirs(cache_dir, exist_ok=True)
+    joblib.dump(folds, path + '.tmp')
+    os.replace(path + '.tmp', path)
+    return folds
+
+
+# Per-process state, populated once by the pool initializer
+_worker = {}
+
+
+def _init_worker(folds, metric):
+    _worker['folds'] = folds
+    _worker['scorer'] = SCORERS[metric]
+
+
+def _evaluate(estimator, params, fold):
+    X_train, y_train, X_val, y_val = _worker['folds'][fold]
+    model = clone(estimator).set_params(**params)
+    # Parallelism comes from the pool; keep each fit on one core
+    set_n_jobs(model, 1)
+    started = time.perf_counter()
+    model.fit(X_train, y_train)
+    return _worker['scorer'](model, X_val, y_val), time.perf_counter() - started
+
+
+class _Search:
+    """Successive-halving state for one model family."""
+
+    def __init__(self, name, estimator, space, n_folds, eta):
+        self.name = name
+        self.estimator = estimator
+        self.candidates = candidates(space)
+        self.rungs = rung_folds(len(self.candidates), n_folds, eta)
+        self.eta = eta
+        self.rung = 0
+        self.alive = list(range(len(self.candidates)))
+        self.scores = {i: {} for i in range(len(self.candidates))}
+        self.history = []
+        self.fit_seconds = 0.0
+
+    def tasks(self):
+        """(candidate, fold) pairs still needed for the current rung."""
+        folds = range(self.rungs[self.rung])
+        return [(c, f) for c in self.alive for f in folds if f not in self.scores[c]]
+
+    def mean(self, c):
+        return float(np.mean(list(self.scores[c].values())))
+
+    def promote(self):
+        """Close the current rung; return False when the search is finished."""
+        ranked = sorted(self.alive, key=self.mean, reverse=True)
+        self.history.append({'folds': self.rungs[self.rung], 'candidates': len(ranked)})
+        if self.rung == len(self.rungs) - 1:
+            self.alive = ranked
+            return False
+        self.alive = ranked[:max(1, math.ceil(len(ranked) / self.eta))]
+        self.rung += 1
+        return True
+
+    def result(self):
+        # Candidates that survived longest first, then by score
+        ranked = sorted(self.scores, key=lambda c: (len(self.scores[c]), self.mean(c)), reverse=True)
+        leaderboard = [
+            {'params': self.candidates[c], 'mean': round(self.mean(c), 4),
+             'std': round(float(np.std(list(self.scores[c].values()))), 4), 'folds': len(self.scores[c])}
+            for c in ranked[:5]
+        ]
+        best = leaderboard[0]
+        return {
+            'best_params': best['params'],
+            'cv_mean': best['mean'],
+            'cv_std': best['std'],
+            'candidates': len(self.candidates),
+            'rungs': self.history,
+            'fold_fits': sum(len(s) for s in self.scores.values()),
+            'fit_seconds': round(self.fit_seconds, 2),
+            'leaderboard': leaderboard
+        }
+
+
+def tune(models, X, y, metric='AUC', n_folds=5, eta=3, max_workers=None, seed=42, log=print):
+    """
+    Search every model in ``models`` ({name: estimator}) and return {name: result}.
+
+    Tasks from all model families share one pool, slowest families first, so
+    the pool stays busy while a family waits for its rung to finish.
+    """
+    folds = prepare_folds(X, y, n_folds, seed)
+    searches = {
+        name: _Search(name, est, SEARCH_SPACES[name], n_folds, eta)
+        for name, est in models.items()
+    }
+    max_workers = max_workers or os.cpu_count() or 1
+    order = sorted(searches, key=lambda n: -fit_cost(models[n]))
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(folds, metric)) as pool:
+        running = {}
+
+        def submit(search):
+            for c, f in search.tasks():
+                future = pool.submit(_evaluate, search.estimator, search.candidates[c], f)
+                running[future] = (search, c, f)
+
+        for name in order:
+            submit(searches[name])
+            log(f"   🔎 {name}: {len(searches[name].candidates)} candidates, "
+                f"folds per rung {searches[name].rungs}")
+
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                search, c, f = running.pop(future)
+                score, seconds = future.result()
+                search.scores[c][f] = score
+                search.fit_seconds += seconds
+                # Rung complete for this family: promote the best and queue the next rung
+                if not search.tasks():
+                    previous = len(search.alive)
+                    if search.promote():
+                        log(f"   ✂️  {search.name}: kept {len(search.alive)}/{previous} candidates "
+                            f"for {search.rungs[search.rung]} folds")
+                        submit(search)
+                    else:
+                        best = search.result()
+                        log(f"   ✅ {search.name}: best {metric} {best['cv_mean']:.4f} "
+                            f"± {best['cv_std']:.4f} with {best['best_params']}")
+
+    return {name: searches[name].result() for name in models}
+
+
+def load_tuned_params(path=TUNING_PATH):
+    """{model name: best params} from the last tuning run, or {} if there is none."""
+    try:
+        with open(path) as f:
+            return {name: r['best_params'] for name, r in json.load(f)['models'].items()}
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def main(argv=None):
+    from model.train_models import build_models
+
+    parser = argparse.ArgumentParser(description="Tune hyperparameters with stratified k-fold CV.")
+    parser.add_argument('--models', nargs='+', default=list(SEARCH_SPACES), choices=list(SEARCH_SPACES),
+                        help="Model families to tune (default: all)")
+    parser.add_argument('--metric', default='AUC', choices=list(SCORERS),
+                        help="Selection metric (default: %(default)s)")
+    parser.add_argument('--folds', type=int, default=5, help="CV folds (default: %(default)s)")
+    parser.add_argument('--eta', type=int, default=3,
+                        help="Keep the best 1/eta candidates at each rung (default: %(default)s)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    print("=" * 80)
+    print("WINE QUALITY CLASSIFICATION - HYPERPARAMETER TUNING")
+    print("=" * 80)
+
+    # Tune on the training split only; the test split stays untouched for train_models.py
+    df = load_prepared()
+    X = df[FEATURE_COLUMNS]
+    y = df[TARGET_COLUMN]
+    X_train, _, y_train, _ = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    print(f"\n✅ {len(X_train)} training samples, {args.folds}-fold stratified CV, metric: {args.metric}")
+
+    all_models = build_models()
+    models = {name: all_models[name] for name in args.models}
+
+    started = time.perf_counter()
+    results = tune(models, X_train, y_train, args.metric, args.folds, args.eta, args.workers)
+    elapsed = time.perf_counter() - started
+
+    full_grid = sum(len(candidates(SEARCH_SPACES[n])) * args.folds for n in models)
+    fold_fits = sum(r['fold_fits'] for r in results.values())
+
+    # Merge with earlier runs so tuning one family keeps the others' results
+    previous = {}
+    if os.path.exists(TUNING_PATH):
+        with open(TUNING_PATH) as f:
+            previous = json.load(f).get('models', {})
+    previous.update(results)
+    with open(TUNING_PATH, 'w') as f:
+        json.dump({
+            'meta': {'metric': args.metric, 'folds': args.folds, 'eta': args.eta,
+                     'elapsed_seconds': round(elapsed, 1)},
+            'models': previous
+        }, f, indent=4)
+
+    print("\n" + "=" * 80)
+    for name, r in results.items():
+        print(f"{name:20s} {args.metric} {r['cv_mean']:.4f} ± {r['cv_std']:.4f}  {r['best_params']}")
+    print("=" * 80)
+    print(f"✅ {fold_fits} fold fits instead of {full_grid} for the full grid, in {elapsed:.1f}s")
+    print(f"✅ Results saved to {TUNING_PATH}; train with them via `python model/train_models.py --tuned`")
+
+
+if __name__ == '__main__':
+    main()
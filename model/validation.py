@@ -0,0 +1,311 @@
+"""
+Wine Quality Classification - Input Validation and Drift
+Schema checks, vectorised value checks and PSI/KS drift against the training distribution, chunk by chunk
+
+Each chunk is matched to the training schema before scoring:
+- feature columns are found by name in any order, case or spacing;
+- extra columns are ignored, and a missing feature is an error;
+- values are coerced to numbers, and wine_type also accepts 'red'/'white'.
+
+Missing, non-numeric and unknown wine_type values are replaced with the
+training mean (the most frequent value for wine_type), so the rest of the
+file still scores, and are counted. With ``strict`` they are rejected instead.
+
+Each feature's values are also counted into the bins of its training
+histogram (the data_profile.py layout, written to model/training_profile.json
+by train_models.py). The counts are all that is kept between chunks. At the
+end they give, per feature:
+- the PSI (population stability index) over ten equal-mass bins of the
+  training data: below 0.1 is stable, 0.1-0.25 a moderate shift, above 0.25
+  a significant one;
+- the two-sample Kolmogorov-Smirnov statistic and its asymptotic p-value,
+  resolved to one histogram bin (1/512 of the training range);
+- the number of values below and above the training range.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+from scipy.special import kolmogorov
+
+from model.artifacts import TRAINING_PROFILE_PATH
+from model.data_profile import PROFILE_PATH, read_profile
+from model.dataset import FEATURE_COLUMNS, GOOD_QUALITY_MIN, GRADE_COLUMN, TARGET_COLUMN, WINE_TYPE_CODES
+
+PSI_BINS = 10
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+# Stand-in for empty bin proportions so PSI stays finite
+PSI_EPSILON = 1e-4
+# With fewer values than this, PSI and KS are noise rather than evidence
+MIN_DRIFT_ROWS = 200
+# Codes rather than measurements: a value not seen in training is invalid, not drift
+CATEGORICAL = ['wine_type']
+
+
+def load_reference(path=TRAINING_PROFILE_PATH):
+    """Profile of the training split, else of the whole prepared dataset (None when neither exists)."""
+    return read_profile(path) or read_profile(PROFILE_PATH)
+
+
+def _normalise(name):
+    return re.sub(r'[\s_\-]+', ' ', str(name).strip().lower())
+
+
+def psi_groups(reference, n_groups=PSI_BINS):
+    """Group consecutive histogram bins into ``n_groups`` holding about equal reference mass."""
+    reference = np.asarray(reference, dtype=np.int64)
+    before = np.cumsum(reference) - reference
+    return np.minimum(before * n_groups // max(int(reference.sum()), 1), n_groups - 1)
+
+
+def psi(reference, current, groups):
+    """Population stability index of the ``current`` bin counts against ``reference``."""
+    expected = np.bincount(groups, weights=reference) / reference.sum()
+    actual = np.bincount(groups, weights=current) / current.sum()
+    expected = np.maximum(expected, PSI_EPSILON)
+    actual = np.maximum(actual, PSI_EPSILON)
+    return float(((actual - expected) * np.log(actual / expected)).sum())
+
+
+def ks_test(reference, current):
+    """Two-sample KS statistic over ordered bin counts, with its asymptotic p-value."""
+    n, m = float(reference.sum()), float(current.sum())
+    statistic = float(np.abs(np.cumsum(reference) / n - np.cumsum(current) / m).max())
+    return statistic, float(kolmogorov(np.sqrt(n * m / (n + m)) * statistic))
+
+
+def drift_status(value, rows):
+    if rows < MIN_DRIFT_ROWS:
+        return 'too few rows'
+    if value >= PSI_SIGNIFICANT:
+        return 'significant'
+    if value >= PSI_MODERATE:
+        return 'moderate'
+    return 'stable'
+
+
+class InputValidator:
+    """
+    Validates and aligns uploaded chunks to the training features, and accumulates drift counts.
+
+    ``prepare(chunk)`` returns (features, target) for scoring. The target is
+    None without a quality column; raw 0-10 quality scores are mapped to the
+    binary label, and ``grades(chunk)`` gives the true grades for the grade
+    models. ``report()`` gives one row per feature and ``issues`` lists schema
+    notes. Validators of separate slices of a file (score.py shards) combine
+    with ``merge``.
+    """
+
+    def __init__(self, profile, strict=False):
+        self.strict = strict
+        self.n_rows = 0
+        self.imputed_rows = 0
+        self.issues = []
+        self._columns = None
+        self._target = None
+        self._grade = None
+
+        k = len(FEATURE_COLUMNS)
+        histograms = [profile['histograms'][c] for c in FEATURE_COLUMNS]
+        self.discrete = np.array([h['discrete'] for h in histograms])
+        means = dict(zip(profile['columns'], profile['mean']))
+
+        # One slot per reference bin: continuous features add an under- and an
+        # overflow slot around their bins, discrete ones an 'other value' slot
+        sizes, reference, self.fill = [], [], np.empty(k)
+        self._values = {}
+        for j, (c, h) in enumerate(zip(FEATURE_COLUMNS, histograms)):
+            counts = np.asarray(h['counts'], dtype=np.int64)
+            if h['discrete']:
+                self._values[j] = np.asarray(h['values'], dtype=np.float64)
+                reference.append(np.append(counts, 0))
+                self.fill[j] = self._values[j][counts.argmax()]
+            else:
+                reference.append(np.concatenate([[0], counts, [0]]))
+                self.fill[j] = means[c]
+            sizes.append(len(reference[-1]))
+        self.offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        self.reference = np.concatenate(reference)
+        self.counts = np.zeros_like(self.reference)
+
+        self._continuous = np.flatnonzero(~self.discrete)
+        lo, hi, bins = zip(*[(*histograms[j]['range'], histograms[j]['bins']) for j in self._continuous])
+        self._lo, self._hi, self._bins = np.array(lo), np.array(hi), np.array(bins, dtype=np.float64)
+        self._width = (self._hi - self._lo) / self._bins
+
+        self.missing = np.zeros(k, dtype=np.int64)
+        self.non_numeric = np.zeros(k, dtype=np.int64)
+        self.unknown = np.zeros(k, dtype=np.int64)
+
+    def _note(self, message):
+        if message not in self.issues:
+            self.issues.append(message)
+
+    def check_columns(self, columns):
+        """Map the input columns to the training features; raises ValueError when a feature is missing."""
+        columns = list(columns)
+        by_name = {}
+        for column in columns:
+            by_name.setdefault(_normalise(column), []).append(column)
+
+        found, missing = [], []
+        for feature in FEATURE_COLUMNS:
+            matches = [feature] if feature in columns else by_name.get(_normalise(feature), [])
+            if len(matches) > 1:
+                raise ValueError(f"Several columns match feature '{feature}': {matches}")
+            if not matches:
+                missing.append(feature)
+            else:
+                found.append(matches[0])
+                if matches[0] != feature:
+                    self._note(f"Column '{matches[0]}' read as '{feature}'")
+        if missing:
+            hint = " (wine_type: 1 for red, 0 for white)" if 'wine_type' in missing else ""
+            raise ValueError(f"Missing feature column(s): {', '.join(missing)}{hint}. "
+                             f"Expected: {', '.join(FEATURE_COLUMNS)}")
+
+        targets = [TARGET_COLUMN] if TARGET_COLUMN in columns else by_name.get(TARGET_COLUMN, [])
+        self._target = targets[0] if len(targets) == 1 else None
+        grades = [GRADE_COLUMN] if GRADE_COLUMN in columns else by_name.get(GRADE_COLUMN, [])
+        self._grade = grades[0] if len(grades) == 1 else None
+        extra = [c for c in columns if c not in found and c not in (self._target, self._grade)]
+        if extra:
+            self._note(f"Ignored {len(extra)} column(s) not used by the models: {', '.join(map(str, extra))}")
+        if [c for c in columns if c in found] != found:
+            self._note("Feature columns were reordered to the training order")
+        self._columns = found
+
+    def _to_numeric(self, X):
+        """(float matrix of the features, count of non-numbers per feature); non-numbers become NaN."""
+        non_numeric = np.zeros(X.shape[1], dtype=np.int64)
+        if all(pd.api.types.is_numeric_dtype(dtype) for dtype in X.dtypes):
+            return X.to_numpy(dtype=np.float64), non_numeric
+
+        values = np.empty(X.shape)
+        for j, feature in enumerate(FEATURE_COLUMNS):
+            column = X.iloc[:, j]
+            if not pd.api.types.is_numeric_dtype(column.dtype):
+                if feature == 'wine_type':
+                    # wine_type may be spelled out as in the raw data files
+                    named = column.astype(str).str.strip().str.lower().map(WINE_TYPE_CODES)
+                    column = named.where(named.notna(), column)
+                numeric = pd.to_numeric(column, errors='coerce')
+                non_numeric[j] = int((numeric.isna() & column.notna()).sum())
+                column = numeric
+            values[:, j] = column.to_numpy(dtype=np.float64)
+        return values, non_numeric
+
+    def _target_labels(self, chunk):
+        y = pd.to_numeric(chunk[self._target], errors='coerce').to_numpy(dtype=np.float64)
+        if np.isnan(y).any():
+            raise ValueError(f"Column '{self._target}' has {int(np.isnan(y).sum())} missing or "
+                             f"non-numeric values; remove it or fix those rows to evaluate")
+        if (y > 1).any():
+            self._note(f"'{self._target}' holds quality scores; scores >= {GOOD_QUALITY_MIN} count as Good")
+            y = y >= GOOD_QUALITY_MIN
+        return y.astype(np.int64)
+
+    def grades(self, chunk):
+        """True 0-10 grades: the grade column, else raw scores in the quality column; None otherwise."""
+        column = self._grade
+        if column is None and self._target is not None:
+            scores = pd.to_numeric(chunk[self._target], errors='coerce')
+            column = self._target if (scores > 1).any() else None
+        if column is None:
+            return None
+        y = pd.to_numeric(chunk[column], errors='coerce').to_numpy(dtype=np.float64)
+        if np.isnan(y).any() or (y < 0).any() or (y > 10).any() or (y % 1).any():
+            raise ValueError(f"Column '{column}' must hold whole quality grades from 0 to 10 to evaluate grades")
+        return y.astype(np.int64)
+
+    def prepare(self, chunk):
+        """Return (features in training order, 0/1 target or None) for one chunk."""
+        if self._columns is None:
+            self.check_columns(chunk.columns)
+
+        values, non_numeric = self._to_numeric(chunk[self._columns])
+        bad = np.isnan(values)
+        self.non_numeric += non_numeric
+        self.missing += bad.sum(axis=0) - non_numeric
+
+        # Drift counts from the valid values only: one bincount for every continuous feature
+        C = values[:, self._continuous]
+        position = np.floor((C - self._lo) / self._width)
+        slot = np.where(C > self._hi, self._bins, np.minimum(position, self._bins - 1))
+        slot = np.maximum(slot, -1) + 1 + self.offsets[self._continuous]
+        self.counts += np.bincount(slot[~np.isnan(C)].astype(np.int64), minlength=len(self.counts))
+
+        for j, known_values in self._values.items():
+            v = values[:, j]
+            present = ~np.isnan(v)
+            index = np.minimum(np.searchsorted(known_values, v), len(known_values) - 1)
+            known = present & (known_values[index] == v)
+            if FEATURE_COLUMNS[j] in CATEGORICAL:
+                unknown = present & ~known
+                self.unknown[j] += int(unknown.sum())
+                bad[:, j] |= unknown
+            slots = np.where(known, index, len(known_values))[present]
+            self.counts[self.offsets[j]:self.offsets[j] + len(known_values) + 1] += \
+                np.bincount(slots, minlength=len(known_values) + 1)
+
+        invalid_rows = bad.any(axis=1)
+        if invalid_rows.any():
+            if self.strict:
+                columns = [f for f, n in zip(FEATURE_COLUMNS, bad.sum(axis=0)) if n]
+                raise ValueError(f"{int(invalid_rows.sum())} row(s) have missing, non-numeric or unknown "
+                                 f"values in: {', '.join(columns)}")
+            values = np.where(bad, self.fill, values)
+            self.imputed_rows += int(invalid_rows.sum())
+
+        self.n_rows += len(values)
+        X = pd.DataFrame(values, columns=FEATURE_COLUMNS, index=chunk.index)
+        y_true = self._target_labels(chunk) if self._target is not None else None
+        return X, y_true
+
+    def merge(self, other):
+        """Fold in the counts of a validator run over another slice of the same file."""
+        self.n_rows += other.n_rows
+        self.imputed_rows += other.imputed_rows
+        self.counts += other.counts
+        self.missing += other.missing
+        self.non_numeric += other.non_numeric
+        self.unknown += other.unknown
+        for message in other.issues:
+            self._note(message)
+        return self
+
+    def report(self):
+        """Per feature: invalid value counts, values outside the training range, PSI, KS and a drift status."""
+        rows = []
+        for j, feature in enumerate(FEATURE_COLUMNS):
+            size = len(self._values[j]) + 1 if j in self._values else None
+            end = self.offsets[j + 1] if j + 1 < len(self.offsets) else len(self.counts)
+            reference = self.reference[self.offsets[j]:end]
+            current = self.counts[self.offsets[j]:end]
+            rows_seen = int(current.sum())
+            if rows_seen:
+                groups = np.arange(size) if size else psi_groups(reference)
+                index = psi(reference, current, groups)
+                statistic, p_value = ks_test(reference, current)
+            else:
+                index = statistic = p_value = float('nan')
+            rows.append({
+                'Feature': feature,
+                'Missing': int(self.missing[j]),
+                'Non-numeric': int(self.non_numeric[j]),
+                'Unknown Value': int(self.unknown[j]),
+                'Below Range': 0 if size else int(current[0]),
+                'Above Range': 0 if size else int(current[-1]),
+                'PSI': index,
+                'KS': statistic,
+                'KS p-value': p_value,
+                'Drift': drift_status(index, rows_seen)
+            })
+        return pd.DataFrame(rows)
+
+    def drifted(self):
+        """Features whose PSI shows at least a moderate shift."""
+        report = self.report()
+        return report.loc[report['Drift'].isin(['moderate', 'significant']), 'Feature'].tolist()
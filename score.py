@@ -0,0 +1,285 @@
+"""
+Wine Quality Classification - Batch Scoring CLI
+Scores large CSV exports headlessly by sharding them across a process pool
+
+Usage:
+    python score.py lab_export.csv -o predictions.csv --model XGBoost
+    python score.py lab_export.csv --threshold 0.5     # override the model's operating threshold
+    python score.py lab_export.csv --trace score_trace.json   # per-shard parse/scale/predict spans
+    python score.py lab_export.csv --strict            # fail on missing or non-numeric values
+    python score.py lab_export.csv --grades            # also predict the 3-9 grade (model/grades.py)
+    python score.py lab_export.csv --model "Decision Tree" --explain   # per-feature contributions (model/explain.py)
+"""
+
+import argparse
+import io
+import os
+import shutil
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+import pandas as pd
+
+from model import artifacts, explain, tracing
+from model.registry import ModelRegistry
+from model.scoring import DEFAULT_CHUNK_SIZE, GRADE_OUTPUT_COLUMNS, OUTPUT_COLUMNS, ScoringSummary, score_csv
+from model.validation import PSI_MODERATE, InputValidator, load_reference
+
+warnings.filterwarnings('ignore')
+
+# Shards smaller than this are not worth a separate process
+MIN_SHARD_BYTES = 8 * 1024 * 1024
+
+# Per-process state, populated once by the pool initializer
+_worker = {}
+
+
+class _RangeReader(io.RawIOBase):
+    """Read-only view of the byte range [start, end) of a file."""
+
+    def __init__(self, path, start, end):
+        self._file = open(path, 'rb')
+        self._file.seek(start)
+        self._remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        n = self._file.readinto(memoryview(buffer)[:size])
+        self._remaining -= n
+        return n
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def plan_shards(path, n_shards):
+    """
+    Split a CSV into up to ``n_shards`` newline-aligned byte ranges.
+
+    Returns (header_columns, [(start, end), ...]); the header line is excluded.
+    """
+    with open(path, 'rb') as f:
+        header = f.readline()
+        data_start = f.tell()
+        size = os.fstat(f.fileno()).st_size
+
+        n_shards = max(1, min(n_shards, (size - data_start) // MIN_SHARD_BYTES))
+        step = (size - data_start) // n_shards
+
+        bounds = [data_start]
+        for i in range(1, n_shards):
+            f.seek(max(data_start + i * step, bounds[-1]))
+            f.readline()
+            bounds.append(min(f.tell(), size))
+        bounds.append(size)
+
+    columns = pd.read_csv(io.BytesIO(header), nrows=0).columns.tolist()
+    shards = [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+    return columns, shards
+
+
+def _single_threaded(model):
+    # One process per core: keep each model single-threaded to avoid oversubscription
+    if 'n_jobs' in model.get_params():
+        model.set_params(n_jobs=1)
+    return model
+
+
+def _init_worker(model_name, explained=False):
+    _worker['reference'] = load_reference()
+    registry = ModelRegistry()
+    model, scaler = registry.pipeline(model_name)
+    _worker['model'] = _single_threaded(model)
+    _worker['scaler'] = scaler
+    _worker['explainer'] = None
+    if explained:
+        # Explanations come from the plain artifact on scaled features
+        plain = _single_threaded(registry.get(model_name, variant='model'))
+        _worker['explainer'] = explain.make_explainer(plain, registry.scaler())
+
+
+def _score_shard(path, start, end, columns, part_path, chunk_size, threshold, strict, trace_memory=None):
+    """Score one byte range; with ``trace_memory`` set (True/False) also return its span records."""
+    started = time.perf_counter()
+    reference = _worker['reference']
+    validator = InputValidator(reference, strict) if reference is not None else None
+    reader = io.TextIOWrapper(io.BufferedReader(_RangeReader(path, start, end)), newline='')
+    with reader, open(part_path, 'w', newline='') as out, \
+            tracing.trace(memory=trace_memory) if trace_memory is not None else nullcontext() as tracer:
+        with tracing.span('shard', start_byte=start):
+            summary = score_csv(
+                reader, _worker['model'], _worker['scaler'], out,
+                chunk_size=chunk_size, names=columns, write_header=False, threshold=threshold,
+                validator=validator, explainer=_worker['explainer']
+            )
+    summary.preview = None
+    return summary, time.perf_counter() - started, tracer.spans if tracer is not None else None
+
+
+def score_file(input_path, output_path, model_name, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, threshold=None,
+               strict=False, explained=False):
+    """
+    Score ``input_path`` into ``output_path`` and return (summary, elapsed_seconds).
+
+    ``threshold`` is the decision threshold on P(Good); None takes the most probable class.
+    Rows are validated against the training profile (model/validation.py);
+    ``strict`` fails on invalid values instead of filling them in.
+    When a trace is active (see model/tracing.py), each worker traces its shard
+    and the spans are added to it.
+    ``explained`` appends per-feature contributions to every row (model/explain.py).
+    """
+    workers = workers or os.cpu_count() or 1
+    columns, shards = plan_shards(input_path, workers)
+    if not shards:
+        raise ValueError(f"{input_path} contains no rows to score")
+    reference = load_reference()
+    if reference is not None:
+        # Fail on a missing feature column before starting any worker
+        InputValidator(reference).check_columns(columns)
+    part_paths = [f"{output_path}.part{i:04d}" for i in range(len(shards))]
+
+    print(f"📁 Input: {input_path} ({os.path.getsize(input_path) / 1e6:.1f} MB)")
+    print(f"🤖 Model: {model_name}")
+    print(f"🎚️  Decision threshold: {'most probable class' if threshold is None else f'P(Good) >= {threshold:.3f}'}")
+    print(f"⚙️  {len(shards)} shard(s) across {min(workers, len(shards))} worker process(es)")
+
+    started = time.perf_counter()
+    summary = ScoringSummary()
+    tracer = tracing.current()
+    trace_memory = tracer.memory if tracer is not None else None
+
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, len(shards)),
+                                 initializer=_init_worker, initargs=(model_name, explained)) as pool:
+            futures = [
+                pool.submit(_score_shard, input_path, start, end, columns, part, chunk_size, threshold, strict,
+                            trace_memory)
+                for (start, end), part in zip(shards, part_paths)
+            ]
+            # Merge in submission order so the output preserves the input row order
+            for i, future in enumerate(futures):
+                shard_summary, seconds, spans = future.result()
+                summary.merge(shard_summary)
+                if spans:
+                    tracer.extend(spans)
+                rate = shard_summary.n_rows / seconds if seconds else float('inf')
+                print(f"   ✅ Shard {i + 1}/{len(shards)}: {shard_summary.n_rows:,} rows ({rate:,.0f} rows/sec)")
+    except BaseException:
+        for part in part_paths:
+            if os.path.exists(part):
+                os.remove(part)
+        raise
+
+    # Merge part files behind a single header
+    output_columns = OUTPUT_COLUMNS + (GRADE_OUTPUT_COLUMNS if model_name in artifacts.GRADE_MODEL_NAMES else [])
+    output_columns += explain.EXPLANATION_COLUMNS if explained else []
+    with open(output_path, 'w', newline='') as out, tracing.span('merge parts', parts=len(part_paths)):
+        pd.DataFrame(columns=columns + output_columns).to_csv(out, index=False)
+        for part in part_paths:
+            with open(part, 'r', newline='') as f:
+                shutil.copyfileobj(f, out, 1024 * 1024)
+            os.remove(part)
+
+    return summary, time.perf_counter() - started
+
+
+def print_validation(validator):
+    """Schema notes, filled-in values and feature drift of a scored file."""
+    for issue in validator.issues:
+        print(f"   ℹ️  {issue}")
+    if validator.imputed_rows:
+        print(f"   ⚠️  {validator.imputed_rows:,} rows had missing, non-numeric or unknown values "
+              f"(filled with training means; use --strict to reject them)")
+    report = validator.report()
+    outside = int(report['Below Range'].sum() + report['Above Range'].sum())
+    if outside:
+        print(f"   📏 {outside:,} values outside the training range")
+    drifted = report[report['Drift'].isin(['moderate', 'significant'])]
+    if drifted.empty:
+        print(f"   🩺 No feature drift from the training data (PSI < {PSI_MODERATE} for every feature)")
+    else:
+        print(f"   🩺 Drift from the training data in {len(drifted)} feature(s):")
+        columns = ['Feature', 'PSI', 'KS', 'Below Range', 'Above Range', 'Drift']
+        print(drifted[columns].to_string(index=False, float_format='{:.4f}'.format))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score wine samples with a trained model.")
+    parser.add_argument('input', help="CSV file with wine features (optionally a 'quality' column)")
+    parser.add_argument('-o', '--output', default='wine_quality_predictions.csv',
+                        help="Output CSV path (default: %(default)s)")
+    parser.add_argument('-m', '--model', default='XGBoost', choices=artifacts.MODEL_NAMES,
+                        help="Model to score with (default: %(default)s)")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Worker processes (default: all cores)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Rows per chunk within a shard (default: %(default)s)")
+    parser.add_argument('-t', '--threshold', type=float, default=None,
+                        help=f"Decision threshold on P(Good) (default: the model's operating threshold "
+                             f"in {artifacts.THRESHOLDS_PATH}, else the most probable class)")
+    parser.add_argument('--strict', action='store_true',
+                        help="Fail on missing, non-numeric or unknown values instead of filling them in")
+    parser.add_argument('--grades', action='store_true',
+                        help="Score with the model's grade variant: adds the predicted and expected 3-9 grade, "
+                             "Good/Not Good comes from the same grade probabilities")
+    parser.add_argument('--explain', action='store_true',
+                        help=f"Append each feature's contribution to the prediction and the top reason for the "
+                             f"label ({', '.join(explain.EXPLAINABLE)} only)")
+    tracing.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if args.explain and args.grades:
+        parser.error("--explain: grade models are not explained; drop --grades")
+    if args.grades:
+        args.model = artifacts.grade_model_name(args.model)
+        if args.model not in artifacts.GRADE_MODEL_NAMES:
+            parser.error("--grades: the Ensemble has no grade variant")
+    if args.explain and args.model not in explain.EXPLAINABLE:
+        parser.error(f"--explain: no explanations for {args.model} (available for {', '.join(explain.EXPLAINABLE)})")
+    if args.model not in ModelRegistry().available(artifacts.MODEL_NAMES + artifacts.GRADE_MODEL_NAMES):
+        parser.error(f"no trained artifact for {args.model!r} ({artifacts.model_path(args.model)}); "
+                     f"run model/train_models.py first")
+
+    print("=" * 60)
+    print("WINE QUALITY CLASSIFICATION - BATCH SCORING")
+    print("=" * 60)
+
+    threshold = args.threshold if args.threshold is not None else artifacts.load_thresholds().get(args.model)
+    with tracing.session(args, label='score.py'):
+        try:
+            summary, elapsed = score_file(args.input, args.output, args.model, args.workers, args.chunk_size,
+                                          threshold, args.strict, args.explain)
+        except ValueError as e:
+            parser.exit(1, f"❌ {e}\n")
+
+        print("-" * 60)
+        print(f"✅ Scored {summary.n_rows:,} rows in {elapsed:.2f}s "
+              f"({summary.n_rows / elapsed:,.0f} rows/sec)")
+        print(f"   Not Good: {summary.pred_counts[0]:,}   Good: {summary.pred_counts[1]:,}")
+        if summary.has_target:
+            scores = summary.metrics()
+            print("   " + "   ".join(f"{k}: {v:.4f}" for k, v in scores.items()))
+        if summary.grade_counts is not None:
+            print("   Grades: " + "   ".join(f"{g}: {n:,}" for g, n in enumerate(summary.grade_counts) if n))
+        if summary.has_grade_target:
+            scores = summary.grade_metrics()
+            print("   Grade " + "   ".join(f"{k}: {v:.4f}" for k, v in scores.items()))
+        if summary.explanations is not None:
+            print(f"   🔍 Feature contributions ({summary.explanations.units}), largest first:")
+            print(summary.explanations.table().head(5).to_string(index=False, float_format='{:.4f}'.format))
+        if summary.validation is not None:
+            print_validation(summary.validation)
+        print(f"💾 Predictions saved to: {args.output}")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
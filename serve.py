@@ -0,0 +1,349 @@
+"""
+Wine Quality Classification - Prediction Service
+Low-latency local HTTP scoring: models load once, concurrent requests are micro-batched
+
+Usage:
+    python serve.py --port 8502
+    curl -s localhost:8502/predict -d '{"model": "XGBoost", "rows": [{"fixed acidity": 7.4, ...}]}'
+    python serve.py --models XGBoost "XGBoost (Grades)"   # grade models also return the 3-9 grade
+
+Endpoints:
+    POST /predict   {"model": name, "rows": [{feature: value, ...}, ...]}  (or "row": {...})
+    GET  /models    available models
+    GET  /stats     request counts, batch sizes and p50/p99 latency per model
+    GET  /health    liveness check
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import warnings
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import numpy as np
+import pandas as pd
+
+from model.artifacts import GRADE_MODEL_NAMES, MODEL_NAMES, load_thresholds
+from model.dataset import FEATURE_COLUMNS
+from model.registry import ModelRegistry
+from model.scoring import CLASS_NAMES, score_chunk, score_grade_chunk
+
+warnings.filterwarnings('ignore')
+
+MAX_BATCH_ROWS = 4096
+MAX_WAIT_MS = 2.0
+MAX_BODY_BYTES = 16 * 1024 * 1024
+LATENCY_WINDOW = 10_000
+
+
+class RequestError(Exception):
+    """A client error, reported as HTTP 400 with its message."""
+
+
+def parse_rows(payload):
+    """Feature matrix (rows x FEATURE_COLUMNS) from a request body."""
+    rows = payload.get('rows')
+    if rows is None and 'row' in payload:
+        rows = [payload['row']]
+    if not isinstance(rows, list) or not rows:
+        raise RequestError("body must contain 'rows' (a non-empty list) or 'row'")
+
+    X = np.empty((len(rows), len(FEATURE_COLUMNS)))
+    for i, row in enumerate(rows):
+        if isinstance(row, dict):
+            missing = [c for c in FEATURE_COLUMNS if c not in row]
+            if missing:
+                raise RequestError(f"row {i}: missing feature(s) {missing}")
+            row = [row[c] for c in FEATURE_COLUMNS]
+        elif not isinstance(row, list) or len(row) != len(FEATURE_COLUMNS):
+            raise RequestError(f"row {i}: expected an object or a list of {len(FEATURE_COLUMNS)} values")
+        try:
+            X[i] = row
+        except (TypeError, ValueError):
+            raise RequestError(f"row {i}: feature values must be numbers")
+    return X
+
+
+class LatencyStats:
+    """Rolling window of request latencies plus batch size counters for one model."""
+
+    def __init__(self):
+        self.latencies_ms = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+
+    def summary(self):
+        latencies = np.asarray(self.latencies_ms)
+        return {
+            'requests': self.requests,
+            'rows': self.rows,
+            'batches': self.batches,
+            'mean_batch_rows': round(self.rows / self.batches, 2) if self.batches else 0,
+            'p50_ms': round(float(np.percentile(latencies, 50)), 3) if len(latencies) else None,
+            'p99_ms': round(float(np.percentile(latencies, 99)), 3) if len(latencies) else None
+        }
+
+
+class MicroBatcher:
+    """
+    Collects concurrent requests for one model and scores them in a single call.
+
+    A batch closes when it reaches ``max_rows`` or ``max_wait_ms`` after its
+    first request, whichever comes first; while one batch is being scored the
+    next one is already filling, so throughput grows with concurrency.
+    """
+
+    def __init__(self, model, scaler, executor, max_rows=MAX_BATCH_ROWS, max_wait_ms=MAX_WAIT_MS, threshold=None):
+        self.model = model
+        self.scaler = scaler
+        self.threshold = threshold
+        self.executor = executor
+        self.max_rows = max_rows
+        self.max_wait = max_wait_ms / 1000
+        self.queue = asyncio.Queue()
+        self.stats = LatencyStats()
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def predict(self, X):
+        started = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((X, future))
+        result = await future
+        self.stats.latencies_ms.append((time.perf_counter() - started) * 1000)
+        self.stats.requests += 1
+        return result
+
+    def _score(self, X):
+        # Grade models (model/grades.py) also return the grade and expected grade from the same pass
+        score = score_grade_chunk if hasattr(self.model, 'predict_grade_proba') else score_chunk
+        return score(self.model, self.scaler, pd.DataFrame(X, columns=FEATURE_COLUMNS), self.threshold)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            n_rows = len(batch[0][0])
+            deadline = loop.time() + self.max_wait
+            while n_rows < self.max_rows:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                n_rows += len(item[0])
+
+            X = np.vstack([x for x, _ in batch]) if len(batch) > 1 else batch[0][0]
+            try:
+                outputs = await loop.run_in_executor(self.executor, self._score, X)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.stats.batches += 1
+            self.stats.rows += n_rows
+            start = 0
+            for x, future in batch:
+                end = start + len(x)
+                if not future.done():
+                    future.set_result(tuple(output[start:end] for output in outputs))
+                start = end
+
+
+class PredictionService:
+    def __init__(self, registry, model_names, max_rows=MAX_BATCH_ROWS, max_wait_ms=MAX_WAIT_MS):
+        self.registry = registry
+        self.model_names = model_names
+        self.max_rows = max_rows
+        self.max_wait_ms = max_wait_ms
+        # One scoring thread: predict_proba releases the GIL in NumPy/XGBoost,
+        # and a single thread keeps batches from different models from thrashing the cores
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.batchers = {}
+        self.started_at = time.time()
+
+    def load(self):
+        """Load every model once, before the first request arrives."""
+        # Each model predicts at its operating threshold from train_models.py
+        thresholds = load_thresholds()
+        for name in self.model_names:
+            model, scaler = self.registry.pipeline(name, compiled=True)
+            # Scoring is serialised on one thread; multi-threaded predictors only add overhead
+            if 'n_jobs' in model.get_params():
+                model.set_params(n_jobs=1)
+            self.batchers[name] = MicroBatcher(model, scaler, self.executor, self.max_rows, self.max_wait_ms,
+                                               thresholds.get(name))
+
+    def start(self):
+        for batcher in self.batchers.values():
+            batcher.start()
+
+    async def predict(self, payload):
+        name = payload.get('model', 'XGBoost')
+        if name not in self.batchers:
+            raise RequestError(f"unknown model {name!r}; available: {sorted(self.batchers)}")
+        X = parse_rows(payload)
+        labels, confidence, *grades = await self.batchers[name].predict(X)
+        predictions = [
+            {'label': int(label), 'class': CLASS_NAMES[int(label)], 'confidence': round(float(c), 6)}
+            for label, c in zip(labels, confidence)
+        ]
+        if grades:
+            for prediction, grade, expected in zip(predictions, *grades):
+                prediction.update(grade=int(grade), expected_grade=round(float(expected), 4))
+        return {
+            'model': name,
+            'threshold': self.batchers[name].threshold,
+            'predictions': predictions
+        }
+
+    def stats(self):
+        return {
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+            'models': {name: b.stats.summary() for name, b in self.batchers.items()}
+        }
+
+    async def route(self, method, path, body):
+        if method == 'GET' and path == '/health':
+            return HTTPStatus.OK, {'status': 'ok'}
+        if method == 'GET' and path == '/models':
+            return HTTPStatus.OK, {'models': list(self.batchers)}
+        if method == 'GET' and path == '/stats':
+            return HTTPStatus.OK, self.stats()
+        if method == 'POST' and path == '/predict':
+            try:
+                payload = json.loads(body or b'{}')
+            except ValueError:
+                raise RequestError("body is not valid JSON")
+            if not isinstance(payload, dict):
+                raise RequestError("body must be a JSON object")
+            return HTTPStatus.OK, await self.predict(payload)
+        return HTTPStatus.NOT_FOUND, {'error': f"no route for {method} {path}"}
+
+    async def handle(self, reader, writer):
+        """HTTP/1.1 with keep-alive: one connection can carry many requests."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST, {'error': 'malformed request line'}, False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST, {'error': 'malformed Content-Length'}, False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                        {'error': f"body exceeds {MAX_BODY_BYTES} bytes"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              and version.upper() == 'HTTP/1.1')
+                try:
+                    status, response = await self.route(method.upper(), target.split('?')[0], body)
+                except RequestError as e:
+                    status, response = HTTPStatus.BAD_REQUEST, {'error': str(e)}
+                except Exception as e:
+                    status, response = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f"{type(e).__name__}: {e}"}
+                await self._respond(writer, status, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode()
+        head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+
+async def serve(service, host, port):
+    service.start()
+    server = await asyncio.start_server(service.handle, host, port)
+    print(f"🚀 Serving {len(service.batchers)} model(s) on http://{host}:{port} (Ctrl+C to stop)")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve wine quality predictions over HTTP.")
+    parser.add_argument('--host', default='127.0.0.1', help="Bind address (default: %(default)s)")
+    parser.add_argument('--port', type=int, default=8502, help="Port (default: %(default)s)")
+    parser.add_argument('--models', nargs='+', default=None,
+                        help="Models to load, including grade models such as 'XGBoost (Grades)' "
+                             "(default: every binary model with a trained artifact)")
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH_ROWS,
+                        help="Most rows scored in one call (default: %(default)s)")
+    parser.add_argument('--max-wait-ms', type=float, default=MAX_WAIT_MS,
+                        help="Longest a request waits for its batch to fill (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    registry = ModelRegistry()
+    available = registry.available(MODEL_NAMES + GRADE_MODEL_NAMES)
+    names = args.models or registry.available()
+    unknown = [n for n in names if n not in available]
+    if unknown:
+        parser.error(f"no trained artifact for {unknown}; available: {available}")
+
+    print("=" * 60)
+    print("WINE QUALITY CLASSIFICATION - PREDICTION SERVICE")
+    print("=" * 60)
+    for problem in registry.validate():
+        print(f"⚠️  {problem}")
+
+    service = PredictionService(registry, names, args.max_batch, args.max_wait_ms)
+    started = time.perf_counter()
+    service.load()
+    print(f"✅ Loaded {', '.join(names)} in {time.perf_counter() - started:.2f}s")
+
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("\n📊 Latency summary:")
+        for name, summary in service.stats()['models'].items():
+            if summary['requests']:
+                print(f"   {name:20s} {summary['requests']:>8,} requests  "
+                      f"p50 {summary['p50_ms']:.2f} ms  p99 {summary['p99_ms']:.2f} ms  "
+                      f"mean batch {summary['mean_batch_rows']:.1f} rows")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()